@@ -259,11 +259,14 @@ const ActionDetailsModal = ({ visible, action, onClose }) => {
                       {action.verification_result.checks.map((check, idx) => (
                         <Timeline.Item 
                           key={idx}
-                          color={check.status === 'pass' ? 'green' : 'red'}
+                          color={check.status === 'pass' ? 'green' : check.status === 'skipped' ? 'gray' : 'red'}
                         >
-                          <Text strong>{check.type}</Text> - {check.status}
+                          <Text strong>{check.name ? `${check.type} (${check.name})` : check.type}</Text> - {check.status}
                           <br />
                           <Text type="secondary">{check.details}</Text>
+                          {check.time_to_healthy_ms != null && (
+                            <Text type="secondary"> · healthy after {(check.time_to_healthy_ms / 1000).toFixed(1)}s</Text>
+                          )}
                         </Timeline.Item>
                       ))}
                     </Timeline>
@@ -12,7 +12,7 @@ const ExecuteModal = ({ visible, action, onCancel, onSuccess }) => {
     setLoading(true);
     try {
       const result = await apiService.executeAction(action.action_id, values.webhook_url);
-      message.success('Action executed successfully!');
+      message.success('Action queued for execution');
       form.resetFields();
       onSuccess(result);
     } catch  {
@@ -3,11 +3,13 @@ import { CheckCircleOutlined, ExclamationCircleOutlined, ApiOutlined, Thunderbol
 
 
 
-const StatisticsCards = ({ actions }) => {
-  const totalActions = actions.length;
-  const approvedActions = actions.filter(a => a.approval).length;
-  const executedActions = actions.filter(a => a.execution).length;
-  const highRiskActions = actions.filter(a => a.risk_assessment?.risk_level === 'high').length;
+// counts maintained by the gateway, see GET /atp/v1/stats
+const StatisticsCards = ({ stats }) => {
+  const statusCounts = stats?.status_counts || {};
+  const totalActions = stats?.actions || 0;
+  const approvedActions = statusCounts.approved || 0;
+  const executedActions = (statusCounts.executed || 0) + (statusCounts.verified || 0);
+  const highRiskActions = stats?.risk_levels?.high || 0;
 
   return (
     <Row gutter={16} style={{ marginBottom: 24 }}>
@@ -16,6 +16,7 @@ import {apiService } from "../api";
 
 const ATPDashboard = () => {
   const [actions, setActions] = useState([]);
+  const [stats, setStats] = useState(null);
   const [healthStatus, setHealthStatus] = useState(null);
   const [selectedAction, setSelectedAction] = useState(null);
   const [isCreateModalVisible, setIsCreateModalVisible] = useState(false);
@@ -59,9 +60,21 @@ const ATPDashboard = () => {
 }, []);
 
 
-// fetch actions on mount
+// fetch actions and stats on mount, then keep them current from the event stream
 useEffect(() => {
   let mounted = true;
+  let statsTimer = null;
+  const fetchStats = async () => {
+    statsTimer = null;
+    try {
+      const data = await apiService.getStats();
+      if (mounted) {
+        setStats(data);
+      }
+    } catch {
+      message.error('Failed to fetch statistics');
+    }
+  };
   const fetchActions = async () => {
     try {
       const data = await apiService.getActions();
@@ -71,26 +84,52 @@ useEffect(() => {
       } catch {
       message.error('Failed to fetch actions');
     }
+    fetchStats();
   };
   fetchActions(); // initial fetch
+
+  const applyEvent = (event) => {
+    if (!mounted) return;
+    // one stats refresh per burst of events
+    if (!statsTimer) {
+      statsTimer = setTimeout(fetchStats, 2000);
+    }
+    setActions((current) => {
+      if (event.event === 'action_declared') {
+        return current.some((action) => action.action_id === event.action_id)
+          ? current
+          : [event.data, ...current];
+      }
+      if (!event.status) return current;
+      return current.map((action) =>
+        action.action_id === event.action_id ? { ...action, status: event.status } : action
+      );
+    });
+  };
+  // missed events are gone from the server history, start over from the full list
+  const unsubscribe = apiService.subscribeEvents(applyEvent, fetchActions);
+
   return () => {
     mounted = false;
+    clearTimeout(statsTimer);
+    unsubscribe();
   };
 }, []);
 
   const handleCreateSuccess = (data) => {
-    setActions([data, ...actions]);
+    setActions((current) =>
+      current.some((action) => action.action_id === data.action_id) ? current : [data, ...current]
+    );
     setIsCreateModalVisible(false);
   };
 
   const handleApprovalSuccess = () => {
     setIsApprovalModalVisible(false);
-    message.info('Please refresh to see updated status');
   };
 
   const handleExecuteSuccess = (result) => {
     setIsExecuteModalVisible(false);
-    message.success('Execution completed!', result);
+    message.success(`Execution job ${result.job_id} queued`);
   };
 
   return (
@@ -115,7 +154,7 @@ useEffect(() => {
               </Space>
             </Card>
 
-            <StatisticsCards actions={actions} />
+            <StatisticsCards stats={stats} />
 
             <Card title="Actions">
               <ActionsTable
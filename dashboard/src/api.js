@@ -48,6 +48,11 @@ const apiServiceReal = {
     return response.json();
   },
 
+  async getStats(period = 'hour', window = 24) {
+    const response = await fetch(`${API_BASE_URL}/stats?period=${period}&window=${window}`);
+    return response.json();
+  },
+
   async getAuditTrail(actionId) {
     const response = await fetch(`${API_BASE_URL}/actions/${actionId}/audit-trail`);
     return response.json();
@@ -57,6 +62,14 @@ const apiServiceReal = {
     const response = await fetch(`${API_BASE_URL}/actions/${actionId}/explain`);
     return response.json();
   },
+
+  // live audit events, the browser reconnects and resumes after the last event id on its own
+  subscribeEvents(onEvent, onReset) {
+    const source = new EventSource(`${API_BASE_URL}/events`);
+    source.onmessage = (message) => onEvent(JSON.parse(message.data));
+    source.addEventListener('reset', onReset);
+    return () => source.close();
+  },
 };
 
 export const apiService = shouldUseMock ? mockApiService : apiServiceReal;
@@ -742,6 +742,31 @@ export const mockApiService = {
     });
   },
 
+  subscribeEvents() {
+    return () => {};
+  },
+
+  async getStats() {
+    return new Promise((resolve) => {
+      setTimeout(() => {
+        const countBy = (values) => values.reduce((counts, value) => {
+          counts[value] = (counts[value] || 0) + 1;
+          return counts;
+        }, {});
+        const scores = mockActions.map(a => a.risk_assessment?.risk_score).filter(score => score !== undefined);
+        resolve({
+          actions: mockActions.length,
+          status_counts: countBy(mockActions.map(a => a.status)),
+          risk_levels: countBy(mockActions.map(a => a.risk_assessment?.risk_level).filter(Boolean)),
+          mean_risk_score: scores.length ? scores.reduce((sum, score) => sum + score, 0) / scores.length : null,
+          period: 'hour',
+          rollups: [],
+          services: [],
+        });
+      }, 300);
+    });
+  },
+
   async getActions() {
     return new Promise((resolve) => {
       setTimeout(() => {
@@ -0,0 +1,136 @@
+"""
+Bulk declare against one /declare call per action.
+
+Spins up the OpenAI compatible stub, serves the gateway with uvicorn and
+declares the same number of actions twice: one POST /atp/v1/actions/declare
+per action at the given client concurrency, then a single NDJSON POST to
+/atp/v1/actions/declare/bulk. Reports wall time, throughput and, for the
+bulk call, the time to the first streamed result.
+
+Usage (from the gateaway directory):
+    python -m benchmarks.bulk_declare --actions 200 --concurrency 4 --llm-latency-ms 200
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict
+
+import httpx
+
+from benchmarks.stubs import StubServer, create_openai_stub
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ATP gateway bulk declare benchmark")
+    parser.add_argument("--actions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="Client concurrency of the single declares")
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--in-memory", action="store_true", help="Do not persist to SQLite")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args()
+
+
+def declaration(run: str, index: int) -> Dict:
+    return {
+        "action_id": "pending",
+        "workflow_id": "wf_service_remediation_v1",
+        "initiator": {"type": "ai_agent", "source": "benchmark"},
+        "timestamp": "2024-01-01T00:00:00",
+        "action_type": "service.remediation",
+        "target": {"system": "kubernetes", "resource": "deployment", "operation": "restart"},
+        "payload": {"replicas": 2},
+        "context": {"service": f"{run}-svc-{index}", "namespace": "staging", "business_reason": "replayed alert"}
+    }
+
+
+async def declare_one_by_one(client: httpx.AsyncClient, actions: int, concurrency: int) -> Dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(actions):
+        queue.put_nowait(index)
+    failed = 0
+
+    async def worker():
+        nonlocal failed
+        while not queue.empty():
+            index = queue.get_nowait()
+            response = await client.post("/atp/v1/actions/declare", json=declaration("single", index))
+            failed += response.status_code != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"elapsed_s": round(elapsed, 3), "actions_per_s": round(actions / elapsed, 1), "failed": failed}
+
+
+async def declare_bulk(client: httpx.AsyncClient, actions: int) -> Dict:
+    body = b"\n".join(json.dumps(declaration("bulk", index)).encode() for index in range(actions))
+    statuses: Dict[str, int] = {}
+    first_result = None
+    started = time.perf_counter()
+    async with client.stream(
+        "POST", "/atp/v1/actions/declare/bulk", content=body,
+        headers={"content-type": "application/x-ndjson"}
+    ) as response:
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            if first_result is None:
+                first_result = time.perf_counter() - started
+            status = json.loads(line)["status"]
+            statuses[status] = statuses.get(status, 0) + 1
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "actions_per_s": round(actions / elapsed, 1),
+        "first_result_s": round(first_result or 0.0, 3),
+        "statuses": statuses
+    }
+
+
+def main():
+    args = parse_args()
+    openai_stub = StubServer(create_openai_stub(
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms
+    )).start()
+
+    workdir = tempfile.mkdtemp(prefix="atp-bench-")
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark-stub"
+    os.environ["OPENAI_API_URL"] = f"{openai_stub.url}/v1/chat/completions"
+    os.environ["ATP_DB_PATH"] = "" if args.in_memory else os.path.join(workdir, "atp_bench.db")
+    os.environ["DEDUP_WINDOW_SECONDS"] = "0"
+    os.environ["INCIDENT_WINDOW_SECONDS"] = "0"
+    os.environ["AUTO_EXECUTE_ENABLED"] = "false"
+
+    gateway = importlib.import_module("main")
+    gateway_server = StubServer(gateway.app).start()
+
+    async def run():
+        async with httpx.AsyncClient(base_url=gateway_server.url, timeout=600) as client:
+            return {
+                "single": await declare_one_by_one(client, args.actions, args.concurrency),
+                "bulk": await declare_bulk(client, args.actions)
+            }
+
+    try:
+        report = asyncio.run(run())
+    finally:
+        gateway_server.stop()
+        openai_stub.stop()
+
+    report["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    for mode in ("single", "bulk"):
+        print(f"{mode:<8} {json.dumps(report[mode])}")
+    print(f"speedup  x{report['single']['elapsed_s'] / report['bulk']['elapsed_s']:.2f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
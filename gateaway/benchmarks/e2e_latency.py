@@ -0,0 +1,336 @@
+"""
+End-to-end latency benchmark of the declare -> approve -> execute pipeline.
+
+Spins up a local OpenAI compatible stub and an n8n webhook stub, points the
+gateway at them, serves the gateway with uvicorn and drives full remediation
+flows at the configured concurrency. Reports throughput and p50/p95/p99 per
+endpoint and per internal stage.
+
+Usage (from the gateaway directory):
+    python -m benchmarks.e2e_latency --flows 200 --concurrency 20
+    python -m benchmarks.e2e_latency --llm-latency-ms 50 --n8n-latency-ms 50 --output run.json
+    python -m benchmarks.e2e_latency --baseline run.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.stubs import StubServer, create_n8n_stub, create_openai_stub
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ATP gateway end-to-end latency benchmark")
+    parser.add_argument("--flows", type=int, default=100, help="Number of declare/approve/execute flows")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent flows in flight")
+    parser.add_argument("--warmup", type=int, default=5, help="Flows run before measuring")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    # low risk actions take the auto-approve fast path and skip approve/execute
+    parser.add_argument("--risk-level", choices=["low", "medium", "high"], default="medium")
+    parser.add_argument("--n8n-latency-ms", type=float, default=1500)
+    parser.add_argument("--n8n-jitter-ms", type=float, default=300)
+    parser.add_argument("--n8n-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--bulkhead-config",
+        default="",
+        help="Bulkhead limits JSON, by default limits are lifted so the benchmark measures raw latency"
+    )
+    parser.add_argument("--in-memory", action="store_true", help="Run the gateway without SQLite persistence")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report of a previous run to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative p95 increase")
+    return parser.parse_args()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: List[float]) -> Dict:
+    values = sorted(samples)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0
+    }
+
+
+class StageRecorder:
+    """Wraps component methods to record how long each pipeline stage takes"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.enabled = False
+
+    def instrument(self, owner, method_name: str, stage: str):
+        original = getattr(owner, method_name)
+        recorder = self
+
+        if asyncio.iscoroutinefunction(original):
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    if recorder.enabled:
+                        recorder.samples[stage].append((time.perf_counter() - started) * 1000)
+        else:
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    if recorder.enabled:
+                        recorder.samples[stage].append((time.perf_counter() - started) * 1000)
+
+        setattr(owner, method_name, wrapper)
+
+
+def instrument_gateway(recorder: StageRecorder):
+    """Attach stage timers to the gateway components"""
+    from components import store, risk_assessor, verification_engine
+    from components.ExecutionEngine import ExecutionEngine
+
+    recorder.instrument(store, "get_similar_actions", "similar_actions_lookup")
+    recorder.instrument(risk_assessor, "assess_risk", "llm_assess")
+    recorder.instrument(risk_assessor, "explain_risk", "llm_explain")
+    for method in (
+        "store_action",
+        "store_risk_assessment",
+        "store_approval",
+        "store_execution",
+        "store_verification",
+        "update_action_status",
+        "audit_log"
+    ):
+        recorder.instrument(store, method, f"store.{method}")
+    recorder.instrument(ExecutionEngine, "execute", "n8n_dispatch")
+    recorder.instrument(verification_engine, "verify", "verification")
+
+
+def declaration(index: int) -> Dict:
+    return {
+        "action_id": "",
+        "workflow_id": "wf_service_remediation_v1",
+        "initiator": {"type": "webhook", "source": "benchmark"},
+        "timestamp": "",
+        "action_type": "service.remediation",
+        "target": {"system": "argocd", "resource": "application", "operation": "rollback"},
+        "payload": {"application_name": f"bench-service-{index % 20}"},
+        "context": {
+            "business_reason": "Benchmark declared remediation",
+            "service": f"bench-service-{index % 20}",
+            "namespace": "staging",
+            "related_entities": [f"service:bench-service-{index % 20}"]
+        }
+    }
+
+
+async def run_flow(client: httpx.AsyncClient, index: int, webhook_url: str, endpoints: Dict, record: bool):
+    """One full remediation: declare, approve, execute"""
+
+    async def call(name: str, path: str, body: Dict):
+        started = time.perf_counter()
+        response = await client.post(path, json=body)
+        if record:
+            endpoints[name]["latency"].append((time.perf_counter() - started) * 1000)
+            endpoints[name]["status"][response.status_code] += 1
+        return response
+
+    response = await call("declare", "/atp/v1/actions/declare", declaration(index))
+    if response.status_code != 200:
+        return False
+    declared = response.json()
+    action_id = declared["action_id"]
+    if declared.get("next_step") == "auto_executing":
+        return True
+
+    response = await call("approve", "/atp/v1/actions/approve", {
+        "action_id": action_id,
+        "approver": "benchmark",
+        "reason": "benchmark approval"
+    })
+    if response.status_code != 200:
+        return False
+
+    response = await call("execute", "/atp/v1/actions/execute", {
+        "action_id": action_id,
+        "n8n_webhook_url": webhook_url
+    })
+    if response.status_code != 202:
+        return response.status_code == 200
+
+    # execution is queued, wait for the worker pool to finish it
+    started = time.perf_counter()
+    status_url = response.json()["status_url"]
+    while True:
+        await asyncio.sleep(0.05)
+        job = (await client.get(status_url)).json()
+        if job["status"] in ("completed", "failed"):
+            break
+    if record:
+        endpoints["execution_job"]["latency"].append((time.perf_counter() - started) * 1000)
+        endpoints["execution_job"]["status"][job.get("execution_status") or job["status"]] += 1
+    return job["status"] == "completed"
+
+
+async def drive(base_url: str, webhook_url: str, flows: int, concurrency: int, warmup: int, recorder: StageRecorder):
+    endpoints = defaultdict(lambda: {"latency": [], "status": defaultdict(int)})
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        for i in range(warmup):
+            await run_flow(client, i, webhook_url, endpoints, record=False)
+
+        recorder.enabled = True
+        counter = iter(range(flows))
+        completed = {"ok": 0, "failed": 0}
+
+        async def worker():
+            for index in counter:
+                ok = await run_flow(client, index, webhook_url, endpoints, record=True)
+                completed["ok" if ok else "failed"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        recorder.enabled = False
+
+    requests = sum(len(e["latency"]) for e in endpoints.values())
+    return {
+        "flows": completed,
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {
+            "flows_per_s": round(flows / elapsed, 3),
+            "requests_per_s": round(requests / elapsed, 3)
+        },
+        "endpoints": {
+            name: {**summarize(data["latency"]), "status_codes": dict(data["status"])}
+            for name, data in endpoints.items()
+        },
+        "stages": {stage: summarize(samples) for stage, samples in sorted(recorder.samples.items())}
+    }
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Return a line for every endpoint or stage whose p95 regressed beyond the threshold"""
+    regressions = []
+    for section in ("endpoints", "stages"):
+        for name, current in report[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous or not previous["p95_ms"]:
+                continue
+            # ignore sub-millisecond noise
+            if current["p95_ms"] - previous["p95_ms"] < 1.0:
+                continue
+            change = current["p95_ms"] / previous["p95_ms"] - 1
+            if change > max_regression:
+                regressions.append(
+                    f"{section}.{name}: p95 {previous['p95_ms']:.1f} ms -> {current['p95_ms']:.1f} ms (+{change:.0%})"
+                )
+    return regressions
+
+
+def print_report(report: Dict):
+    print(f"Flows: {report['flows']['ok']} ok, {report['flows']['failed']} failed in {report['elapsed_s']} s")
+    print(f"Throughput: {report['throughput']['flows_per_s']} flows/s, {report['throughput']['requests_per_s']} requests/s")
+    header = f"{'':<32}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+    for section in ("endpoints", "stages"):
+        print(f"\n{section.upper()} (ms)")
+        print(header)
+        for name, s in report[section].items():
+            print(
+                f"{name:<32}{s['count']:>7}{s['mean_ms']:>10.1f}{s['p50_ms']:>10.1f}"
+                f"{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}"
+            )
+
+
+def main():
+    args = parse_args()
+
+    openai_stub = StubServer(create_openai_stub(
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms,
+        error_rate=args.llm_error_rate,
+        risk_level=args.risk_level
+    )).start()
+    n8n_stub = StubServer(create_n8n_stub(
+        latency_ms=args.n8n_latency_ms,
+        jitter_ms=args.n8n_jitter_ms,
+        error_rate=args.n8n_error_rate
+    )).start()
+
+    workdir = tempfile.mkdtemp(prefix="atp-bench-")
+    webhook_url = f"{n8n_stub.url}/webhook/{uuid.uuid4()}"
+
+    # configure the gateway before it is imported
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark-stub"
+    os.environ["OPENAI_API_URL"] = f"{openai_stub.url}/v1/chat/completions"
+    os.environ["AUTOMATION_ENGINE_LOW_RISK_WEBHOOK"] = webhook_url
+    os.environ["AUTOMATION_ENGINE_HIGH_RISK_WEBHOOK"] = webhook_url
+    os.environ["ATP_DB_PATH"] = "" if args.in_memory else os.path.join(workdir, "atp_bench.db")
+    if not args.bulkhead_config:
+        args.bulkhead_config = os.path.join(workdir, "bulkhead.json")
+        with open(args.bulkhead_config, "w") as f:
+            json.dump({"target_concurrency": 10000, "namespace_concurrency": 10000, "rate_per_minute": 1e9, "burst": 10000}, f)
+    os.environ["BULKHEAD_CONFIG_PATH"] = args.bulkhead_config
+    # benchmark flows reuse targets, they must not be folded or correlated into each other
+    os.environ["DEDUP_WINDOW_SECONDS"] = "0"
+    os.environ["INCIDENT_WINDOW_SECONDS"] = "0"
+
+    gateway = importlib.import_module("main")
+    recorder = StageRecorder()
+    instrument_gateway(recorder)
+    gateway_server = StubServer(gateway.app).start()
+
+    try:
+        report = asyncio.run(drive(
+            gateway_server.url,
+            webhook_url,
+            args.flows,
+            args.concurrency,
+            args.warmup,
+            recorder
+        ))
+    finally:
+        gateway_server.stop()
+        n8n_stub.stop()
+        openai_stub.stop()
+
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("output", "baseline")}
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.max_regression)
+        if regressions:
+            print("\nREGRESSIONS", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print("\nNo p95 regressions against baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
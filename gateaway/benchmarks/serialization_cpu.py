@@ -0,0 +1,163 @@
+"""
+CPU time per request of the read-heavy endpoints and of the store writes.
+
+Fills an in-memory (or SQLite backed) store with completed actions, then
+calls the endpoints in-process through the ASGI app, so only the gateway's
+own work is measured: validation, model dumps and JSON encoding.
+Reports process CPU microseconds per call.
+
+Usage (from the gateaway directory):
+    python -m benchmarks.serialization_cpu --actions 500 --requests 200
+    python -m benchmarks.serialization_cpu --sqlite --output after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+import httpx
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ATP gateway serialization CPU benchmark")
+    parser.add_argument("--actions", type=int, default=500, help="Completed actions in the store")
+    parser.add_argument("--requests", type=int, default=200, help="Calls per endpoint")
+    parser.add_argument("--sqlite", action="store_true", help="Persist to a temporary SQLite database")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report of a previous run to compare against")
+    return parser.parse_args()
+
+
+def populate(gateway, index: int) -> str:
+    """Store one action with its assessment, approval, execution and verification"""
+    from models import (
+        ActionDeclaration, ActionInitiator, ActionTarget, RiskAssessment, RiskFactor,
+        ApprovalDecision, ExecutionResultModel, VerificationResult
+    )
+    store = gateway.store
+    now = datetime.utcnow().isoformat()
+    action_id = f"act_bench_{index}"
+    store.store_action(ActionDeclaration(
+        action_id=action_id,
+        workflow_id="wf_service_remediation_v1",
+        initiator=ActionInitiator(type="webhook", source="uptime_kuma"),
+        timestamp=now,
+        action_type="service.remediation",
+        target=ActionTarget(system="kubernetes", resource="deployment", operation="restart"),
+        payload={"replicas": 3, "strategy": "rolling"},
+        context={"service": f"svc-{index % 20}", "namespace": "production", "business_reason": "health check failed"}
+    ))
+    store.store_risk_assessment(RiskAssessment(
+        action_id=action_id,
+        timestamp=now,
+        risk_score=0.45,
+        risk_level="medium",
+        risk_factors=[
+            RiskFactor(factor=f"factor_{n}", severity="medium", weight=0.1 * n, details="benchmark factor")
+            for n in range(5)
+        ],
+        similar_actions={"past_30_days": 12, "success_rate": 0.9, "average_completion_time": "45s"},
+        recommendation="human_review",
+        confidence=0.8
+    ))
+    store.store_approval(ApprovalDecision(
+        action_id=action_id, decision="approved", approver="bench", timestamp=now, reason="benchmark"
+    ))
+    store.store_execution(ExecutionResultModel(
+        action_id=action_id, started_at=now, completed_at=now, status="success",
+        result={"execution_id": f"exec_{index}", "status": "success"}
+    ))
+    store.store_verification(VerificationResult(
+        action_id=action_id, timestamp=now, overall_status="verified", confidence=0.95,
+        checks=[{"type": "execution_status", "status": "pass", "details": "Execution status: success"}]
+    ))
+    return action_id
+
+
+def cpu_per_call(calls: int, call: Callable) -> float:
+    started = time.process_time()
+    for _ in range(calls):
+        call()
+    return (time.process_time() - started) / calls * 1e6
+
+
+async def measure_endpoints(app, action_ids, requests: int) -> Dict[str, float]:
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        endpoints = {
+            "GET /actions": lambda i: client.get("/atp/v1/actions"),
+            "GET /actions/{id}/audit-trail": lambda i: client.get(f"/atp/v1/actions/{action_ids[i % len(action_ids)]}/audit-trail"),
+            "POST /actions/execute (already executed)": lambda i: client.post(
+                "/atp/v1/actions/execute",
+                json={"action_id": action_ids[i % len(action_ids)], "n8n_webhook_url": "http://unused"}
+            ),
+        }
+        for name, request in endpoints.items():
+            # the full action list is far heavier than the others
+            calls = max(10, requests // 10) if name == "GET /actions" else requests
+            response = await request(0)
+            assert response.status_code == 200, (name, response.status_code, response.text[:200])
+            started = time.process_time()
+            for i in range(calls):
+                await request(i)
+            results[name] = (time.process_time() - started) / calls * 1e6
+    return results
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="atp-bench-")
+    os.environ["ATP_DB_PATH"] = os.path.join(workdir, "atp_bench.db") if args.sqlite else ""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-stub")
+
+    gateway = importlib.import_module("main")
+    from models import ActionDeclaration
+
+    action_ids = [populate(gateway, i) for i in range(args.actions)]
+    store = gateway.store
+
+    report = {"endpoints_us": asyncio.run(measure_endpoints(gateway.app, action_ids, args.requests))}
+
+    action = store.actions[action_ids[0]]
+    verification = store.verifications[action_ids[0]]
+    counter = iter(range(args.actions, 10 ** 9))
+    report["internals_us"] = {
+        "store.store_verification": cpu_per_call(
+            args.requests, lambda: store.store_verification(verification)
+        ),
+        "ActionDeclaration(**action)": cpu_per_call(args.requests, lambda: ActionDeclaration(**action)),
+        "populate one action": cpu_per_call(max(10, args.requests // 10), lambda: populate(gateway, next(counter)))
+    }
+    if hasattr(store, "declaration"):
+        report["internals_us"]["store.declaration(action_id)"] = cpu_per_call(
+            args.requests, lambda: store.declaration(action_ids[0])
+        )
+    report["config"] = {"actions": args.actions, "requests": args.requests, "sqlite": args.sqlite}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    for section in ("endpoints_us", "internals_us"):
+        print(f"\n{section.upper()} (CPU microseconds per call)")
+        for name, value in report[section].items():
+            line = f"  {name:<45} {value:>12.1f}"
+            before = (baseline or {}).get(section, {}).get(name)
+            if before:
+                line += f"   baseline {before:>12.1f}   x{before / value:.2f}"
+            print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
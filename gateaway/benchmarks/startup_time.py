@@ -0,0 +1,141 @@
+"""
+Time to first request and time to ready of the gateway.
+
+Fills a temporary SQLite database with completed actions, then starts the
+gateway with uvicorn in a fresh process several times and polls
+/atp/v1/health (first request served) and /atp/v1/ready (warm-up done,
+falls back to the first request when the endpoint does not exist).
+Also reports the import cost of the models and components packages on
+their own, e.g. for CLIs such as rescore.py.
+
+Usage (from the gateaway directory):
+    python -m benchmarks.startup_time --actions 3000 --runs 3
+    python -m benchmarks.startup_time --db existing.db --output startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.stubs import free_port
+
+IMPORT_PROBES = {
+    "import models": "import models",
+    "import components.BatchRiskScorer": "import components.BatchRiskScorer",
+    "import main": "import main",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ATP gateway startup benchmark")
+    parser.add_argument("--actions", type=int, default=3000, help="Completed actions in the generated database")
+    parser.add_argument("--db", help="Use this database instead of generating one")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args()
+
+
+def populate_database(db_path: str, actions: int):
+    script = (
+        "import main\n"
+        "from benchmarks.serialization_cpu import populate\n"
+        "with main.store.batch():\n"
+        f"    for index in range({actions}):\n"
+        "        populate(main, index)\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "ATP_DB_PATH": db_path},
+        check=True,
+        stdout=subprocess.DEVNULL
+    )
+
+
+def import_seconds(statement: str, env: Dict) -> float:
+    script = f"import time\nstarted = time.perf_counter()\n{statement}\nprint(time.perf_counter() - started)"
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def start_once(env: Dict, timeout: float) -> Dict:
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    result = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+            while "first_request_s" not in result:
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError("gateway did not answer")
+                try:
+                    if client.get("/atp/v1/health").status_code == 200:
+                        result["first_request_s"] = round(time.perf_counter() - started, 3)
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            while "ready_s" not in result:
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError("gateway did not become ready")
+                response = client.get("/atp/v1/ready")
+                if response.status_code == 404:
+                    result["ready_s"] = result["first_request_s"]
+                elif response.status_code == 200:
+                    result["ready_s"] = round(time.perf_counter() - started, 3)
+                    result["readiness"] = response.json()
+                else:
+                    time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait()
+    return result
+
+
+def median(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def main():
+    args = parse_args()
+    db_path = args.db
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="atp-bench-"), "atp_bench.db")
+        populate_database(db_path, args.actions)
+
+    env = {**os.environ, "ATP_DB_PATH": db_path, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-benchmark-stub")}
+    imports = {name: round(import_seconds(statement, env), 3) for name, statement in IMPORT_PROBES.items()}
+    runs = [start_once(env, args.timeout) for _ in range(args.runs)]
+
+    report = {
+        "imports_s": imports,
+        "first_request_s": median([run["first_request_s"] for run in runs]),
+        "ready_s": median([run["ready_s"] for run in runs]),
+        "runs": runs,
+        "config": {"db": db_path, "actions": None if args.db else args.actions, "runs": args.runs}
+    }
+    for name, seconds in imports.items():
+        print(f"{name:<40} {seconds:>8.3f}s")
+    print(f"{'time to first request (median)':<40} {report['first_request_s']:>8.3f}s")
+    print(f"{'time to ready (median)':<40} {report['ready_s']:>8.3f}s")
+    if runs[-1].get("readiness"):
+        print(json.dumps(runs[-1]["readiness"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Local stand-ins for the external services the gateway talks to, so the
+declare -> approve -> execute pipeline can be benchmarked offline.
+
+- an OpenAI compatible chat completions endpoint
+- an n8n webhook endpoint
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+RISK_SCORES = {"low": 0.15, "medium": 0.45, "high": 0.85}
+
+
+async def _simulate(latency_ms: float, jitter_ms: float, error_rate: float) -> bool:
+    """Sleep for the configured latency and return True if this call should fail"""
+    delay = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+    await asyncio.sleep(delay)
+    return random.random() < error_rate
+
+
+def create_openai_stub(
+        latency_ms: float = 800,
+        jitter_ms: float = 200,
+        error_rate: float = 0.0,
+        risk_level: str = "low"
+    ) -> FastAPI:
+    """
+    OpenAI compatible `/v1/chat/completions` stub.
+    Risk assessment prompts get a valid risk JSON back, every other prompt
+    gets a short explanation text.
+    """
+    app = FastAPI(title="OpenAI stub")
+    app.state.calls = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+
+        if await _simulate(latency_ms, jitter_ms, error_rate):
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "stub injected failure", "type": "server_error"}}
+            )
+
+        user_prompt = body["messages"][-1]["content"]
+        if "Respond with ONLY a valid JSON object" in user_prompt:
+            risk_score = RISK_SCORES[risk_level]
+            content = json.dumps({
+                "risk_score": risk_score,
+                "risk_level": risk_level,
+                "risk_factors": [{
+                    "factor": "stub_factor",
+                    "severity": risk_level,
+                    "weight": risk_score,
+                    "details": "Generated by the local OpenAI stub"
+                }],
+                "recommendation": "auto_approve" if risk_level == "low" else "human_review",
+                "confidence": 0.9,
+                "reasoning": "stub"
+            })
+        else:
+            content = "Stub explanation of the risk assessment."
+
+        prompt_tokens = len(user_prompt) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    return app
+
+
+def create_n8n_stub(
+        latency_ms: float = 1500,
+        jitter_ms: float = 300,
+        error_rate: float = 0.0
+    ) -> FastAPI:
+    """n8n webhook stub that accepts any workflow id and dedupes by Idempotency-Key"""
+    app = FastAPI(title="n8n stub")
+    app.state.calls = 0
+    app.state.duplicates = 0
+    app.state.completed = {}
+
+    @app.post("/webhook/{workflow_id}")
+    async def webhook(workflow_id: str, request: Request):
+        body = await request.json()
+        app.state.calls += 1
+
+        key = request.headers.get("Idempotency-Key")
+        if key in app.state.completed:
+            app.state.duplicates += 1
+            return app.state.completed[key]
+
+        if await _simulate(latency_ms, jitter_ms, error_rate):
+            return JSONResponse(status_code=500, content={"message": "stub injected failure"})
+
+        result = {
+            "workflow_id": workflow_id,
+            "execution_id": uuid.uuid4().hex[:12],
+            "atp_action_id": body.get("atp_action_id"),
+            "status": "success"
+        }
+        if key:
+            app.state.completed[key] = result
+        return result
+
+    return app
+
+
+def create_uptime_kuma_stub(monitors: dict = None, recover_after_s: float = 0.0) -> FastAPI:
+    """
+    Uptime Kuma status page stub, serves /api/status-page/heartbeat/{slug}.
+    Monitors report down until recover_after_s seconds after the stub was created.
+    """
+    app = FastAPI(title="Uptime Kuma stub")
+    app.state.monitors = monitors if monitors is not None else {1: "service"}
+    app.state.started = time.monotonic()
+    app.state.calls = 0
+
+    @app.get("/api/status-page/heartbeat/{slug}")
+    async def heartbeat(slug: str):
+        app.state.calls += 1
+        up = time.monotonic() - app.state.started >= recover_after_s
+        return {
+            "heartbeatList": {
+                str(monitor_id): [{"status": 1 if up else 0, "msg": "" if up else f"{name} is down"}]
+                for monitor_id, name in app.state.monitors.items()
+            },
+            "uptimeList": {}
+        }
+
+    return app
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubServer:
+    """Run an ASGI app under uvicorn in a background thread"""
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = None):
+        self.app = app
+        self.host = host
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(
+            app,
+            host=self.host,
+            port=self.port,
+            log_level="warning",
+            access_log=False
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> "StubServer":
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server on port {self.port} did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
@@ -1,22 +1,54 @@
 from uuid import uuid4
-from typing import Dict, List, Optional
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
 from models import (
     ActionDeclaration,
     RiskAssessment,
     VerificationResult,
     ApprovalDecision,
     ExecutionResultModel,
+    ExecutionJob,
+    Incident,
+    RollbackAction,
     ActionStatus
 )
-from datetime import datetime
+from datetime import datetime, timedelta
+from contextlib import contextmanager
 import sqlite3
-import json
+import gc
+import os
+
+from components.Serialization import dumps, dumps_str, loads
+from components.Metrics import metrics
+from components.Tracing import tracer
+
+# counts of the stats rollups, per period bucket, namespace and service
+ROLLUP_METRICS = ("declared", "approved", "executed", "verified", "failed", "risk_score_sum", "risk_scored")
+# rollup period -> (length of the ISO timestamp prefix naming a bucket, bucket length)
+ROLLUP_PERIODS = {"hour": (13, timedelta(hours=1)), "day": (10, timedelta(days=1))}
+UPSERT_ROLLUP = f"""
+    INSERT INTO stats_rollups (period, bucket, namespace, service, {", ".join(ROLLUP_METRICS)})
+    VALUES ({", ".join("?" * (4 + len(ROLLUP_METRICS)))})
+    ON CONFLICT (period, bucket, namespace, service) DO UPDATE SET
+        {", ".join(f"{metric} = {metric} + excluded.{metric}" for metric in ROLLUP_METRICS)}
+"""
+
+STORE_CACHE = metrics.counter(
+    "atp_store_cache_requests_total", "Reads of the validated declaration and encoded record caches", ("cache", "result")
+)
+
+
+def _status(value) -> str:
+    """Plain string of a status or level, enum members and strings count as the same key"""
+    return getattr(value, "value", value)
 
 
 class ATPStore:
     """
     Store for ATP components with optional SQLite persistence.
     Supports both in-memory and persistent database storage.
+    Creating a store does not touch the database, open() creates the schema
+    and loads the caches, the first write opens it when nobody did.
     """
 
     def __init__(self, db_path: Optional[str] = None):
@@ -29,6 +61,7 @@ class ATPStore:
         """
         self.db_path = db_path
         self.use_db = db_path is not None
+        self.is_open = not self.use_db
         
         # In-memory caches (always used for fast access)
         self.actions: Dict[str, Dict] = {}
@@ -38,10 +71,54 @@ class ATPStore:
         self.verifications: Dict[str, VerificationResult] = {}
         self.audit_logs: Dict[str, List[Dict]] = {}
         self.action_history: List[Dict] = []
-        
-        if self.use_db:
+        # Learned (system, operation, namespace, service, hour_of_week) -> [successes, failures]
+        self.risk_priors: Dict[Tuple, List[int]] = {}
+        self.watermarks: Dict[str, int] = {}
+        self.execution_jobs: Dict[str, ExecutionJob] = {}
+        self.incidents: Dict[str, Incident] = {}
+        self.rollbacks: Dict[str, RollbackAction] = {}
+        # counters maintained on every write, so stats never scan the actions
+        self.status_counts: Counter = Counter()
+        self.risk_level_counts: Counter = Counter()
+        self.risk_score_sum = 0.0
+        # (period, bucket) -> (namespace, service) -> counts of ROLLUP_METRICS
+        self.stats_rollups: Dict[Tuple[str, str], Dict[Tuple[str, str], List[float]]] = {}
+        # pre-encoded JSON of records that never change once stored
+        self._encoded: Dict[str, Dict[str, bytes]] = {"risk_assessment": {}, "verification": {}}
+        # validated declarations, kept in sync with the status of self.actions
+        self._declarations: Dict[str, ActionDeclaration] = {}
+        # called with (action_id, entry) after every audit log entry
+        self.audit_listeners: List[Callable[[str, Dict], None]] = []
+        # connection shared by writes inside batch()
+        self._batch_conn: Optional[sqlite3.Connection] = None
+    
+    def open(self, db_path: Optional[str] = None):
+        """
+        Create the schema and load the database into the in-memory caches.
+        A db_path given here replaces the one of the constructor.
+        """
+        if db_path is not None:
+            if self.is_open and self.use_db:
+                raise ValueError(f"Store is already open on {self.db_path}")
+            self.db_path = db_path
+            self.use_db = True
+        elif self.is_open:
+            return
+        # set first, loading writes the backfilled rollups through _connect()
+        self.is_open = True
+        # the load allocates many long lived objects, collections while it
+        # runs would only rescan them, about half of the load time
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
             self._init_database()
             self._load_from_database()
+        except Exception:
+            self.is_open = False
+            raise
+        finally:
+            if collecting:
+                gc.enable()
     
     def _init_database(self):
         """Initialize SQLite database schema"""
@@ -119,6 +196,80 @@ class ATPStore:
             )
         """)
         
+        # Learned risk priors table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS risk_priors (
+                system TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                namespace TEXT NOT NULL,
+                service TEXT NOT NULL,
+                hour_of_week INTEGER NOT NULL,
+                successes INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (system, operation, namespace, service, hour_of_week)
+            ) WITHOUT ROWID
+        """)
+        
+        # Watermarks of incremental background jobs
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS job_watermarks (
+                job TEXT PRIMARY KEY,
+                watermark INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        
+        # Durable execution queue
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS execution_jobs (
+                job_id TEXT PRIMARY KEY,
+                action_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_execution_jobs_status ON execution_jobs (status)"
+        )
+        
+        # Rollbacks, one per action
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rollbacks (
+                action_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        
+        # Correlated incidents
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS incidents (
+                incident_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        
+        # Hourly and daily outcome counts per namespace and service
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stats_rollups (
+                period TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                namespace TEXT NOT NULL,
+                service TEXT NOT NULL,
+                declared INTEGER NOT NULL DEFAULT 0,
+                approved INTEGER NOT NULL DEFAULT 0,
+                executed INTEGER NOT NULL DEFAULT 0,
+                verified INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                risk_score_sum REAL NOT NULL DEFAULT 0,
+                risk_scored INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, bucket, namespace, service)
+            ) WITHOUT ROWID
+        """)
+        
         conn.commit()
         conn.close()
     
@@ -130,27 +281,27 @@ class ATPStore:
         # Load actions
         cursor.execute("SELECT action_id, data FROM actions")
         for action_id, data in cursor.fetchall():
-            self.actions[action_id] = json.loads(data)
+            self.actions[action_id] = loads(data)
         
         # Load risk assessments
         cursor.execute("SELECT action_id, data FROM risk_assessments")
         for action_id, data in cursor.fetchall():
-            self.risk_assessments[action_id] = RiskAssessment(**json.loads(data))
+            self.risk_assessments[action_id] = RiskAssessment(**loads(data))
         
         # Load approvals
         cursor.execute("SELECT action_id, data FROM approvals")
         for action_id, data in cursor.fetchall():
-            self.approvals[action_id] = ApprovalDecision(**json.loads(data))
+            self.approvals[action_id] = ApprovalDecision(**loads(data))
         
         # Load executions
         cursor.execute("SELECT action_id, data FROM executions")
         for action_id, data in cursor.fetchall():
-            self.executions[action_id] = ExecutionResultModel(**json.loads(data))
+            self.executions[action_id] = ExecutionResultModel(**loads(data))
         
         # Load verifications
         cursor.execute("SELECT action_id, data FROM verifications")
         for action_id, data in cursor.fetchall():
-            self.verifications[action_id] = VerificationResult(**json.loads(data))
+            self.verifications[action_id] = VerificationResult(**loads(data))
         
         # Load audit logs
         cursor.execute("SELECT action_id, timestamp, event, data FROM audit_logs ORDER BY timestamp")
@@ -160,16 +311,114 @@ class ATPStore:
             self.audit_logs[action_id].append({
                 "timestamp": timestamp,
                 "event": event,
-                "data": json.loads(data)
+                "data": loads(data)
             })
         
         # Load action history
         cursor.execute("SELECT data FROM action_history ORDER BY timestamp")
         for (data,) in cursor.fetchall():
-            self.action_history.append(json.loads(data))
+            self.action_history.append(loads(data))
+        
+        # Load learned risk priors
+        cursor.execute("""
+            SELECT system, operation, namespace, service, hour_of_week, successes, failures
+            FROM risk_priors
+        """)
+        for system, operation, namespace, service, hour_of_week, successes, failures in cursor.fetchall():
+            self.risk_priors[(system, operation, namespace, service, hour_of_week)] = [successes, failures]
+        
+        # Load job watermarks
+        cursor.execute("SELECT job, watermark FROM job_watermarks")
+        for job, watermark in cursor.fetchall():
+            self.watermarks[job] = watermark
+        
+        # Load execution jobs
+        cursor.execute("SELECT job_id, data FROM execution_jobs")
+        for job_id, data in cursor.fetchall():
+            self.execution_jobs[job_id] = ExecutionJob(**loads(data))
+        
+        # Load rollbacks
+        cursor.execute("SELECT action_id, data FROM rollbacks")
+        for action_id, data in cursor.fetchall():
+            self.rollbacks[action_id] = RollbackAction(**loads(data))
+        
+        # Load incidents
+        cursor.execute("SELECT incident_id, data FROM incidents")
+        for incident_id, data in cursor.fetchall():
+            self.incidents[incident_id] = Incident(**loads(data))
+        
+        # Load stats rollups
+        cursor.execute(f"SELECT period, bucket, namespace, service, {', '.join(ROLLUP_METRICS)} FROM stats_rollups")
+        for period, bucket, namespace, service, *counts in cursor.fetchall():
+            self.stats_rollups.setdefault((period, bucket), {})[(namespace, service)] = list(counts)
         
         conn.close()
+        
+        self._rebuild_counters()
+        if not self.stats_rollups and self.audit_logs:
+            self._backfill_rollups()
+    
+    def _rebuild_counters(self):
+        """Current status and risk counters from the loaded actions and assessments"""
+        self.status_counts = Counter(_status(action.get("status")) for action in self.actions.values())
+        self.risk_level_counts = Counter(
+            _status(assessment.risk_level) for assessment in self.risk_assessments.values()
+        )
+        self.risk_score_sum = sum(assessment.risk_score for assessment in self.risk_assessments.values())
     
+    def _backfill_rollups(self):
+        """Rollups of a database written before they existed, replayed from the audit trail"""
+        rows = []
+        for action_id, entries in self.audit_logs.items():
+            for entry in entries:
+                increments = self._rollup_increments(action_id, entry["event"], entry["data"])
+                if increments:
+                    rows.extend(self._rollup(action_id, entry["timestamp"], increments))
+        conn = self._connect()
+        conn.cursor().executemany(UPSERT_ROLLUP, rows)
+        self._release(conn)
+        print(f"Backfilled stats rollups from {sum(len(entries) for entries in self.audit_logs.values())} audit log entries")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Connection for a write, shared while a batch() is open"""
+        if self._batch_conn is not None:
+            return self._batch_conn
+        if not self.is_open:
+            self.open()
+        return sqlite3.connect(self.db_path)
+    
+    def _release(self, conn: sqlite3.Connection):
+        """Commit and close a write connection unless it belongs to an open batch()"""
+        if conn is self._batch_conn:
+            return
+        conn.commit()
+        conn.close()
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group store writes into a single SQLite transaction.
+        Writes inside the block share one connection and are committed together,
+        or rolled back together if the block raises. Nested batches join the outer one.
+        """
+        if not self.use_db or self._batch_conn is not None:
+            yield
+            return
+        if not self.is_open:
+            self.open()
+        
+        self._batch_conn = sqlite3.connect(self.db_path)
+        try:
+            yield
+            self._batch_conn.commit()
+        except Exception:
+            self._batch_conn.rollback()
+            raise
+        finally:
+            self._batch_conn.close()
+            self._batch_conn = None
+    
+    @tracer.staged("store.store_action")
     def store_action(self, action: ActionDeclaration):
         """
         Adds a new action declaration to the store. Create an audit log entry.
@@ -177,62 +426,99 @@ class ATPStore:
         if (not action.action_id) or (action.action_id == ""):
             action.action_id = f"act_{uuid4().hex[:8]}"
         
-        action_dict = action.dict()
+        action_dict = action.model_dump()
+        previous = self.actions.get(action.action_id)
+        if previous is not None:
+            self.status_counts[_status(previous.get("status"))] -= 1
+        self.status_counts[_status(action.status)] += 1
         self.actions[action.action_id] = action_dict
+        self._declarations[action.action_id] = action
         
         if self.use_db:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT OR REPLACE INTO actions (action_id, data, created_at) VALUES (?, ?, ?)",
-                (action.action_id, json.dumps(action_dict), datetime.utcnow().isoformat())
+                (action.action_id, dumps_str(action_dict), datetime.utcnow().isoformat())
             )
-            conn.commit()
-            conn.close()
+            self._release(conn)
         
         self.audit_log(action.action_id, "action_declared", action_dict)
     
+    @tracer.staged("store.store_risk_assessment")
     def store_risk_assessment(self, assessment: RiskAssessment):
         """
         Store a risk assessment for an action. Create an audit log entry.
         """
+        previous = self.risk_assessments.get(assessment.action_id)
+        if previous is not None:
+            self.risk_level_counts[_status(previous.risk_level)] -= 1
+            self.risk_score_sum -= previous.risk_score
+        self.risk_level_counts[_status(assessment.risk_level)] += 1
+        self.risk_score_sum += assessment.risk_score
         self.risk_assessments[assessment.action_id] = assessment
+        assessment_dict = assessment.model_dump()
+        # assessments are never modified, encode once for the database and every read
+        encoded = self._encoded["risk_assessment"][assessment.action_id] = dumps(assessment_dict)
         
         if self.use_db:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT OR REPLACE INTO risk_assessments (action_id, data, created_at) VALUES (?, ?, ?)",
-                (assessment.action_id, json.dumps(assessment.dict()), datetime.utcnow().isoformat())
+                (assessment.action_id, encoded.decode(), datetime.utcnow().isoformat())
             )
-            conn.commit()
-            conn.close()
+            self._release(conn)
         
-        self.audit_log(assessment.action_id, "risk_assessed", assessment.dict())
+        self.audit_log(assessment.action_id, "risk_assessed", assessment_dict)
     
 
+    @tracer.staged("store.store_approval")
     def store_approval(self, approval: ApprovalDecision):
         """
         Store an approval decision for an action. Create an audit log entry.
         """
         self.approvals[approval.action_id] = approval
+        approval_dict = approval.model_dump()
         
         if self.use_db:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT OR REPLACE INTO approvals (action_id, data, created_at) VALUES (?, ?, ?)",
-                (approval.action_id, json.dumps(approval.dict()), datetime.utcnow().isoformat())
+                (approval.action_id, dumps_str(approval_dict), datetime.utcnow().isoformat())
             )
-            conn.commit()
-            conn.close()
+            self._release(conn)
         
-        self.audit_log(approval.action_id, "approval_received", approval.dict())
+        self.audit_log(approval.action_id, "approval_received", approval_dict)
         
         # Update action status to "approved" if approval status is "approved"
         if approval.decision == ActionStatus.APPROVED and approval.action_id in self.actions:
             self.update_action_status(approval.action_id, ActionStatus.APPROVED)
+        elif approval.decision == ActionStatus.REJECTED and approval.action_id in self.actions:
+            self.update_action_status(approval.action_id, ActionStatus.REJECTED)
+    
+    @tracer.staged("store.update_approval_request")
+    def update_approval_request(self, action_id: str, approval_request: Dict):
+        """
+        Replace the approval request of a pending action, e.g. after escalation.
+        """
+        if action_id not in self.actions:
+            raise ValueError(f"Action with ID {action_id} not found in store")
+        
+        self.actions[action_id]["approval_request"] = approval_request
+        self._declarations.pop(action_id, None)
+        
+        if self.use_db:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE actions SET data = ? WHERE action_id = ?",
+                (dumps_str(self.actions[action_id]), action_id)
+            )
+            self._release(conn)
 
+    @tracer.staged("store.update_action_status")
     def update_action_status(self, action_id: str, status: str):
         """
         Update the status of an action in the actions store.
@@ -243,100 +529,127 @@ class ATPStore:
         """
         if action_id in self.actions:
             # Update the status in the action dictionary
+            previous_status = self.actions[action_id].get("status", "unknown")
             self.actions[action_id]["status"] = status
+            self.status_counts[_status(previous_status)] -= 1
+            self.status_counts[_status(status)] += 1
+            declaration = self._declarations.get(action_id)
+            if declaration is not None:
+                declaration.status = status
             
-            # Also update in database if using persistence
+            # Also update in database if using persistence,
+            # the in-memory dict holds the same data as the row
             if self.use_db:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
-                
-                # Get current action data
-                cursor.execute("SELECT data FROM actions WHERE action_id = ?", (action_id,))
-                result = cursor.fetchone()
-                
-                if result:
-                    # Parse existing data, update status, and save back
-                    action_data = json.loads(result[0])
-                    action_data["status"] = status
-                    
-                    cursor.execute(
-                        "UPDATE actions SET data = ? WHERE action_id = ?",
-                        (json.dumps(action_data), action_id)
-                    )
-                    conn.commit()
-                
-                conn.close()
+                cursor.execute(
+                    "UPDATE actions SET data = ? WHERE action_id = ?",
+                    (dumps_str(self.actions[action_id]), action_id)
+                )
+                self._release(conn)
             
             # Create audit log for status change
             self.audit_log(action_id, "status_updated", {
                 "new_status": status,
-                "previous_status": self.actions[action_id].get("status", "unknown"),
+                "previous_status": previous_status,
                 "timestamp": datetime.utcnow().isoformat()
             })
         else:
             raise ValueError(f"Action with ID {action_id} not found in store")
+    @tracer.staged("store.store_execution")
     def store_execution(self, execution: ExecutionResultModel):
         """
         Store an execution result for an action. Create an audit log entry.
         """
         self.executions[execution.action_id] = execution
+        execution_dict = execution.model_dump()
         
         if self.use_db:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT OR REPLACE INTO executions (action_id, data, created_at) VALUES (?, ?, ?)",
-                (execution.action_id, json.dumps(execution.dict()), datetime.utcnow().isoformat())
+                (execution.action_id, dumps_str(execution_dict), datetime.utcnow().isoformat())
             )
-            conn.commit()
-            conn.close()
+            self._release(conn)
 
             # Update action status to "executed"
             self.update_action_status(execution.action_id, ActionStatus.EXECUTED )
         
         # Create audit log entry
-        self.audit_log(execution.action_id, "execution_completed", execution.dict())
+        self.audit_log(execution.action_id, "execution_completed", execution_dict)
 
+    @tracer.staged("store.store_verification")
     def store_verification(self, verification: VerificationResult):
         """
         Store a verification result for an action. Create an audit log entry.
         """
         self.verifications[verification.action_id] = verification
+        verification_dict = verification.model_dump()
+        encoded = self._encoded["verification"][verification.action_id] = dumps(verification_dict)
         
         if self.use_db:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT OR REPLACE INTO verifications (action_id, data, created_at) VALUES (?, ?, ?)",
-                (verification.action_id, json.dumps(verification.dict()), datetime.utcnow().isoformat())
+                (verification.action_id, encoded.decode(), datetime.utcnow().isoformat())
             )
-            conn.commit()
-            conn.close()
+            self._release(conn)
         
-        self.audit_log(verification.action_id, "verification_completed", verification.dict())
+        self.audit_log(verification.action_id, "verification_completed", verification_dict)
         
         # Add to history for future risk assessment
         action = self.actions.get(verification.action_id)
         if action:
             history_entry = {
                 "action": action,
-                "risk_assessment": self.risk_assessments[verification.action_id].dict(),
-                "execution": self.executions.get(verification.action_id, {}).dict() if verification.action_id in self.executions else {},
-                "verification": verification.dict(),
+                "risk_assessment": self.risk_assessments[verification.action_id].model_dump(),
+                "execution": self.executions[verification.action_id].model_dump() if verification.action_id in self.executions else {},
+                "verification": verification_dict,
                 "timestamp": datetime.utcnow().isoformat()
             }
             self.action_history.append(history_entry)
             
             if self.use_db:
-                conn = sqlite3.connect(self.db_path)
+                conn = self._connect()
                 cursor = conn.cursor()
                 cursor.execute(
                     "INSERT INTO action_history (action_id, data, timestamp) VALUES (?, ?, ?)",
-                    (verification.action_id, json.dumps(history_entry), history_entry["timestamp"])
+                    (verification.action_id, dumps_str(history_entry), history_entry["timestamp"])
                 )
-                conn.commit()
-                conn.close()
+                self._release(conn)
     
+    def declaration(self, action_id: str) -> ActionDeclaration:
+        """
+        The validated declaration of a stored action.
+        Declarations stored in this process are returned as they are, actions
+        loaded from the database are validated once on first use.
+        """
+        declaration = self._declarations.get(action_id)
+        if declaration is None:
+            STORE_CACHE.inc("declaration", "miss")
+            declaration = self._declarations[action_id] = ActionDeclaration(**self.actions[action_id])
+        else:
+            STORE_CACHE.inc("declaration", "hit")
+        return declaration
+
+    def encoded(self, kind: str, action_id: str) -> Optional[bytes]:
+        """JSON bytes of an action's risk_assessment or verification, None when there is none"""
+        cache = self._encoded[kind]
+        encoded = cache.get(action_id)
+        if encoded is None:
+            record = (self.risk_assessments if kind == "risk_assessment" else self.verifications).get(action_id)
+            if record is None:
+                return None
+            # loaded from the database, encoded on first read
+            STORE_CACHE.inc(kind, "miss")
+            encoded = cache[action_id] = dumps(record.model_dump())
+        else:
+            STORE_CACHE.inc(kind, "hit")
+        return encoded
+
+    @tracer.staged("store.audit_log")
     def audit_log(self, action_id: str, event: str, data: Dict):
         """  
         Create an audit log entry for a given action.
@@ -351,16 +664,102 @@ class ATPStore:
             "data": data
         }
         self.audit_logs[action_id].append(log_entry)
+        increments = self._rollup_increments(action_id, event, data)
+        rollup_rows = self._rollup(action_id, log_entry["timestamp"], increments) if increments else []
         
         if self.use_db:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO audit_logs (action_id, timestamp, event, data) VALUES (?, ?, ?, ?)",
-                (action_id, log_entry["timestamp"], event, json.dumps(data))
+                (action_id, log_entry["timestamp"], event, dumps_str(data))
             )
-            conn.commit()
-            conn.close()
+            if rollup_rows:
+                cursor.executemany(UPSERT_ROLLUP, rollup_rows)
+            self._release(conn)
+
+        for listener in self.audit_listeners:
+            listener(action_id, log_entry)
+    
+    def _rollup_increments(self, action_id: str, event: str, data: Dict) -> Optional[Dict[str, float]]:
+        """What an audit log event adds to the stats rollups"""
+        if event == "action_declared":
+            return {"declared": 1}
+        if event == "risk_assessed":
+            return {"risk_score_sum": data.get("risk_score") or 0.0, "risk_scored": 1}
+        if event == "approval_received" and data.get("decision") == ActionStatus.APPROVED:
+            return {"approved": 1}
+        if event == "execution_completed":
+            return {"executed": 1} if data.get("status") == "success" else {"executed": 1, "failed": 1}
+        if event == "verification_completed":
+            if data.get("overall_status") == "verified":
+                return {"verified": 1}
+            execution = self.executions.get(action_id)
+            # a failed execution was already counted
+            if execution is None or execution.status == "success":
+                return {"failed": 1}
+        return None
+    
+    def _rollup(self, action_id: str, timestamp: str, increments: Dict[str, float]) -> List[Tuple]:
+        """Add to the hour and day rollups of the action's namespace and service, returns the rows to upsert"""
+        context = self.actions.get(action_id, {}).get("context") or {}
+        scope = (context.get("namespace") or "", context.get("service") or "")
+        deltas = tuple(increments.get(metric, 0) for metric in ROLLUP_METRICS)
+        rows = []
+        for period, (length, _) in ROLLUP_PERIODS.items():
+            bucket = timestamp[:length]
+            counts = self.stats_rollups.setdefault((period, bucket), {}).setdefault(scope, [0] * len(ROLLUP_METRICS))
+            for index, delta in enumerate(deltas):
+                counts[index] += delta
+            rows.append((period, bucket) + scope + deltas)
+        return rows
+    
+    def get_stats(
+            self,
+            period: str = "hour",
+            window: int = 24,
+            namespace: Optional[str] = None,
+            service: Optional[str] = None
+        ) -> Dict:
+        """
+        Current counters and the last `window` rollup buckets of the period,
+        from the incrementally maintained counts, whatever the size of the history
+        """
+        length, step = ROLLUP_PERIODS[period]
+        now = datetime.utcnow()
+        buckets = [(now - step * offset).isoformat()[:length] for offset in range(window - 1, -1, -1)]
+        
+        def summary(counts: List[float]) -> Dict:
+            summary = dict(zip(ROLLUP_METRICS[:5], (int(count) for count in counts[:5])))
+            summary["mean_risk_score"] = round(counts[5] / counts[6], 4) if counts[6] else None
+            return summary
+        
+        series = []
+        scopes: Dict[Tuple[str, str], List[float]] = {}
+        for bucket in buckets:
+            totals = [0] * len(ROLLUP_METRICS)
+            for scope, counts in self.stats_rollups.get((period, bucket), {}).items():
+                if (namespace and scope[0] != namespace) or (service and scope[1] != service):
+                    continue
+                scope_totals = scopes.setdefault(scope, [0] * len(ROLLUP_METRICS))
+                for index, count in enumerate(counts):
+                    totals[index] += count
+                    scope_totals[index] += count
+            series.append({"bucket": bucket, **summary(totals)})
+        
+        assessed = sum(self.risk_level_counts.values())
+        return {
+            "actions": len(self.actions),
+            "status_counts": {status: count for status, count in self.status_counts.items() if count > 0},
+            "risk_levels": {level: count for level, count in self.risk_level_counts.items() if count > 0},
+            "mean_risk_score": round(self.risk_score_sum / assessed, 4) if assessed else None,
+            "period": period,
+            "rollups": series,
+            "services": [
+                {"namespace": scope[0], "service": scope[1], **summary(counts)}
+                for scope, counts in sorted(scopes.items())
+            ]
+        }
     
     def get_similar_actions(self, action: ActionDeclaration) -> Dict:
         """Find similar historical actions for risk assessment"""
@@ -386,6 +785,106 @@ class ATPStore:
             "avg_completion_time": "2.3s"  # Simplified
         }
     
+    def get_history_since(self, watermark: int, limit: int = 5000) -> List[Tuple[int, Dict]]:
+        """
+        Return up to `limit` action history entries newer than `watermark`
+        as (position, entry) tuples. Positions are the database row ids when
+        persistence is enabled and list positions (1-based) otherwise.
+        """
+        if not self.use_db:
+            entries = self.action_history[watermark:watermark + limit]
+            return [(watermark + i + 1, entry) for i, entry in enumerate(entries)]
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, data FROM action_history WHERE id > ? ORDER BY id LIMIT ?",
+            (watermark, limit)
+        )
+        rows = [(row_id, loads(data)) for row_id, data in cursor.fetchall()]
+        conn.close()
+        return rows
+    
+    def get_watermark(self, job: str) -> int:
+        """Return the last processed position of an incremental job"""
+        return self.watermarks.get(job, 0)
+    
+    @tracer.staged("store.merge_risk_priors")
+    def merge_risk_priors(self, job: str, deltas: Dict[Tuple, List[int]], watermark: int):
+        """
+        Add success/failure deltas to the persisted priors and advance the
+        job watermark in the same transaction, so a crash never double counts.
+        """
+        for key, (successes, failures) in deltas.items():
+            counts = self.risk_priors.setdefault(key, [0, 0])
+            counts[0] += successes
+            counts[1] += failures
+        self.watermarks[job] = watermark
+        
+        if self.use_db:
+            now = datetime.utcnow().isoformat()
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO risk_priors
+                    (system, operation, namespace, service, hour_of_week, successes, failures, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (system, operation, namespace, service, hour_of_week) DO UPDATE SET
+                    successes = successes + excluded.successes,
+                    failures = failures + excluded.failures,
+                    updated_at = excluded.updated_at
+                """,
+                [key + (successes, failures, now) for key, (successes, failures) in deltas.items()]
+            )
+            cursor.execute(
+                "INSERT OR REPLACE INTO job_watermarks (job, watermark, updated_at) VALUES (?, ?, ?)",
+                (job, watermark, now)
+            )
+            self._release(conn)
+    
+    @tracer.staged("store.store_execution_job")
+    def store_execution_job(self, job: ExecutionJob):
+        """Insert or update an execution queue job"""
+        self.execution_jobs[job.job_id] = job
+        
+        if self.use_db:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO execution_jobs (job_id, action_id, status, data, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job.job_id, job.action_id, job.status, dumps_str(job.model_dump()), datetime.utcnow().isoformat())
+            )
+            self._release(conn)
+    
+    @tracer.staged("store.store_rollback")
+    def store_rollback(self, rollback: RollbackAction):
+        """Insert or update the rollback of an action"""
+        self.rollbacks[rollback.action_id] = rollback
+        
+        if self.use_db:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO rollbacks (action_id, data, updated_at) VALUES (?, ?, ?)",
+                (rollback.action_id, dumps_str(rollback.model_dump()), datetime.utcnow().isoformat())
+            )
+            self._release(conn)
+    
+    @tracer.staged("store.store_incident")
+    def store_incident(self, incident: Incident):
+        """Insert or update a correlated incident"""
+        self.incidents[incident.incident_id] = incident
+        
+        if self.use_db:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO incidents (incident_id, data, updated_at) VALUES (?, ?, ?)",
+                (incident.incident_id, dumps_str(incident.model_dump()), incident.updated_at)
+            )
+            self._release(conn)
+    
     def clear_all(self):
         """Clear all data from memory and database"""
         self.actions.clear()
@@ -395,10 +894,28 @@ class ATPStore:
         self.verifications.clear()
         self.audit_logs.clear()
         self.action_history.clear()
+        self.risk_priors.clear()
+        self.watermarks.clear()
+        self.execution_jobs.clear()
+        self.incidents.clear()
+        self.rollbacks.clear()
+        for encoded in self._encoded.values():
+            encoded.clear()
+        self._declarations.clear()
+        self.status_counts.clear()
+        self.risk_level_counts.clear()
+        self.risk_score_sum = 0.0
+        self.stats_rollups.clear()
         
         if self.use_db:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
+            cursor.execute("DELETE FROM stats_rollups")
+            cursor.execute("DELETE FROM execution_jobs")
+            cursor.execute("DELETE FROM incidents")
+            cursor.execute("DELETE FROM rollbacks")
+            cursor.execute("DELETE FROM job_watermarks")
+            cursor.execute("DELETE FROM risk_priors")
             cursor.execute("DELETE FROM audit_logs")
             cursor.execute("DELETE FROM action_history")
             cursor.execute("DELETE FROM verifications")
@@ -406,13 +923,18 @@ class ATPStore:
             cursor.execute("DELETE FROM approvals")
             cursor.execute("DELETE FROM risk_assessments")
             cursor.execute("DELETE FROM actions")
-            conn.commit()
-            conn.close()
+            self._release(conn)
 
 
 # in memory 
 # store = ATPStore()
 # sqlite in memory 
 # store = ATPStore(db_path=":memory:")
-# sqlite persistent
-store = ATPStore(db_path="atp_store.db")
\ No newline at end of file
+# sqlite persistent, ATP_DB_PATH="" keeps everything in memory
+ATP_DB_PATH = os.getenv("ATP_DB_PATH", "atp_store.db")
+store = ATPStore(db_path=ATP_DB_PATH or None)
+
+metrics.gauge(
+    "atp_actions", "Stored actions by status", ("status",),
+    lambda: {(status,): count for status, count in store.status_counts.items()}
+)
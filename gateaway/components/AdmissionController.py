@@ -0,0 +1,237 @@
+import asyncio
+import heapq
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from models import ActionDeclaration
+from components.Bulkhead import PRIORITY_RANK
+from components.Metrics import metrics
+from components.Tracing import tracer
+
+OVERFLOW_MODES = ("priority", "fallback", "reject")
+
+ADMISSION_WAIT_SECONDS = metrics.histogram(
+    "atp_admission_queue_wait_seconds", "Time declarations waited for an assessment slot, by outcome",
+    ("outcome",)
+)
+ADMISSION_DECISIONS = metrics.counter(
+    "atp_admission_decisions_total", "Declarations admitted, deferred to the fallback scorer or rejected, by reason",
+    ("outcome", "reason")
+)
+
+
+class AdmissionRejected(Exception):
+    """The declaration could not be admitted, retry after the given seconds"""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(f"Too many declarations being assessed ({reason}), retry after {retry_after}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Bounds the declarations assessed at once, each of which can hold an LLM
+    call for up to 30 seconds, so an alert storm queues up instead of
+    exhausting memory and the OpenAI rate limit for everyone.
+    Declarations beyond the in-flight limit wait in a bounded queue ordered
+    by namespace (production first), then by the priority hint of their
+    context, FIFO within a rank. When the queue is full a better ranked
+    declaration pushes the worst ranked waiter out. Declarations that
+    overflow, wait too long or are pushed out are deferred to the rule based
+    fallback scorer (priority namespaces in "priority" mode, all of them in
+    "fallback" mode) or rejected with a retry hint.
+    """
+
+    def __init__(
+            self,
+            max_in_flight: int = 32,
+            max_queue: int = 128,
+            max_wait_seconds: float = 10.0,
+            overflow: str = "priority",
+            priority_namespaces: Tuple[str, ...] = ("production",)
+        ):
+        if overflow not in OVERFLOW_MODES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_MODES)}")
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.overflow = overflow
+        self.priority_namespaces: Set[str] = set(priority_namespaces)
+        self.in_flight = 0
+        self._sequence = 0
+        # (rank, sequence, future), resolved futures are skipped lazily
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.queued = 0
+        self.outcomes: Dict[str, int] = {"admitted": 0, "deferred": 0, "rejected": 0}
+        self.waits: Deque[float] = deque(maxlen=1024)
+        self.max_wait_ms = 0.0
+        # smoothed seconds a slot is held, for the retry hint
+        self.hold_seconds = 1.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "128")),
+            max_wait_seconds=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10")),
+            overflow=os.getenv("ADMISSION_OVERFLOW", "priority"),
+            priority_namespaces=tuple(
+                namespace.strip()
+                for namespace in os.getenv("ADMISSION_PRIORITY_NAMESPACES", "production").split(",")
+                if namespace.strip()
+            )
+        )
+
+    def rank(self, declaration: ActionDeclaration) -> int:
+        """Lower is served first: priority namespaces, then the context's priority hint"""
+        context = declaration.context or {}
+        namespace_rank = 0 if context.get("namespace") in self.priority_namespaces else 1
+        hint_rank = PRIORITY_RANK.get(str(context.get("priority", "normal")).lower(), PRIORITY_RANK["normal"])
+        return namespace_rank * len(PRIORITY_RANK) + hint_rank
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new declaration has likely drained"""
+        backlog = (self.queued + 1) * self.hold_seconds / self.max_in_flight
+        return max(1, min(60, math.ceil(backlog)))
+
+    def _overflow(self, declaration: ActionDeclaration, reason: str, wait: float) -> bool:
+        """Defer to the fallback scorer (False) or raise AdmissionRejected"""
+        defer = self.overflow == "fallback" or (
+            self.overflow == "priority" and (declaration.context or {}).get("namespace") in self.priority_namespaces
+        )
+        outcome = "deferred" if defer else "rejected"
+        self._record(outcome, reason, wait)
+        if not defer:
+            raise AdmissionRejected(self.retry_after(), reason)
+        return False
+
+    def _record(self, outcome: str, reason: str, wait: float):
+        self.outcomes[outcome] += 1
+        ADMISSION_DECISIONS.inc(outcome, reason)
+        ADMISSION_WAIT_SECONDS.observe(wait, outcome)
+        wait_ms = wait * 1000
+        self.waits.append(wait_ms)
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        tracer.annotate(admission=outcome, admission_reason=reason, admission_wait_ms=round(wait_ms, 3))
+
+    def _push_out_worst(self, rank: int) -> bool:
+        """Make room in a full queue by pushing out a worse ranked waiter"""
+        waiting = [waiter for waiter in self._waiters if not waiter[2].done()]
+        if not waiting:
+            return False
+        # the worst rank, latest arrival within it
+        worst = max(waiting, key=lambda waiter: (waiter[0], waiter[1]))
+        if worst[0] <= rank:
+            return False
+        worst[2].set_result(False)
+        return True
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.max_in_flight:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(True)
+
+    async def _acquire(self, declaration: ActionDeclaration) -> bool:
+        """True when a slot was taken, False when deferred to the fallback scorer"""
+        started = time.perf_counter()
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            self._record("admitted", "immediate", 0.0)
+            return True
+
+        rank = self.rank(declaration)
+        if self.queued >= self.max_queue and not self._push_out_worst(rank):
+            return self._overflow(declaration, "queue_full", 0.0)
+
+        if len(self._waiters) > 2 * self.max_queue:
+            # drop the waiters that timed out or were pushed out
+            self._waiters = [waiter for waiter in self._waiters if not waiter[2].done()]
+            heapq.heapify(self._waiters)
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiters, (rank, self._sequence, future))
+        self.queued = sum(1 for _, _, waiter in self._waiters if not waiter.done())
+        try:
+            with tracer.span("admission_wait", rank=rank):
+                admitted = await asyncio.wait_for(asyncio.shield(future), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.set_result(False)
+            admitted = future.result()
+            if not admitted:
+                return self._overflow(declaration, "timeout", time.perf_counter() - started)
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            elif future.result():
+                # the slot was handed over right before the cancellation
+                self._release()
+            raise
+        finally:
+            self.queued = sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+        if not admitted:
+            return self._overflow(declaration, "pushed_out", time.perf_counter() - started)
+        self._record("admitted", "queued", time.perf_counter() - started)
+        return True
+
+    def _release(self, held: Optional[float] = None):
+        self.in_flight -= 1
+        if held is not None:
+            self.hold_seconds = 0.9 * self.hold_seconds + 0.1 * held
+        self._wake()
+        self.queued = sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    @asynccontextmanager
+    async def admit(self, declaration: ActionDeclaration):
+        """
+        Hold an assessment slot for the block, yields whether the LLM may be
+        used. Raises AdmissionRejected when the declaration is turned away.
+        """
+        admitted = await self._acquire(declaration)
+        if not admitted:
+            yield False
+            return
+        started = time.perf_counter()
+        try:
+            yield True
+        finally:
+            self._release(time.perf_counter() - started)
+
+    def stats(self) -> Dict:
+        ordered = sorted(self.waits)
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait_seconds,
+            "overflow": self.overflow,
+            "priority_namespaces": sorted(self.priority_namespaces),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "outcomes": dict(self.outcomes),
+            "retry_after_seconds": self.retry_after(),
+            "wait_ms": {
+                "mean": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+                "p95": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3) if ordered else 0.0,
+                "max": round(self.max_wait_ms, 3)
+            }
+        }
+
+
+admission_controller = AdmissionController.from_env()
+
+metrics.gauge(
+    "atp_admission_in_flight", "Declarations holding an assessment slot",
+    callback=lambda: admission_controller.in_flight
+)
+metrics.gauge(
+    "atp_admission_queued", "Declarations waiting for an assessment slot",
+    callback=lambda: admission_controller.queued
+)
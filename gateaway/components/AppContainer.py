@@ -0,0 +1,188 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from components.ATPStore import store, ATPStore
+from components.OpenAIRiskAssestor import risk_assessor, OpenAIRiskAssessor
+from components.ExecutionEngine import execution_engine, ExecutionEngine
+from components.VerficationEngine import verification_engine, VerificationEngine
+from components.ExecutionQueue import execution_queue, ExecutionQueue
+from components.LearningEngine import risk_prior_learner, RiskPriorLearner
+from components.PolicyEngine import policy_engine, PolicyEngine
+from components.DeadlineScheduler import deadline_scheduler, DeadlineScheduler
+from components.DeclarationDeduplicator import declaration_deduplicator, DeclarationDeduplicator
+from components.IncidentCorrelator import incident_correlator, IncidentCorrelator
+from components.EventBus import event_bus, EventBus
+
+
+class AppContainer:
+    """
+    Starts and stops the gateway's components, used as the FastAPI lifespan.
+    Importing the components does not touch the database, the network or
+    the policy file. Startup opens the store, continues the event ids,
+    rolls up the learned risk priors, loads the approval policy, rebuilds the deduplicator, incident and deadline indexes and recovers the
+    execution queue before the first request is accepted, everything the
+    first request can do without runs afterwards as a background warm-up:
+    opening the HTTP connection pools and starting the learning, policy
+    watch and deadline loops. The gateway is ready once the warm-up finished.
+    """
+
+    def __init__(
+            self,
+            store: ATPStore,
+            risk_assessor: OpenAIRiskAssessor,
+            execution_engine: ExecutionEngine,
+            verification_engine: VerificationEngine,
+            execution_queue: ExecutionQueue,
+            risk_prior_learner: RiskPriorLearner,
+            policy_engine: PolicyEngine,
+            deadline_scheduler: DeadlineScheduler,
+            declaration_deduplicator: DeclarationDeduplicator,
+            incident_correlator: IncidentCorrelator,
+            event_bus: EventBus
+        ):
+        self.store = store
+        self.risk_assessor = risk_assessor
+        self.execution_engine = execution_engine
+        self.verification_engine = verification_engine
+        self.execution_queue = execution_queue
+        self.risk_prior_learner = risk_prior_learner
+        self.policy_engine = policy_engine
+        self.deadline_scheduler = deadline_scheduler
+        self.declaration_deduplicator = declaration_deduplicator
+        self.incident_correlator = incident_correlator
+        self.event_bus = event_bus
+        # step name -> milliseconds, or the error it failed with
+        self.startup: Dict[str, object] = {}
+        self.warmup: Dict[str, object] = {}
+        self.started = False
+        self.ready = False
+        self._tasks: List[asyncio.Task] = []
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        await self.start()
+        try:
+            yield
+        finally:
+            await self.stop()
+
+    async def _step(self, steps: Dict[str, object], name: str, step: Callable[[], Awaitable]):
+        started = time.perf_counter()
+        try:
+            result = await step()
+        except Exception as e:
+            steps[name] = f"{type(e).__name__}: {e}"
+            raise
+        steps[name] = round((time.perf_counter() - started) * 1000, 3)
+        return result
+
+    async def start(self):
+        """Open the store, rebuild the indexes requests rely on, then warm up in the background"""
+        if not self.risk_assessor.api_key:
+            print("WARNING: OPENAI_API_KEY not set. Using fallback risk assessment.")
+
+        async def load_policy():
+            return self.policy_engine.compiled
+
+        # rebuilt before serving, a registration made meanwhile would be wiped
+        async def rebuild_deduplicator():
+            open_actions = self.declaration_deduplicator.rebuild()
+            print(f"Declaration deduplicator tracking {open_actions} open actions")
+
+        # before anything is written, a client resuming from an older id must see a reset
+        async def rebuild_events():
+            last_event_id = self.event_bus.rebuild()
+            print(f"Event bus continuing after event {last_event_id}")
+
+        async def rebuild_risk_priors():
+            learned = self.risk_prior_learner.rebuild()
+            print(f"Risk prior learner loaded {learned} learned priors")
+
+        async def rebuild_incidents():
+            open_incidents = self.incident_correlator.rebuild()
+            print(f"Incident correlator tracking {open_incidents} open incidents")
+
+        async def rebuild_deadlines():
+            pending = self.deadline_scheduler.rebuild()
+            print(f"Deadline scheduler tracking {pending} pending approvals")
+
+        # loaded off the event loop, a large database takes a while
+        await self._step(self.startup, "store", lambda: asyncio.to_thread(self.store.open))
+        await self._step(self.startup, "event_bus", rebuild_events)
+        await self._step(self.startup, "risk_prior_learner", rebuild_risk_priors)
+        await self._step(self.startup, "policy_engine", load_policy)
+        await self._step(self.startup, "declaration_deduplicator", rebuild_deduplicator)
+        await self._step(self.startup, "incident_correlator", rebuild_incidents)
+        await self._step(self.startup, "deadline_scheduler", rebuild_deadlines)
+        recovered = await self._step(self.startup, "execution_queue", self.execution_queue.start)
+        print(f"Execution queue recovered {recovered} unfinished jobs")
+        self.started = True
+        self._warmup_task = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self):
+        async def start_loops():
+            self._tasks.append(asyncio.create_task(self.deadline_scheduler.run()))
+            self._tasks.append(asyncio.create_task(self.risk_prior_learner.run_forever()))
+            self._tasks.append(asyncio.create_task(self.policy_engine.watch()))
+
+        steps = {
+            "execution_engine": self.execution_engine.start,
+            "risk_assessor": self.risk_assessor.start,
+            "verification_engine": self.verification_engine.start,
+            "background_loops": start_loops,
+        }
+        for name, step in steps.items():
+            try:
+                await self._step(self.warmup, name, step)
+            except Exception as e:
+                # the component falls back to doing it on first use
+                print(f"Warm-up step {name} failed: {e}")
+            # let requests in between steps
+            await asyncio.sleep(0)
+        self.ready = True
+
+    async def stop(self):
+        """Stop the background loops and execution workers, close the connection pools"""
+        self.ready = False
+        tasks = self._tasks + ([self._warmup_task] if self._warmup_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._warmup_task = None
+        await self.execution_queue.stop()
+        await self.execution_engine.close()
+        await self.verification_engine.close()
+        await self.risk_assessor.close()
+        self.started = False
+
+    def readiness(self) -> Dict:
+        def total(steps: Dict[str, object]) -> float:
+            return round(sum(ms for ms in steps.values() if isinstance(ms, float)), 3)
+
+        return {
+            "ready": self.ready,
+            "started": self.started,
+            "startup_ms": total(self.startup),
+            "warmup_ms": total(self.warmup),
+            "startup": self.startup,
+            "warmup": self.warmup
+        }
+
+
+app_container = AppContainer(
+    store,
+    risk_assessor,
+    execution_engine,
+    verification_engine,
+    execution_queue,
+    risk_prior_learner,
+    policy_engine,
+    deadline_scheduler,
+    declaration_deduplicator,
+    incident_correlator,
+    event_bus
+)
@@ -1,71 +1,55 @@
-from models import ApprovalRequestModel
-from datetime import datetime
+from typing import Optional
+from datetime import datetime, timedelta
+from models import ApprovalRequestModel, ActionDeclaration
+from components.PolicyEngine import policy_engine, PolicyEngine, format_duration
 
 class ApprovalEngine:
     """
-    The approval engine determine the approval request for an action 
+    The approval engine determine the approval request for an action
     based on the risk level and other factors.
     It generates an ApprovalRequest object that specifies who needs to approve
     the action and under what conditions.
+    Who approves, how fast and with which priority comes from the
+    declarative approval policy, see PolicyEngine.
     """
 
+    def __init__(self, policy_engine: PolicyEngine):
+        self.policy_engine = policy_engine
+
     def get_approval_request(
-            self, 
-            risk_level: str, 
-            action_id: str, 
-            risk_score: float
+            self,
+            risk_level: str,
+            action_id: str,
+            risk_score: float,
+            action: Optional[ActionDeclaration] = None
         ) -> ApprovalRequestModel:
         """
-        Generate an approval request based on risk level Simple implementation:
+        Generate an approval request by evaluating the approval policy
+        against the action and its risk assessment.
         """
-        print("Generating approval request for risk level:", risk_level, action_id, risk_score)
-        if risk_level == "low":
-            return ApprovalRequestModel(
-                action_id=action_id,
-                decision="auto_approve",
-                timestamp=datetime.utcnow().isoformat(),
-                reason="Low risk action auto-approved",
-                approval_type="auto_approve",
-                priority ="low",
-                risk_score=risk_score,
-                deadline="24 hours",
-                approvers=[ "system" ]
-            )
-        elif risk_level == "medium":
-            return ApprovalRequestModel(
-                action_id=action_id,
-                decision="human_required",
-                approvals=["on_call_engineer"],
-                timestamp=datetime.utcnow().isoformat(),
-                reason="Medium risk action requires human approval",
-                approval_type="human_required",
-                priority ="low",
-                deadline="24 hours",
-                risk_score=risk_score,
-            )
-        elif risk_level == "high":
-            return ApprovalRequestModel(
-                action_id=action_id,
-                decision="human_required",
-                approvers=["cto_team"],
-                timestamp=datetime.utcnow().isoformat(),
-                deadline="24 hours",
-                reason="High risk action requires CEO approval",
-                approval_type="human_required",
-    priority ="high",
-                                    risk_score=risk_score,
-            )
-        else: 
-            return ApprovalRequestModel(
-                action_id=action_id,
-                decision="human_required",
-                approvers=["security_team"],
-                timestamp=datetime.utcnow().isoformat(),
-                reason="Unknown risk level requires security team approval",
-                approval_type="human_required",
-                priority ="high",
-                deadline="24 hours",
-                risk_score=risk_score,
-            )
-        
-approval_engine = ApprovalEngine()
\ No newline at end of file
+        context = action.context if action else {}
+        rule, decision, deadline_seconds, escalate_seconds = self.policy_engine.evaluate(
+            namespace=context.get("namespace"),
+            service=context.get("service"),
+            system=action.target.system if action else None,
+            operation=action.target.operation if action else None,
+            risk_level=risk_level,
+            risk_score=risk_score,
+            hour_of_week=self.policy_engine.hour_of_week(action.timestamp if action else None)
+        )
+        now = datetime.utcnow()
+        return ApprovalRequestModel(
+            action_id=action_id,
+            risk_score=risk_score,
+            approval_type=decision.approval_type,
+            approvers=list(decision.approvers),
+            deadline=format_duration(deadline_seconds),
+            priority=decision.priority,
+            policy_rule=rule.name if rule else None,
+            deadline_at=(now + timedelta(seconds=deadline_seconds)).isoformat(),
+            escalate_at=(now + timedelta(seconds=escalate_seconds)).isoformat() if escalate_seconds else None,
+            escalation_approvers=list(decision.escalation_approvers),
+            on_expiry=decision.on_expiry
+        )
+
+approval_engine = ApprovalEngine(policy_engine)
@@ -0,0 +1,288 @@
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models import RiskWeights
+
+LEVELS = np.array(["low", "medium", "high"])
+RECOMMENDATIONS = np.array(["auto_approve", "human_review", "reject"])
+
+
+def _label(labels: np.ndarray, code: int) -> Optional[str]:
+    return str(labels[code]) if code >= 0 else None
+
+
+class RiskColumns:
+    """
+    Columnar view of the action history used for batch scoring.
+    Categorical fields are stored as integer codes, every attribute is a
+    NumPy array with one entry per historical action.
+    """
+
+    NAMESPACE_CODES = {"production": 1, "staging": 2}
+
+    def __init__(
+            self,
+            action_ids: np.ndarray,
+            namespace_codes: np.ndarray,
+            service_codes: np.ndarray,
+            service_names: List[str],
+            hours: np.ndarray,
+            similar_counts: np.ndarray,
+            similar_success_rates: np.ndarray,
+            risk_scores: np.ndarray,
+            level_codes: np.ndarray,
+            recommendation_codes: np.ndarray,
+            prior_successes: np.ndarray,
+            prior_failures: np.ndarray
+        ):
+        self.action_ids = action_ids
+        self.namespace_codes = namespace_codes
+        self.service_codes = service_codes
+        self.service_names = service_names
+        self.hours = hours
+        self.similar_counts = similar_counts
+        self.similar_success_rates = similar_success_rates
+        self.risk_scores = risk_scores
+        self.level_codes = level_codes
+        self.recommendation_codes = recommendation_codes
+        # all hours learned prior the action was assessed with
+        self.prior_successes = prior_successes
+        self.prior_failures = prior_failures
+
+    def __len__(self) -> int:
+        return len(self.action_ids)
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "RiskColumns":
+        """
+        Build columns from rows of
+        (action_id, namespace, service, hour, count, success_rate, score, level, recommendation,
+        prior_successes, prior_failures)
+        """
+        level_codes = {level: i for i, level in enumerate(LEVELS)}
+        rec_codes = {rec: i for i, rec in enumerate(RECOMMENDATIONS)}
+        service_codes: Dict[str, int] = {}
+
+        n = len(rows)
+        action_ids = np.empty(n, dtype=object)
+        namespaces = np.zeros(n, dtype=np.int8)
+        services = np.zeros(n, dtype=np.int32)
+        hours = np.full(n, -1, dtype=np.int16)
+        counts = np.zeros(n, dtype=np.int64)
+        rates = np.zeros(n, dtype=np.float64)
+        scores = np.zeros(n, dtype=np.float64)
+        levels = np.full(n, -1, dtype=np.int8)
+        recs = np.full(n, -1, dtype=np.int8)
+        successes = np.zeros(n, dtype=np.int64)
+        failures = np.zeros(n, dtype=np.int64)
+
+        for i, (action_id, namespace, service, hour, count, rate, score, level, rec, prior_successes, prior_failures) \
+                in enumerate(rows):
+            action_ids[i] = action_id
+            namespaces[i] = cls.NAMESPACE_CODES.get(namespace, 0)
+            services[i] = service_codes.setdefault(service or "unknown", len(service_codes))
+            if hour is not None:
+                hours[i] = hour
+            counts[i] = count or 0
+            rates[i] = rate or 0.0
+            scores[i] = score or 0.0
+            levels[i] = level_codes.get(level, -1)
+            recs[i] = rec_codes.get(rec, -1)
+            successes[i] = prior_successes or 0
+            failures[i] = prior_failures or 0
+
+        return cls(
+            action_ids=action_ids,
+            namespace_codes=namespaces,
+            service_codes=services,
+            service_names=list(service_codes),
+            hours=hours,
+            similar_counts=counts,
+            similar_success_rates=rates,
+            risk_scores=scores,
+            level_codes=levels,
+            recommendation_codes=recs,
+            prior_successes=successes,
+            prior_failures=failures
+        )
+
+    @classmethod
+    def from_history(cls, history: List[Dict]) -> "RiskColumns":
+        """Build columns from the in-memory `ATPStore.action_history` entries"""
+        rows = []
+        for entry in history:
+            action = entry.get("action", {})
+            context = action.get("context", {})
+            risk = entry.get("risk_assessment", {})
+            similar = risk.get("similar_actions", {})
+            prior = (similar.get("learned_prior") or {}).get("all_hours", {})
+            timestamp = action.get("timestamp", "")
+            rows.append((
+                action.get("action_id"),
+                context.get("namespace"),
+                context.get("service"),
+                int(timestamp[11:13]) if len(timestamp) >= 13 else None,
+                similar.get("count", 0),
+                similar.get("success_rate", 0.0),
+                risk.get("risk_score", 0.0),
+                risk.get("risk_level"),
+                risk.get("recommendation"),
+                prior.get("successes", 0),
+                prior.get("failures", 0)
+            ))
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_database(cls, db_path: str) -> "RiskColumns":
+        """
+        Build columns straight from the `action_history` table.
+        Fields are extracted by SQLite so the JSON blobs are never parsed in Python.
+        """
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                action_id,
+                json_extract(data, '$.action.context.namespace'),
+                json_extract(data, '$.action.context.service'),
+                CAST(strftime('%H', json_extract(data, '$.action.timestamp')) AS INTEGER),
+                json_extract(data, '$.risk_assessment.similar_actions.count'),
+                json_extract(data, '$.risk_assessment.similar_actions.success_rate'),
+                json_extract(data, '$.risk_assessment.risk_score'),
+                json_extract(data, '$.risk_assessment.risk_level'),
+                json_extract(data, '$.risk_assessment.recommendation'),
+                json_extract(data, '$.risk_assessment.similar_actions.learned_prior.all_hours.successes'),
+                json_extract(data, '$.risk_assessment.similar_actions.learned_prior.all_hours.failures')
+            FROM action_history
+            ORDER BY id
+        """)
+        rows = cursor.fetchall()
+        conn.close()
+        return cls.from_rows(rows)
+
+
+class BatchRiskScorer:
+    """
+    Vectorized version of the rule-based fallback assessment.
+    Scores the whole action history in one pass so that tuned weights can be
+    compared against how past actions were actually classified.
+    """
+
+    def __init__(self, weights: Optional[RiskWeights] = None):
+        self.weights = weights or RiskWeights()
+
+    def _customer_facing(self, columns: RiskColumns) -> np.ndarray:
+        """Flag customer facing services, evaluating each distinct name once"""
+        markers = self.weights.customer_facing_markers
+        flags = np.array(
+            [any(m in name for m in markers) for name in columns.service_names],
+            dtype=bool
+        )
+        if len(flags) == 0:
+            return np.zeros(len(columns), dtype=bool)
+        return flags[columns.service_codes]
+
+    def score(self, columns: RiskColumns) -> Dict[str, np.ndarray]:
+        """Compute risk scores, levels and recommendations for every row"""
+        w = self.weights
+
+        env_risk = np.select(
+            [columns.namespace_codes == 1, columns.namespace_codes == 2],
+            [w.production_weight, w.staging_weight],
+            default=0.0
+        )
+        service_risk = np.where(
+            self._customer_facing(columns),
+            w.customer_facing_weight,
+            w.internal_service_weight
+        )
+        business_hours = (columns.hours >= w.business_hours_start) & (columns.hours <= w.business_hours_end)
+        time_risk = np.where(business_hours, w.business_hours_weight, w.off_hours_weight)
+
+        # Laplace smoothed failure rate, once enough outcomes were observed
+        observed = columns.prior_successes + columns.prior_failures
+        learned_risk = np.where(
+            observed >= w.learned_min_samples,
+            w.learned_failure_weight * (columns.prior_failures + 1) / (observed + 2),
+            0.0
+        )
+
+        scores = np.minimum(env_risk + service_risk + time_risk + learned_risk, 1.0)
+
+        # 0 = low, 1 = medium, 2 = high
+        level_idx = (scores >= w.medium_threshold).astype(np.int8) + (scores >= w.high_threshold).astype(np.int8)
+
+        # 0 = auto_approve, 1 = human_review
+        needs_review = (level_idx == 2) | (scores > w.review_threshold)
+        auto = ~needs_review & (level_idx == 0) & (scores < w.medium_threshold)
+        proven = (
+            (columns.similar_success_rates > w.history_success_rate)
+            & (columns.similar_counts > w.history_min_count)
+            & (level_idx == 1)
+        )
+        rec_idx = np.where(auto | proven, 0, 1).astype(np.int8)
+
+        return {
+            "risk_score": scores,
+            "level_codes": level_idx,
+            "recommendation_codes": rec_idx
+        }
+
+    def compare(self, columns: RiskColumns, sample_size: int = 20) -> Dict:
+        """
+        Rescore the history and summarize how many actions change bucket
+        compared to the risk assessment they originally received.
+        """
+        started = time.perf_counter()
+        scored = self.score(columns)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        level_changed = scored["level_codes"] != columns.level_codes
+        rec_changed = scored["recommendation_codes"] != columns.recommendation_codes
+
+        # count (current, rescored) level pairs, unknown current levels land in the last row
+        n_levels = len(LEVELS)
+        current = np.where(columns.level_codes < 0, n_levels, columns.level_codes)
+        pair_counts = np.bincount(
+            current * n_levels + scored["level_codes"],
+            minlength=(n_levels + 1) * n_levels
+        ).reshape(n_levels + 1, n_levels)
+        labels = [str(level) for level in LEVELS] + ["unknown"]
+        transitions = {
+            labels[old]: {str(LEVELS[new]): int(pair_counts[old, new]) for new in range(n_levels) if pair_counts[old, new]}
+            for old in range(n_levels + 1)
+            if pair_counts[old].any()
+        }
+
+        changed_idx = np.flatnonzero(level_changed | rec_changed)[:sample_size]
+
+        return {
+            "total_actions": len(columns),
+            "level_changed": int(level_changed.sum()),
+            "recommendation_changed": int(rec_changed.sum()),
+            "level_transitions": transitions,
+            "mean_risk_score": {
+                "current": float(columns.risk_scores.mean()) if len(columns) else 0.0,
+                "rescored": float(scored["risk_score"].mean()) if len(columns) else 0.0
+            },
+            "sample_changes": [
+                {
+                    "action_id": columns.action_ids[i],
+                    "risk_level": {
+                        "current": _label(LEVELS, columns.level_codes[i]),
+                        "rescored": _label(LEVELS, scored["level_codes"][i])
+                    },
+                    "recommendation": {
+                        "current": _label(RECOMMENDATIONS, columns.recommendation_codes[i]),
+                        "rescored": _label(RECOMMENDATIONS, scored["recommendation_codes"][i])
+                    },
+                    "risk_score": {"current": float(columns.risk_scores[i]), "rescored": float(scored["risk_score"][i])}
+                }
+                for i in changed_idx
+            ],
+            "scoring_time_ms": round(elapsed_ms, 3),
+            "weights": self.weights.dict()
+        }
@@ -0,0 +1,234 @@
+import asyncio
+import heapq
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional, Tuple
+
+from models import BulkheadSettings
+from components.Metrics import metrics
+
+# lower rank is served first
+PRIORITY_RANK = {"high": 0, "normal": 1, "low": 2}
+
+
+class PrioritySemaphore:
+    """
+    Semaphore that hands free slots to the highest priority waiter, FIFO within a priority.
+    A caller may bring a limit of its own, it only gets a slot while fewer are in use,
+    so operations with different caps can share the slots of one target.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._sequence = 0
+        self._waiters: List[Tuple[int, int, int, asyncio.Future]] = []
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, rank: int = 1, limit: Optional[int] = None):
+        limit = self.limit if limit is None else limit
+        if self.in_use < limit and not self.waiting:
+            self.in_use += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiters, (rank, self._sequence, limit, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was handed over right before the cancellation
+                self.release()
+            else:
+                future.cancel()
+                # a cancelled head waiter may have held back the ones behind it
+                self._wake()
+            raise
+
+    def release(self):
+        self.in_use -= 1
+        self._wake()
+
+    def _wake(self):
+        # strictly in priority order, a waiter with a lower limit holds back the ones behind it
+        while self._waiters:
+            _, _, limit, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_use >= limit:
+                break
+            heapq.heappop(self._waiters)
+            self.in_use += 1
+            future.set_result(None)
+
+    @property
+    def idle(self) -> bool:
+        return self.in_use == 0 and not self.waiting
+
+
+class TokenBucket:
+    """Token bucket where a caller reserves a token and is told how long to wait for it"""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def wait(self) -> float:
+        """Seconds until a token is available, nothing is reserved"""
+        tokens = min(self.burst, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        # a negative balance is debt paid back by waiting
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class Bulkhead:
+    """
+    Isolates remediation targets from each other in the execution path.
+    An execution needs a slot of its target (system and service), a slot of
+    its namespace and a token of its operation's rate limit before it may run,
+    so a shared dependency failing cannot stampede one service with restarts.
+    Waiters are served by approval priority.
+    """
+
+    def __init__(self, settings: BulkheadSettings, source: str = "defaults"):
+        self.settings = settings
+        self.source = source
+        self._semaphores: Dict[Tuple, PrioritySemaphore] = {}
+        self._buckets: Dict[Tuple, TokenBucket] = {}
+        self.admitted = 0
+        self.throttled = 0
+        self.waits: Deque[float] = deque(maxlen=1024)
+        self.max_wait_ms = 0.0
+
+    @classmethod
+    def from_file(cls, path: Optional[str]) -> "Bulkhead":
+        """Load limits from a JSON file, falling back to the defaults when it is missing"""
+        if path and os.path.exists(path):
+            with open(path) as f:
+                return cls(BulkheadSettings(**json.load(f)), source=path)
+        return cls(BulkheadSettings())
+
+    def limits(self, operation: str) -> Dict:
+        defaults = self.settings.dict(exclude={"operations"})
+        overrides = self.settings.operations.get(operation)
+        if overrides is not None:
+            defaults.update(overrides.dict(exclude_none=True))
+        return defaults
+
+    def _semaphore(self, key: Tuple, limit: int) -> PrioritySemaphore:
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = PrioritySemaphore(limit)
+        return semaphore
+
+    async def _acquire(self, key: Tuple, limit: int, rank: int):
+        semaphore = self._semaphore(key, limit)
+        try:
+            await semaphore.acquire(rank, limit)
+        except asyncio.CancelledError:
+            self._prune(key)
+            raise
+
+    def _release(self, key: Tuple):
+        self._semaphores[key].release()
+        self._prune(key)
+
+    def _prune(self, key: Tuple):
+        semaphore = self._semaphores.get(key)
+        if semaphore is not None and semaphore.idle:
+            del self._semaphores[key]
+
+    def _bucket(self, action: Dict, limits: Dict) -> TokenBucket:
+        target = action.get("target", {})
+        key = (target.get("operation", ""), target.get("system"), action.get("context", {}).get("service"))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(limits["rate_per_minute"] / 60, limits["burst"])
+        return bucket
+
+    def rate_wait(self, action: Dict) -> float:
+        """Seconds until the operation's rate limit has a token for this action, without taking it"""
+        limits = self.limits(action.get("target", {}).get("operation", ""))
+        return self._bucket(action, limits).wait()
+
+    @asynccontextmanager
+    async def admit(self, action: Dict, priority: str = "normal"):
+        """Wait for the target and namespace slots and a rate limit token, yields the wait in ms"""
+        target = action.get("target", {})
+        context = action.get("context", {})
+        operation = target.get("operation", "")
+        limits = self.limits(operation)
+        rank = PRIORITY_RANK.get(priority, PRIORITY_RANK["normal"])
+        started = time.perf_counter()
+
+        # the token first, a throttled target must not hold slots of its namespace while it waits
+        delay = self._bucket(action, limits).reserve()
+        if delay > 0:
+            self.throttled += 1
+            await asyncio.sleep(delay)
+
+        # always target before namespace so two executions never wait on each other;
+        # the slots are shared by all operations, each acquire brings its operation's limit
+        target_key = ("target", target.get("system"), context.get("service"))
+        namespace_key = ("namespace", context.get("namespace"))
+        await self._acquire(target_key, limits["target_concurrency"], rank)
+        try:
+            await self._acquire(namespace_key, limits["namespace_concurrency"], rank)
+            try:
+                wait_ms = (time.perf_counter() - started) * 1000
+                self.admitted += 1
+                self.waits.append(wait_ms)
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+                yield wait_ms
+            finally:
+                self._release(namespace_key)
+        finally:
+            self._release(target_key)
+
+    def stats(self) -> Dict:
+        ordered = sorted(self.waits)
+        return {
+            "source": self.source,
+            "settings": self.settings.dict(),
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "wait_ms": {
+                "mean": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+                "p95": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3) if ordered else 0.0,
+                "max": round(self.max_wait_ms, 3)
+            },
+            "busy": {
+                "/".join(str(part) for part in key): {"in_use": semaphore.in_use, "waiting": semaphore.waiting}
+                for key, semaphore in self._semaphores.items()
+            }
+        }
+
+
+BULKHEAD_CONFIG_PATH = os.getenv("BULKHEAD_CONFIG_PATH", "bulkhead.json")
+
+bulkhead = Bulkhead.from_file(BULKHEAD_CONFIG_PATH)
+
+metrics.counter("atp_bulkhead_admitted_total", "Executions admitted by the bulkhead", callback=lambda: bulkhead.admitted)
+metrics.counter(
+    "atp_bulkhead_throttled_total", "Admitted executions that waited for a rate limit token",
+    callback=lambda: bulkhead.throttled
+)
+metrics.gauge(
+    "atp_bulkhead_waiting", "Executions waiting for a bulkhead slot",
+    callback=lambda: sum(semaphore.waiting for semaphore in bulkhead._semaphores.values())
+)
@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from models import ApprovalDecision, ActionStatus
+from components.ATPStore import store, ATPStore
+from components.PolicyEngine import parse_duration
+from components.Metrics import metrics
+
+ESCALATE = "escalate"
+EXPIRE = "expire"
+
+# statuses in which an action is still waiting for a human decision
+PENDING_STATUSES = (ActionStatus.DECLARED, ActionStatus.PENDING, ActionStatus.PENDING_APPROVAL)
+
+
+def to_epoch(timestamp: str) -> float:
+    moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None) - moment.utcoffset()
+    return (moment - datetime(1970, 1, 1)).total_seconds()
+
+
+class DeadlineScheduler:
+    """
+    Enforces approval deadlines of human_required actions.
+    All pending escalations and expiries live in a single timer heap served by
+    one task that sleeps until the earliest due time, so scheduling is
+    O(log n) and nothing polls individual actions. Cancelled timers are
+    dropped lazily when they reach the top of the heap.
+    """
+
+    def __init__(self, store: ATPStore):
+        self.store = store
+        # (due epoch seconds, sequence, action_id, kind)
+        self._heap: List[Tuple[float, int, str, str]] = []
+        # live timer sequence per (action_id, kind), anything else in the heap is cancelled
+        self._live: Dict[Tuple[str, str], int] = {}
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+        self.fired: Dict[str, int] = {ESCALATE: 0, EXPIRE: 0}
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._lag_total_ms = 0.0
+
+    def schedule(self, action_id: str, kind: str, due: float):
+        """Schedule (or reschedule) a timer for an action at epoch seconds `due`"""
+        self._sequence += 1
+        self._live[(action_id, kind)] = self._sequence
+        heapq.heappush(self._heap, (due, self._sequence, action_id, kind))
+        if self._heap[0][1] == self._sequence:
+            # new earliest timer, the runner has to recompute its sleep
+            self._wakeup.set()
+
+    def schedule_approval(self, action_id: str, approval_request: Dict, declared_at: Optional[str] = None):
+        """Schedule escalation and expiry timers from an action's approval request"""
+        if approval_request.get("approval_type") != "human_required":
+            return
+
+        deadline_at = approval_request.get("deadline_at")
+        if deadline_at:
+            self.schedule(action_id, EXPIRE, to_epoch(deadline_at))
+        elif declared_at and approval_request.get("deadline"):
+            # requests created before deadlines were enforced only carry "24 hours"
+            try:
+                seconds = parse_duration(approval_request["deadline"])
+                self.schedule(action_id, EXPIRE, to_epoch(declared_at) + seconds)
+            except ValueError:
+                pass
+
+        escalate_at = approval_request.get("escalate_at")
+        if escalate_at and not approval_request.get("escalated_at"):
+            self.schedule(action_id, ESCALATE, to_epoch(escalate_at))
+
+    def cancel(self, action_id: str):
+        """Cancel every timer of an action, e.g. once a decision was made"""
+        self._live.pop((action_id, ESCALATE), None)
+        self._live.pop((action_id, EXPIRE), None)
+        # compact when cancelled timers dominate the heap
+        if len(self._heap) > 1024 and len(self._heap) > 2 * len(self._live):
+            self._heap = [
+                item for item in self._heap
+                if self._live.get((item[2], item[3])) == item[1]
+            ]
+            heapq.heapify(self._heap)
+
+    def rebuild(self) -> int:
+        """Rebuild the timer heap from pending actions in the store"""
+        self._heap.clear()
+        self._live.clear()
+        for action_id, action in self.store.actions.items():
+            if self.is_pending(action_id):
+                self.schedule_approval(
+                    action_id,
+                    action.get("approval_request") or {},
+                    declared_at=action.get("timestamp")
+                )
+        heapq.heapify(self._heap)
+        return len(self._live)
+
+    def is_pending(self, action_id: str) -> bool:
+        action = self.store.actions.get(action_id)
+        return (
+            action is not None
+            and action_id not in self.store.approvals
+            and action.get("status") in PENDING_STATUSES
+        )
+
+    async def run(self):
+        """Fire timers as they come due"""
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, sequence, action_id, kind = heapq.heappop(self._heap)
+                if self._live.get((action_id, kind)) != sequence:
+                    continue
+                del self._live[(action_id, kind)]
+                self._record_lag((now - due) * 1000)
+                try:
+                    self._fire(action_id, kind)
+                except Exception as e:
+                    print(f"Error firing {kind} timer for {action_id}: {e}")
+
+            # drop cancelled timers sitting at the top
+            while self._heap and self._live.get((self._heap[0][2], self._heap[0][3])) != self._heap[0][1]:
+                heapq.heappop(self._heap)
+
+            timeout = max(0.0, self._heap[0][0] - time.time()) if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _record_lag(self, lag_ms: float):
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self._lag_total_ms += lag_ms
+
+    def _fire(self, action_id: str, kind: str):
+        if not self.is_pending(action_id):
+            return
+        self.fired[kind] += 1
+        approval_request = dict(self.store.actions[action_id].get("approval_request") or {})
+
+        if kind == ESCALATE:
+            escalation_approvers = approval_request.get("escalation_approvers", [])
+            approval_request["approvers"] = list(dict.fromkeys(
+                approval_request.get("approvers", []) + escalation_approvers
+            ))
+            approval_request["priority"] = "high"
+            approval_request["escalated_at"] = datetime.utcnow().isoformat()
+            self.store.update_approval_request(action_id, approval_request)
+            self.store.audit_log(action_id, "approval_escalated", {
+                "approvers": approval_request["approvers"],
+                "escalation_approvers": escalation_approvers,
+                "deadline_at": approval_request.get("deadline_at")
+            })
+            return
+
+        if approval_request.get("on_expiry", "reject") == "reject":
+            self.cancel(action_id)
+            self.store.store_approval(ApprovalDecision(
+                action_id=action_id,
+                decision="rejected",
+                approver="system:deadline_scheduler",
+                timestamp=datetime.utcnow().isoformat(),
+                reason=f"No approval decision before deadline {approval_request.get('deadline_at') or approval_request.get('deadline')}"
+            ))
+        else:
+            self.cancel(action_id)
+            self.store.update_action_status(action_id, ActionStatus.EXPIRED)
+            self.store.audit_log(action_id, "approval_expired", {
+                "deadline_at": approval_request.get("deadline_at"),
+                "deadline": approval_request.get("deadline")
+            })
+
+    def stats(self) -> Dict:
+        fired = sum(self.fired.values())
+        next_due = self._heap[0][0] if self._heap else None
+        return {
+            "queue_depth": len(self._live),
+            "heap_size": len(self._heap),
+            "fired": dict(self.fired),
+            "next_due_at": (datetime(1970, 1, 1) + timedelta(seconds=next_due)).isoformat() if next_due else None,
+            "lag_ms": {
+                "last": round(self.last_lag_ms, 3),
+                "max": round(self.max_lag_ms, 3),
+                "mean": round(self._lag_total_ms / fired, 3) if fired else 0.0
+            }
+        }
+
+
+deadline_scheduler = DeadlineScheduler(store)
+
+metrics.gauge(
+    "atp_approval_deadlines_pending", "Actions waiting for an approval decision with a deadline",
+    callback=lambda: len(deadline_scheduler._live)
+)
+metrics.counter(
+    "atp_approval_deadlines_fired_total", "Approval escalations and expiries fired", ("kind",),
+    lambda: {(kind,): count for kind, count in deadline_scheduler.fired.items()}
+)
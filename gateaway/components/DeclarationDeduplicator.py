@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models import ActionDeclaration, ActionStatus
+from components.ATPStore import store, ATPStore
+from components.Metrics import metrics
+
+DEFAULT_FINGERPRINT_FIELDS = (
+    "target.system",
+    "target.resource",
+    "target.operation",
+    "context.service",
+    "context.namespace",
+    "context.status"
+)
+
+# statuses of actions that have not run yet, repeats are folded into them
+OPEN_STATUSES = (
+    ActionStatus.DECLARED,
+    ActionStatus.PENDING,
+    ActionStatus.PENDING_APPROVAL,
+    ActionStatus.APPROVED,
+    ActionStatus.EXECUTING
+)
+
+
+def _to_epoch(timestamp: str) -> float:
+    moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None) - moment.utcoffset()
+    return (moment - datetime(1970, 1, 1)).total_seconds()
+
+
+class DeclarationDeduplicator:
+    """
+    Folds repeated declarations, e.g. from a flapping monitor, into the open
+    action they duplicate before any risk assessment is spent on them.
+    A declaration is a repeat when it carries an idempotency key that was
+    already used, or when its fingerprint matches an open action declared or
+    folded within the window. Every fold extends the window, so a monitor
+    flapping for an hour still costs a single action. A repeat of a
+    declaration still being assessed waits until it is stored, and is
+    declared on its own when that declaration fails.
+    """
+
+    def __init__(
+            self,
+            store: ATPStore,
+            window_seconds: float = 300,
+            fields: Tuple[str, ...] = DEFAULT_FINGERPRINT_FIELDS,
+            key_ttl_seconds: float = 86400
+        ):
+        self.store = store
+        self.window_seconds = window_seconds
+        self.fields = fields
+        self.key_ttl_seconds = key_ttl_seconds
+        # fingerprint -> [action_id, last seen epoch]
+        self._open: Dict[str, List] = {}
+        # idempotency key -> [action_id, first seen epoch]
+        self._keys: Dict[str, List] = {}
+        # action_id of a declaration being assessed -> future resolved once it
+        # is stored (True) or released (False), created by the first repeat
+        self._assessing: Dict[str, Optional[asyncio.Future]] = {}
+        self._last_prune = time.time()
+        self.folded: Counter = Counter()
+        self.folds_per_action: Counter = Counter()
+
+    def fingerprint(self, declaration: ActionDeclaration) -> str:
+        document = declaration.dict()
+        values = []
+        for field in self.fields:
+            value = document
+            for part in field.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            values.append(value)
+        return hashlib.sha1(json.dumps(values, default=str).encode()).hexdigest()
+
+    def _is_open(self, action_id: str) -> bool:
+        action = self.store.actions.get(action_id)
+        # not stored yet means its declaration is still being assessed, see settled()
+        return action is None or action.get("status") in OPEN_STATUSES
+
+    def check(self, declaration: ActionDeclaration, idempotency_key: Optional[str] = None) -> Tuple[Optional[str], str, Optional[str]]:
+        """
+        Return the action a declaration folds into (None for a new action),
+        its fingerprint and what matched ("idempotency_key" or "fingerprint")
+        """
+        now = time.time()
+        fingerprint = self.fingerprint(declaration)
+
+        if idempotency_key:
+            entry = self._keys.get(idempotency_key)
+            if entry is not None and now - entry[1] <= self.key_ttl_seconds:
+                return entry[0], fingerprint, "idempotency_key"
+
+        if self.window_seconds > 0:
+            entry = self._open.get(fingerprint)
+            if entry is not None and now - entry[1] <= self.window_seconds and self._is_open(entry[0]):
+                entry[1] = now
+                return entry[0], fingerprint, "fingerprint"
+
+        return None, fingerprint, None
+
+    def register(self, fingerprint: str, action_id: str, idempotency_key: Optional[str] = None):
+        """Claim a fingerprint and key for a new action, before it is assessed"""
+        now = time.time()
+        self._open[fingerprint] = [action_id, now]
+        if idempotency_key:
+            self._keys[idempotency_key] = [action_id, now]
+        self._assessing[action_id] = None
+        if now - self._last_prune > max(self.window_seconds, 60):
+            self._prune(now)
+
+    def release(self, fingerprint: str, action_id: str, idempotency_key: Optional[str] = None):
+        """Drop the claims of a declaration that failed before it was stored"""
+        if self._open.get(fingerprint, [None])[0] == action_id:
+            del self._open[fingerprint]
+        if idempotency_key and self._keys.get(idempotency_key, [None])[0] == action_id:
+            del self._keys[idempotency_key]
+        self._settle(action_id, False)
+
+    def stored(self, action_id: str):
+        """The declaration was stored, repeats waiting for it fold into it"""
+        self._settle(action_id, True)
+
+    def _settle(self, action_id: str, stored: bool):
+        future = self._assessing.pop(action_id, None)
+        if future is not None and not future.done():
+            future.set_result(stored)
+
+    async def settled(self, action_id: str) -> bool:
+        """
+        Wait until the action a repeat folds into is stored. False when its
+        declaration failed, the repeat is then checked again.
+        """
+        if action_id not in self._assessing:
+            return action_id in self.store.actions
+        future = self._assessing[action_id]
+        if future is None:
+            future = self._assessing[action_id] = asyncio.get_running_loop().create_future()
+        # a cancelled repeat must not cancel the others waiting
+        return await asyncio.shield(future)
+
+    def fold(self, action_id: str, fingerprint: str, reason: str, declaration: ActionDeclaration, idempotency_key: Optional[str] = None) -> int:
+        """Record a folded declaration in the audit trail of the action it repeats"""
+        if idempotency_key and idempotency_key not in self._keys:
+            # later retries with this key must land on the same action
+            self._keys[idempotency_key] = [action_id, time.time()]
+        self.folded[reason] += 1
+        self.folds_per_action[action_id] += 1
+        self.store.audit_log(action_id, "declaration_folded", {
+            "reason": reason,
+            "fingerprint": fingerprint,
+            "idempotency_key": idempotency_key,
+            "folded_count": self.folds_per_action[action_id],
+            "context": declaration.context,
+            "payload": declaration.payload
+        })
+        return self.folds_per_action[action_id]
+
+    def _prune(self, now: float):
+        self._last_prune = now
+        self._open = {
+            fingerprint: entry for fingerprint, entry in self._open.items()
+            if now - entry[1] <= self.window_seconds
+        }
+        self._keys = {
+            key: entry for key, entry in self._keys.items()
+            if now - entry[1] <= self.key_ttl_seconds
+        }
+
+    def rebuild(self) -> int:
+        """Restore fingerprints of recent open actions and idempotency keys from the store"""
+        now = time.time()
+        self._open.clear()
+        self._keys.clear()
+        for action_id, action in sorted(self.store.actions.items(), key=lambda item: item[1].get("timestamp", "")):
+            try:
+                declared_at = _to_epoch(action["timestamp"])
+                declaration = self.store.declaration(action_id)
+            except Exception:
+                continue
+            if action.get("idempotency_key") and now - declared_at <= self.key_ttl_seconds:
+                self._keys[action["idempotency_key"]] = [action_id, declared_at]
+            if action.get("status") in OPEN_STATUSES and now - declared_at <= self.window_seconds:
+                self._open[self.fingerprint(declaration)] = [action_id, declared_at]
+        return len(self._open)
+
+    def stats(self) -> Dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "fingerprint_fields": list(self.fields),
+            "tracked_fingerprints": len(self._open),
+            "tracked_idempotency_keys": len(self._keys),
+            "folded": dict(self.folded),
+            "top_folded_actions": dict(self.folds_per_action.most_common(10))
+        }
+
+
+DEDUP_WINDOW_SECONDS = float(os.getenv("DEDUP_WINDOW_SECONDS", "300"))
+DEDUP_FINGERPRINT_FIELDS = tuple(
+    field.strip() for field in os.getenv("DEDUP_FINGERPRINT_FIELDS", ",".join(DEFAULT_FINGERPRINT_FIELDS)).split(",")
+    if field.strip()
+)
+
+declaration_deduplicator = DeclarationDeduplicator(
+    store,
+    window_seconds=DEDUP_WINDOW_SECONDS,
+    fields=DEDUP_FINGERPRINT_FIELDS
+)
+
+metrics.counter(
+    "atp_declarations_folded_total", "Declarations folded into an open action, by reason", ("reason",),
+    lambda: {(reason,): count for reason, count in declaration_deduplicator.folded.items()}
+)
+metrics.gauge(
+    "atp_dedup_tracked_fingerprints", "Open actions new declarations can fold into",
+    callback=lambda: len(declaration_deduplicator._open)
+)
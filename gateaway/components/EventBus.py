@@ -0,0 +1,157 @@
+import asyncio
+import os
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from components.ATPStore import store, ATPStore
+from components.Serialization import dumps_str
+from components.Metrics import metrics
+
+# audit entries that record how the gateway worked, not a lifecycle change
+INTERNAL_EVENTS = frozenset(("trace",))
+
+
+class Subscriber:
+    """A live event stream client with its own bounded queue of encoded events"""
+
+    def __init__(self, queue_size: int, action_id: Optional[str] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.action_id = action_id
+        # set when the client fell behind, the stream ends once the queue is drained
+        self.evicted = False
+        # events between the client's Last-Event-ID and the replay are gone, it has to refetch
+        self.gap = False
+
+
+class EventBus:
+    """
+    Pushes the audit trail to dashboards as it is written.
+    Every lifecycle audit log entry becomes an event with a monotonically
+    increasing id, encoded once and fanned out to all subscribers, internal
+    entries such as span traces are not streamed. The most recent events
+    are kept so a reconnecting client resumes from its Last-Event-ID, ids
+    continue after the stored audit trail across restarts.
+    A subscriber whose queue is full is evicted instead of slowing down the
+    gateway, its client reconnects and resumes from the history.
+    """
+
+    def __init__(self, store: ATPStore, history_size: int = 1000, queue_size: int = 256, heartbeat_seconds: float = 15):
+        self.store = store
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.sequence = 0
+        # (event id, action_id, encoded SSE frame)
+        self.history: Deque[Tuple[int, str, str]] = deque(maxlen=history_size)
+        self._subscribers: Set[Subscriber] = set()
+        self.evictions = 0
+        store.audit_listeners.append(self.publish)
+
+    def rebuild(self) -> int:
+        """Continue the event ids after the lifecycle entries of the stored audit trail"""
+        stored = sum(
+            1 for entries in self.store.audit_logs.values() for entry in entries
+            if entry["event"] not in INTERNAL_EVENTS
+        )
+        self.sequence = max(self.sequence, stored)
+        return self.sequence
+
+    def publish(self, action_id: str, entry: Dict):
+        """Assign the next event id to an audit log entry and fan it out"""
+        if entry["event"] in INTERNAL_EVENTS:
+            return
+        self.sequence += 1
+        action = self.store.actions.get(action_id) or {}
+        payload = dumps_str({
+            "id": self.sequence,
+            "action_id": action_id,
+            "event": entry["event"],
+            "timestamp": entry["timestamp"],
+            # status after the event, so clients can update a row without refetching it
+            "status": action.get("status"),
+            "data": entry["data"]
+        })
+        frame = f"id: {self.sequence}\ndata: {payload}\n\n"
+        self.history.append((self.sequence, action_id, frame))
+
+        for subscriber in list(self._subscribers):
+            if subscriber.action_id is not None and subscriber.action_id != action_id:
+                continue
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._evict(subscriber)
+
+    def subscribe(self, last_event_id: Optional[int] = None, action_id: Optional[str] = None) -> Subscriber:
+        """Register a subscriber, replaying the history after last_event_id"""
+        subscriber = Subscriber(self.queue_size, action_id)
+        if last_event_id is not None:
+            oldest = self.history[0][0] if self.history else self.sequence + 1
+            # ids of a store that was reset are ahead of the sequence
+            subscriber.gap = last_event_id + 1 < oldest or last_event_id > self.sequence
+            if not subscriber.gap:
+                missed = [
+                    frame for event_id, event_action_id, frame in self.history
+                    if event_id > last_event_id and (action_id is None or event_action_id == action_id)
+                ]
+                if len(missed) > self.queue_size:
+                    subscriber.gap = True
+                else:
+                    for frame in missed:
+                        subscriber.queue.put_nowait(frame)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def _evict(self, subscriber: Subscriber):
+        subscriber.evicted = True
+        self.evictions += 1
+        self._subscribers.discard(subscriber)
+
+    async def stream(self, subscriber: Subscriber) -> AsyncIterator[str]:
+        """Server-sent events of a subscriber, with keepalive comments while idle"""
+        try:
+            yield "retry: 3000\n\n"
+            if subscriber.gap:
+                yield f"event: reset\ndata: {dumps_str({'id': self.sequence})}\n\n"
+            while True:
+                if subscriber.evicted and subscriber.queue.empty():
+                    yield f"event: evicted\ndata: {dumps_str({'reason': 'slow consumer'})}\n\n"
+                    return
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> Dict:
+        return {
+            "last_event_id": self.sequence,
+            "history": len(self.history),
+            "subscribers": len(self._subscribers),
+            "queue_size": self.queue_size,
+            "max_queue_depth": max((subscriber.queue.qsize() for subscriber in self._subscribers), default=0),
+            "evictions": self.evictions
+        }
+
+
+EVENT_HISTORY_SIZE = int(os.getenv("EVENT_HISTORY_SIZE", "1000"))
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+event_bus = EventBus(
+    store,
+    history_size=EVENT_HISTORY_SIZE,
+    queue_size=EVENT_QUEUE_SIZE,
+    heartbeat_seconds=EVENT_HEARTBEAT_SECONDS
+)
+
+metrics.counter("atp_events_total", "Audit events published", callback=lambda: event_bus.sequence)
+metrics.counter("atp_event_evictions_total", "Slow event stream subscribers evicted", callback=lambda: event_bus.evictions)
+metrics.gauge("atp_event_subscribers", "Connected event stream subscribers", callback=lambda: len(event_bus._subscribers))
+metrics.gauge(
+    "atp_event_queue_depth_max", "Deepest event queue of a subscriber",
+    callback=lambda: max((subscriber.queue.qsize() for subscriber in event_bus._subscribers), default=0)
+)
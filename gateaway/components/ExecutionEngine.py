@@ -1,6 +1,63 @@
+import asyncio
 import httpx
+import os
+import random
+import time
+from collections import deque
 from datetime import datetime
+from typing import Deque, Dict, Optional
 from models import CompleteAction, ApprovalDecision, ExecutionResultModel
+from components.Metrics import metrics
+from components.Tracing import tracer
+
+
+# failures worth another request, n8n either never saw it or dedupes it by idempotency key
+RETRYABLE_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class WebhookMetrics:
+    """Request count, errors and latency of one n8n webhook"""
+
+    def __init__(self, window: int = 512):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.last_error: Optional[str] = None
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        # recent latencies for percentiles
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, error: Optional[str] = None):
+        self.requests += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.latencies.append(elapsed_ms)
+        if error is not None:
+            self.errors += 1
+            self.last_error = error
+
+    def snapshot(self) -> Dict:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3) if ordered else 0.0
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "last_error": self.last_error,
+            "latency_ms": {
+                "mean": round(self.total_ms / self.requests, 3) if self.requests else 0.0,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "max": round(self.max_ms, 3)
+            }
+        }
+
 
 class ExecutionEngine:
     """
@@ -9,16 +66,84 @@ class ExecutionEngine:
     The goal of the exeuction engine is to reliably carry out the approved action
     as specified in the action declaration.
     If execution fails, it should capture detailed error information for auditing and troubleshooting.
+    Each webhook gets its own long-lived connection pool, opened at startup and
+    closed at shutdown, so remediations reuse keep-alive connections to n8n.
     """
     
-    def __init__(self, high_risk_webhook_url: str, low_risk_webhook_url: str):
+    def __init__(
+            self,
+            high_risk_webhook_url: str,
+            low_risk_webhook_url: str,
+            connect_timeout: float = 5.0,
+            read_timeout: float = 30.0,
+            max_connections: int = 20,
+            max_keepalive_connections: int = 10,
+            keepalive_expiry: float = 30.0,
+            max_retries: int = 2,
+            backoff_base: float = 0.5,
+            backoff_max: float = 8.0
+        ):
         self.high_risk_webhook_url = high_risk_webhook_url
         self.low_risk_webhook_url = low_risk_webhook_url
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.metrics: Dict[str, WebhookMetrics] = {
+            "high_risk": WebhookMetrics(),
+            "low_risk": WebhookMetrics()
+        }
+
+    def _client(self, web_hook_url: str) -> httpx.AsyncClient:
+        """Pooled client of a webhook, opened on first use when start() was not called"""
+        client = self._clients.get(web_hook_url)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._clients[web_hook_url] = client
+        return client
+
+    async def start(self):
+        """Open the connection pools of the configured webhooks"""
+        for web_hook_url in (self.high_risk_webhook_url, self.low_risk_webhook_url):
+            if web_hook_url:
+                self._client(web_hook_url)
+
+    async def close(self):
+        """Close every connection pool"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
     
-    async def execute(self, action: CompleteAction, approval: ApprovalDecision) -> ExecutionResultModel:
-        """Execute action through n8n workflow"""
+    def _backoff(self, retry: int, retry_after: Optional[str] = None) -> float:
+        """Exponential backoff with full jitter, honouring a Retry-After header in seconds"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (retry - 1)))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(self.backoff_max, float(retry_after)))
+        return delay
+
+    async def execute(
+            self,
+            action: CompleteAction,
+            approval: ApprovalDecision,
+            attempt: int = 1,
+            idempotency_key: Optional[str] = None
+        ) -> ExecutionResultModel:
+        """
+        Execute action through n8n workflow.
+        Every request of one attempt carries the same idempotency key, so n8n can
+        drop a retry of a request it already ran, e.g. after a read timeout.
+        Execution jobs pass a key of their own, unique per job and attempt.
+        """
         
         started_at = datetime.utcnow().isoformat()
+        idempotency_key = idempotency_key or f"{action.action_id}:{attempt}"
+        requests = 0
         
         try:
             # Determine what workflow to hit based on risk level
@@ -27,44 +152,77 @@ class ExecutionEngine:
             web_hook_url = ""
 
             if risk_level == "high":
+                webhook = "high_risk"
                 web_hook_url = self.high_risk_webhook_url
             else:
+                webhook = "low_risk"
                 web_hook_url = self.low_risk_webhook_url
 
         
             # Call n8n webhook with ATP metadata
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    web_hook_url,
-                    json={
-                        "atp_action_id": action.action_id,
-                        "target": action.target.dict(),
-                        "payload": action.payload,
-                        "context": action.context,
-                        "approval": {
-                            "approver": approval.approver,
-                            "timestamp": approval.timestamp
-                        }
-                    },
-                    timeout=30.0
+            body = {
+                "atp_action_id": action.action_id,
+                "idempotency_key": idempotency_key,
+                "attempt": attempt,
+                "target": action.target.dict(),
+                "payload": action.payload,
+                "context": action.context,
+                "approval": {
+                    "approver": approval.approver,
+                    "timestamp": approval.timestamp
+                }
+            }
+            metrics = self.metrics[webhook]
+            while True:
+                requests += 1
+                request_started = time.perf_counter()
+                try:
+                    with tracer.stage("n8n_dispatch", webhook=webhook, attempt=attempt, request=requests) as span:
+                        response = await self._client(web_hook_url).post(
+                            web_hook_url,
+                            json=body,
+                            headers={"Idempotency-Key": idempotency_key}
+                        )
+                        span.set(status_code=response.status_code)
+                except RETRYABLE_ERRORS as e:
+                    metrics.record((time.perf_counter() - request_started) * 1000, f"{type(e).__name__}: {e}")
+                    if requests > self.max_retries:
+                        raise
+                    metrics.retries += 1
+                    await asyncio.sleep(self._backoff(requests))
+                    continue
+                except Exception as e:
+                    metrics.record((time.perf_counter() - request_started) * 1000, f"{type(e).__name__}: {e}")
+                    raise
+
+                metrics.record(
+                    (time.perf_counter() - request_started) * 1000,
+                    None if response.status_code == 200 else f"HTTP {response.status_code}"
                 )
+                if response.status_code in RETRYABLE_STATUS_CODES and requests <= self.max_retries:
+                    metrics.retries += 1
+                    await asyncio.sleep(self._backoff(requests, response.headers.get("Retry-After")))
+                    continue
+                break
+
+            result = response.json()
                 
-                result = response.json()
-                
-                return ExecutionResultModel(
-                    action_id=action.action_id,
-                    started_at=started_at,
-                    completed_at=datetime.utcnow().isoformat(),
-                    status="success" if response.status_code == 200 else "failure",
-                    result=result,
-                    side_effects=[
-                        {
-                            "type": "n8n_workflow_executed",
-                            "workflow_id": action.workflow_id,
-                            "timestamp": datetime.utcnow().isoformat()
-                        }
-                    ]
-                )
+            return ExecutionResultModel(
+                action_id=action.action_id,
+                started_at=started_at,
+                completed_at=datetime.utcnow().isoformat(),
+                status="success" if response.status_code == 200 else "failure",
+                result=result,
+                side_effects=[
+                    {
+                        "type": "n8n_workflow_executed",
+                        "workflow_id": action.workflow_id,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                ],
+                idempotency_key=idempotency_key,
+                requests=requests
+            )
         
         except Exception as e:
             return ExecutionResultModel(
@@ -73,5 +231,64 @@ class ExecutionEngine:
                 completed_at=datetime.utcnow().isoformat(),
                 status="failure",
                 result={"error": str(e)},
-                side_effects=[]
+                side_effects=[],
+                idempotency_key=idempotency_key,
+                requests=requests
             )
+
+    def stats(self) -> Dict:
+        return {
+            "webhooks": {
+                name: {
+                    "url_configured": bool(url),
+                    "pooled": url in self._clients,
+                    **self.metrics[name].snapshot()
+                }
+                for name, url in (
+                    ("high_risk", self.high_risk_webhook_url),
+                    ("low_risk", self.low_risk_webhook_url)
+                )
+            },
+            "timeouts": {"connect": self.timeout.connect, "read": self.timeout.read},
+            "retries": {
+                "max_retries": self.max_retries,
+                "backoff_base": self.backoff_base,
+                "backoff_max": self.backoff_max
+            },
+            "limits": {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "keepalive_expiry": self.limits.keepalive_expiry
+            }
+        }
+
+
+# n8n settings, read once when the gateway starts
+AUTOMATION_ENGINE_HIGH_RISK_WEBHOOK = os.getenv("AUTOMATION_ENGINE_HIGH_RISK_WEBHOOK", "")
+AUTOMATION_ENGINE_LOW_RISK_WEBHOOK = os.getenv("AUTOMATION_ENGINE_LOW_RISK_WEBHOOK", "")
+
+execution_engine = ExecutionEngine(
+    AUTOMATION_ENGINE_HIGH_RISK_WEBHOOK,
+    AUTOMATION_ENGINE_LOW_RISK_WEBHOOK,
+    connect_timeout=float(os.getenv("N8N_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("N8N_READ_TIMEOUT", "30")),
+    max_connections=int(os.getenv("N8N_MAX_CONNECTIONS", "20")),
+    max_keepalive_connections=int(os.getenv("N8N_MAX_KEEPALIVE_CONNECTIONS", "10")),
+    keepalive_expiry=float(os.getenv("N8N_KEEPALIVE_EXPIRY", "30")),
+    max_retries=int(os.getenv("N8N_MAX_RETRIES", "2")),
+    backoff_base=float(os.getenv("N8N_BACKOFF_BASE", "0.5")),
+    backoff_max=float(os.getenv("N8N_BACKOFF_MAX", "8"))
+)
+
+metrics.counter(
+    "atp_n8n_requests_total", "n8n webhook requests, retries included, by webhook and outcome", ("webhook", "outcome"),
+    lambda: {
+        (name, outcome): count
+        for name, webhook in execution_engine.metrics.items()
+        for outcome, count in (("ok", webhook.requests - webhook.errors), ("error", webhook.errors))
+    }
+)
+metrics.counter(
+    "atp_n8n_retries_total", "Retried n8n webhook requests by webhook", ("webhook",),
+    lambda: {(name,): webhook.retries for name, webhook in execution_engine.metrics.items()}
+)
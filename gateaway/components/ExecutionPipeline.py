@@ -0,0 +1,86 @@
+import os
+from typing import Optional, Tuple
+
+from models import ExecutionResultModel, VerificationResult, ActionStatus
+from components.ATPStore import store, ATPStore
+from components.ExecutionEngine import execution_engine, ExecutionEngine
+from components.VerficationEngine import verification_engine, VerificationEngine
+from components.RollbackEngine import rollback_engine, RollbackEngine, ROLLBACK_ON_VERIFICATION_FAILURE
+
+
+class ExecutionPipeline:
+    """
+    Carries an approved action through execution and post-execution verification,
+    and rolls it back when verification of a successful execution fails.
+    Jobs of the execution queue run through it, whether they were enqueued by
+    the execute endpoint, a bulk approval or the auto-approve fast path.
+    """
+
+    def __init__(
+            self,
+            store: ATPStore,
+            execution_engine: ExecutionEngine,
+            verification_engine: VerificationEngine,
+            rollback_engine: RollbackEngine,
+            auto_rollback: bool = True
+        ):
+        self.store = store
+        self.execution_engine = execution_engine
+        self.verification_engine = verification_engine
+        self.rollback_engine = rollback_engine
+        self.auto_rollback = auto_rollback
+
+    async def run(
+            self,
+            action_id: str,
+            attempt: int = 1,
+            idempotency_key: Optional[str] = None
+        ) -> Tuple[ExecutionResultModel, VerificationResult]:
+        """Execute an approved action through n8n and verify the outcome"""
+        action = self.store.declaration(action_id)
+        approval = self.store.approvals[action_id]
+
+        # Execute through n8n
+        execution = await self.execution_engine.execute(action, approval, attempt=attempt, idempotency_key=idempotency_key)
+
+        try:
+            self.store.store_execution(execution)
+        except Exception as e:
+            self.store.update_action_status(action_id, ActionStatus.EXECUTED)
+
+        # Verify execution
+        verification = await self.verification_engine.verify(action, execution)
+        self.store.store_verification(verification)
+
+        # Layer 7, undo a remediation that ran but did not achieve its outcome,
+        # a failed or unreachable execution left nothing to compensate
+        if (
+            self.auto_rollback
+            and execution.status == "success"
+            and verification.overall_status == "verification_failed"
+            and not self.rollback_engine.is_running(action_id)
+        ):
+            try:
+                await self.rollback_engine.rollback(
+                    action_id,
+                    reason="verification_failed",
+                    trigger="automatic"
+                )
+            except Exception as e:
+                # the remediation already ran, failing the job would make the queue send it again
+                print(f"Error rolling back {action_id}: {e}")
+                self.rollback_engine.record_failure(action_id, "verification_failed", "automatic", e)
+
+        return execution, verification
+
+
+# execute auto approved actions right after declaration
+AUTO_EXECUTE_ENABLED = os.getenv("AUTO_EXECUTE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+execution_pipeline = ExecutionPipeline(
+    store,
+    execution_engine,
+    verification_engine,
+    rollback_engine,
+    auto_rollback=ROLLBACK_ON_VERIFICATION_FAILURE
+)
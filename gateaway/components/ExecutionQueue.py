@@ -0,0 +1,315 @@
+import asyncio
+import os
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Dict, Optional, Set
+
+from models import ActionStatus, ExecutionJob
+from components.ATPStore import store, ATPStore
+from components.ExecutionPipeline import execution_pipeline, ExecutionPipeline
+from components.Bulkhead import bulkhead, Bulkhead, PrioritySemaphore, PRIORITY_RANK
+from components.PreExecutionVerifier import pre_execution_verifier, PreExecutionVerifier
+from components.Metrics import metrics
+from components.Tracing import tracer
+
+QUEUE_WAIT_SECONDS = metrics.histogram(
+    "atp_execution_queue_wait_seconds", "Time execution jobs waited from enqueue to start"
+)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class ExecutionQueue:
+    """
+    Durable queue of approved actions waiting for execution.
+    Jobs are persisted in the store before they are acknowledged and run
+    through the execution pipeline by a fixed number of worker slots. Jobs that were
+    queued or running when the gateway stopped are delivered again on startup,
+    so every accepted execution runs at least once.
+    A job first has to pass the pre-execution checks, then the bulkhead of its
+    target and then waits for a worker slot, both served by approval priority,
+    so jobs held back by a busy or rate limited target never block workers
+    for other targets.
+    """
+
+    def __init__(
+            self,
+            store: ATPStore,
+            pipeline: ExecutionPipeline,
+            bulkhead: Bulkhead,
+            pre_execution: PreExecutionVerifier,
+            workers: int = 4,
+            max_attempts: int = 3
+        ):
+        self.store = store
+        self.pipeline = pipeline
+        self.bulkhead = bulkhead
+        self.pre_execution = pre_execution
+        self.workers = workers
+        self.max_attempts = max_attempts
+        # created in start() so the slots belong to the serving event loop
+        self._slots: Optional[PrioritySemaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        # action_id -> job_id of its queued or running job
+        self._active: Dict[str, str] = {}
+        self.busy = 0
+        self.retried = 0
+        self.deduplicated = 0
+        self.deferred = 0
+        self.skipped = 0
+        # recent enqueue to start waits in ms
+        self.queue_waits: Deque[float] = deque(maxlen=1024)
+
+    def enqueue(self, action_id: str) -> ExecutionJob:
+        """Persist an execution job for an approved action, an active job is reused"""
+        job_id = self._active.get(action_id)
+        if job_id is not None:
+            return self.store.execution_jobs[job_id]
+
+        approval_request = self.store.actions.get(action_id, {}).get("approval_request") or {}
+        job = ExecutionJob(
+            job_id=f"job_{uuid.uuid4().hex[:12]}",
+            action_id=action_id,
+            priority=approval_request.get("priority", "normal"),
+            max_attempts=self.max_attempts,
+            enqueued_at=datetime.utcnow().isoformat()
+        )
+        self.store.store_execution_job(job)
+        self._active[action_id] = job.job_id
+        if self._slots is not None:
+            self._dispatch(job.job_id)
+        return job
+
+    def recover(self) -> int:
+        """Requeue jobs left queued or running by a previous process"""
+        pending = sorted(
+            (job for job in self.store.execution_jobs.values() if job.status in ACTIVE_STATUSES),
+            key=lambda job: job.enqueued_at
+        )
+        self._active.clear()
+        for job in pending:
+            if job.status == "running":
+                job.status = "queued"
+                job.interrupted = True
+                self.store.store_execution_job(job)
+            self._active[job.action_id] = job.job_id
+            self._dispatch(job.job_id)
+        return len(pending)
+
+    async def start(self) -> int:
+        """Open the worker slots, returns the number of recovered jobs"""
+        self._slots = PrioritySemaphore(self.workers)
+        return self.recover()
+
+    async def stop(self):
+        """Stop all jobs, unfinished jobs stay persisted for the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._slots = None
+
+    def _dispatch(self, job_id: str, delay: float = 0):
+        task = asyncio.create_task(self._run(job_id, delay))
+        # keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job_id: str, delay: float = 0):
+        if delay > 0:
+            await asyncio.sleep(delay)
+        job = self.store.execution_jobs.get(job_id)
+        if job is None or job.status != "queued":
+            return
+        action = self.store.actions.get(job.action_id, {})
+        rank = PRIORITY_RANK.get(job.priority, PRIORITY_RANK["normal"])
+        # every delivery is a trace of its own among the action's recent traces
+        with tracer.trace("execution_job", job_id=job_id, priority=job.priority):
+            tracer.bind(job.action_id)
+            try:
+                if not await self._pre_execution(job):
+                    return
+                try:
+                    async with self.bulkhead.admit(action, job.priority) as wait_ms:
+                        job.bulkhead_wait_ms = round(wait_ms, 3)
+                        tracer.annotate(bulkhead_wait_ms=job.bulkhead_wait_ms)
+                        with tracer.span("worker_slot_wait"):
+                            await self._slots.acquire(rank)
+                        self.busy += 1
+                        try:
+                            await self._process(job_id)
+                        finally:
+                            self.busy -= 1
+                            self._slots.release()
+                finally:
+                    self.pre_execution.release(job.action_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # e.g. a failing pre-execution check or bulkhead, the job must
+                # not stay active or the action could never be queued again
+                print(f"Error processing execution job {job_id}: {e}")
+                self._fail(job, f"{type(e).__name__}: {e}")
+
+    def _fail(self, job: ExecutionJob, error: str):
+        """Finish a job as failed and free its action for a new job"""
+        job.status = "failed"
+        job.error = error
+        job.finished_at = datetime.utcnow().isoformat()
+        if self._active.get(job.action_id) == job.job_id:
+            del self._active[job.action_id]
+        self.store.store_execution_job(job)
+        self.store.audit_log(job.action_id, "execution_error", {
+            "job_id": job.job_id,
+            "attempts": job.attempts,
+            "error": job.error
+        })
+
+    @staticmethod
+    def idempotency_key(job: ExecutionJob) -> str:
+        """Key of the job's current attempt, a new job of the same action never reuses it"""
+        return f"{job.job_id}:{job.attempts}"
+
+    @tracer.staged("pre_execution")
+    async def _pre_execution(self, job: ExecutionJob) -> bool:
+        """Run the pre-execution checks, returns whether the job may be dispatched"""
+        result = await self.pre_execution.check(job.action_id)
+        job.pre_execution = result.decision
+        if result.decision == "proceed":
+            return True
+
+        if result.decision == "defer":
+            job.deferrals += 1
+            self.deferred += 1
+            self.store.store_execution_job(job)
+            self._dispatch(job.job_id, delay=result.retry_after_seconds or 0)
+            return False
+
+        # the target recovered on its own or the approval no longer holds
+        job.status = "completed" if result.decision == "skip" else "failed"
+        job.execution_status = "skipped" if result.decision == "skip" else None
+        job.error = None if result.decision == "skip" else f"Blocked by pre-execution checks: {result.reason}"
+        job.finished_at = datetime.utcnow().isoformat()
+        self.store.store_execution_job(job)
+        self._active.pop(job.action_id, None)
+        if result.decision == "skip":
+            self.skipped += 1
+            # nothing will run, the action does not stay approved forever
+            self.store.update_action_status(job.action_id, ActionStatus.SKIPPED)
+        self.store.audit_log(job.action_id, f"execution_{'skipped' if result.decision == 'skip' else 'blocked'}", {
+            "job_id": job.job_id,
+            "reason": result.reason
+        })
+        return False
+
+    async def _process(self, job_id: str):
+        job = self.store.execution_jobs.get(job_id)
+        if job is None or job.status != "queued":
+            return
+
+        # a redelivered job of an action that already ran successfully must not restart it again
+        previous = self.store.executions.get(job.action_id)
+        if previous is not None and previous.status == "success":
+            verification = self.store.verifications.get(job.action_id)
+            job.status = "completed"
+            job.execution_status = previous.status
+            job.verification_status = verification.overall_status if verification else None
+            job.finished_at = datetime.utcnow().isoformat()
+            self.store.store_execution_job(job)
+            self._active.pop(job.action_id, None)
+            self.deduplicated += 1
+            self.store.audit_log(job.action_id, "execution_deduplicated", {
+                "job_id": job.job_id,
+                "idempotency_key": previous.idempotency_key
+            })
+            return
+
+        job.status = "running"
+        if job.interrupted:
+            job.interrupted = False
+        else:
+            job.attempts += 1
+        job.started_at = datetime.utcnow().isoformat()
+        job.queue_wait_ms = round(
+            (datetime.fromisoformat(job.started_at) - datetime.fromisoformat(job.enqueued_at)).total_seconds() * 1000, 3
+        )
+        self.queue_waits.append(job.queue_wait_ms)
+        QUEUE_WAIT_SECONDS.observe(job.queue_wait_ms / 1000)
+        self.store.store_execution_job(job)
+
+        try:
+            execution, verification = await self.pipeline.run(
+                job.action_id,
+                attempt=job.attempts,
+                idempotency_key=self.idempotency_key(job)
+            )
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            if job.attempts < job.max_attempts:
+                self.retried += 1
+                job.status = "queued"
+                self.store.store_execution_job(job)
+                self._dispatch(job.job_id)
+                return
+            print(f"Error executing {job.action_id}: {e}")
+            self._fail(job, job.error)
+            return
+
+        job.status = "completed"
+        job.error = None
+        job.execution_status = execution.status
+        job.verification_status = verification.overall_status
+        job.finished_at = datetime.utcnow().isoformat()
+        self.store.store_execution_job(job)
+        self._active.pop(job.action_id, None)
+
+    def stats(self) -> Dict:
+        waits = sorted(self.queue_waits)
+        return {
+            "workers": self.workers,
+            "busy_workers": self.busy,
+            "queue_depth": len(self._active) - self.busy,
+            "active_jobs": len(self._active),
+            "queue_wait_ms": {
+                "mean": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p95": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))], 3) if waits else 0.0,
+                "max": round(waits[-1], 3) if waits else 0.0
+            },
+            "retried": self.retried,
+            "deduplicated": self.deduplicated,
+            "deferred": self.deferred,
+            "skipped_recovered": self.skipped,
+            "pre_execution": self.pre_execution.stats(),
+            "jobs": dict(Counter(job.status for job in self.store.execution_jobs.values()))
+        }
+
+
+EXECUTION_WORKERS = int(os.getenv("EXECUTION_WORKERS", "4"))
+EXECUTION_MAX_ATTEMPTS = int(os.getenv("EXECUTION_MAX_ATTEMPTS", "3"))
+
+execution_queue = ExecutionQueue(
+    store,
+    execution_pipeline,
+    bulkhead,
+    pre_execution_verifier,
+    workers=EXECUTION_WORKERS,
+    max_attempts=EXECUTION_MAX_ATTEMPTS
+)
+
+metrics.gauge(
+    "atp_execution_queue_depth", "Execution jobs waiting for a worker",
+    callback=lambda: len(execution_queue._active) - execution_queue.busy
+)
+metrics.gauge(
+    "atp_execution_workers_busy", "Execution workers running a job",
+    callback=lambda: execution_queue.busy
+)
+metrics.counter(
+    "atp_execution_jobs_total", "Execution jobs retried, deduplicated or deferred by the pre-execution checks", ("event",),
+    lambda: {
+        ("retried",): execution_queue.retried,
+        ("deduplicated",): execution_queue.deduplicated,
+        ("deferred",): execution_queue.deferred
+    }
+)
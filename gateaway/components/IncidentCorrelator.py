@@ -0,0 +1,249 @@
+import asyncio
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+from models import ActionDeclaration, Incident, RiskAssessment
+from components.ATPStore import store, ATPStore
+from components.OpenAIRiskAssestor import risk_assessor, OpenAIRiskAssessor
+from components.Metrics import metrics
+
+
+class IncidentCorrelator:
+    """
+    Groups declarations caused by the same failure into one incident.
+    A declaration joins an open incident of its namespace that saw a member
+    within the sliding window when it runs the same operation on the same
+    target system and shares a dependency hint in context.related_entities;
+    declarations without hints are never correlated. Only the lead
+    declaration of an incident is assessed by the LLM, members reuse its
+    assessment unless their own rule based score is higher, and approval or
+    execution can be fanned out to all members.
+    Open incidents are indexed by their dependency hints, an incident is
+    stored once a second member joins it and closed when the window passes
+    without a new member.
+    """
+
+    def __init__(self, store: ATPStore, risk_assessor: OpenAIRiskAssessor, window_seconds: float = 120):
+        self.store = store
+        self.risk_assessor = risk_assessor
+        self.window_seconds = window_seconds
+        # incident_id -> assessment of its lead, awaited by members arriving meanwhile
+        self._assessments: Dict[str, asyncio.Future] = {}
+        # open incidents within the window, least recently updated first
+        self._open: "OrderedDict[str, Incident]" = OrderedDict()
+        # (namespace, system, operation, related entity) -> ids of open incidents
+        self._by_entity: Dict[Tuple, Set[str]] = {}
+        self.correlated = 0
+        self.assessments_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    @staticmethod
+    def _entity_keys(incident: Incident, entities) -> Tuple:
+        return tuple((incident.namespace, incident.system, incident.operation, entity) for entity in entities)
+
+    def _index(self, incident: Incident, entities):
+        for key in self._entity_keys(incident, entities):
+            self._by_entity.setdefault(key, set()).add(incident.incident_id)
+
+    def _unindex(self, incident: Incident):
+        self._open.pop(incident.incident_id, None)
+        for key in self._entity_keys(incident, incident.related_entities):
+            incident_ids = self._by_entity.get(key)
+            if incident_ids is not None:
+                incident_ids.discard(incident.incident_id)
+                if not incident_ids:
+                    del self._by_entity[key]
+
+    def _stored(self, incident: Incident) -> bool:
+        return incident.incident_id in self.store.incidents
+
+    def _expire(self, horizon: str):
+        """Close the incidents no member joined within the window"""
+        while self._open:
+            incident = next(iter(self._open.values()))
+            if incident.updated_at >= horizon:
+                break
+            self._unindex(incident)
+            if self._stored(incident) and incident.status == "open":
+                incident.status = "closed"
+                self.store.store_incident(incident)
+
+    def rebuild(self) -> int:
+        """Index the stored open incidents still within the window, close the others"""
+        self._open.clear()
+        self._by_entity.clear()
+        for incident in sorted(self.store.incidents.values(), key=lambda incident: incident.updated_at):
+            if incident.status == "open":
+                self._open[incident.incident_id] = incident
+                self._index(incident, incident.related_entities)
+        self._expire((datetime.utcnow() - timedelta(seconds=self.window_seconds)).isoformat())
+        return len(self._open)
+
+    def correlate(self, action: ActionDeclaration) -> Tuple[Optional[Incident], bool]:
+        """Attach an action to an incident, returns the incident and whether the action leads it"""
+        if not self.enabled:
+            return None, True
+
+        now = datetime.utcnow()
+        namespace = action.context.get("namespace")
+        entities = set(action.context.get("related_entities") or [])
+        if not entities:
+            # nothing ties the declaration to another failure
+            return None, True
+        self._expire((now - timedelta(seconds=self.window_seconds)).isoformat())
+
+        candidates = {
+            incident_id
+            for entity in entities
+            for incident_id in self._by_entity.get((namespace, action.target.system, action.target.operation, entity), ())
+        }
+        if candidates:
+            incident = max((self._open[incident_id] for incident_id in candidates), key=lambda incident: incident.updated_at)
+            incident.member_action_ids.append(action.action_id)
+            self._index(incident, entities - set(incident.related_entities))
+            incident.related_entities = sorted(set(incident.related_entities) | entities)
+            incident.updated_at = now.isoformat()
+            self._open.move_to_end(incident.incident_id)
+            self.store.store_incident(incident)
+            self.correlated += 1
+            return incident, False
+
+        # stored once a second member joins, most never see one
+        incident = Incident(
+            incident_id=f"inc_{uuid.uuid4().hex[:8]}",
+            namespace=namespace,
+            system=action.target.system,
+            operation=action.target.operation,
+            created_at=now.isoformat(),
+            updated_at=now.isoformat(),
+            lead_action_id=action.action_id,
+            member_action_ids=[action.action_id],
+            related_entities=sorted(entities)
+        )
+        self._open[incident.incident_id] = incident
+        self._index(incident, entities)
+        return incident, True
+
+    async def assess(
+            self,
+            incident: Optional[Incident],
+            leads: bool,
+            action: ActionDeclaration,
+            llm: bool = True
+        ) -> RiskAssessment:
+        """
+        Assess the lead with the LLM. Members reuse the lead's assessment, or
+        their own rule based one when it scores higher, e.g. a customer facing
+        service correlated with an internal one.
+        """
+        if incident is None:
+            return await self.risk_assessor.assess_risk(action, llm)
+
+        if leads:
+            future = asyncio.get_running_loop().create_future()
+            self._assessments[incident.incident_id] = future
+            try:
+                risk = await self.risk_assessor.assess_risk(action, llm)
+            except Exception as e:
+                future.set_exception(e)
+                # nobody may be waiting, retrieve it so asyncio does not warn
+                future.exception()
+                raise
+            except BaseException:
+                # the lead was cancelled, its members assess themselves
+                future.cancel()
+                raise
+            finally:
+                self._assessments.pop(incident.incident_id, None)
+            incident.risk_assessment = risk.dict()
+            if self._stored(incident):
+                self.store.store_incident(incident)
+            future.set_result(risk)
+            return risk
+
+        lead_risk = None
+        if incident.risk_assessment is not None:
+            lead_risk = RiskAssessment(**incident.risk_assessment)
+        elif incident.incident_id in self._assessments:
+            lead = self._assessments[incident.incident_id]
+            try:
+                lead_risk = await asyncio.shield(lead)
+            except asyncio.CancelledError:
+                if not lead.cancelled():
+                    # the member itself was cancelled
+                    raise
+                lead_risk = None
+            except Exception:
+                lead_risk = None
+        if lead_risk is None or (incident.system, incident.operation) != (action.target.system, action.target.operation):
+            # the lead failed, or the incident predates target matching
+            return await self.risk_assessor.assess_risk(action, llm)
+
+        # the service, its learned failure rate and the hour are the member's own
+        own_risk = await self.risk_assessor.assess_risk(action, llm=False)
+        if own_risk.risk_score > lead_risk.risk_score:
+            return own_risk.model_copy(update={
+                "similar_actions": {
+                    **own_risk.similar_actions,
+                    "incident": {"incident_id": incident.incident_id, "lead_action_id": incident.lead_action_id}
+                }
+            })
+
+        self.assessments_saved += 1
+        return lead_risk.model_copy(update={
+            "action_id": action.action_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            "similar_actions": {
+                **lead_risk.similar_actions,
+                "incident": {"incident_id": incident.incident_id, "lead_action_id": incident.lead_action_id}
+            }
+        })
+
+    async def explain(self, incident: Optional[Incident], leads: bool, risk: RiskAssessment, llm: bool = True) -> str:
+        """Explain the lead with the LLM, members get the incident's explanation"""
+        if incident is None or leads:
+            explanation = await self.risk_assessor.explain_risk(risk, llm)
+            if incident is not None:
+                incident.explanation = explanation
+                if self._stored(incident):
+                    self.store.store_incident(incident)
+            return explanation
+        prefix = f"Correlated into incident {incident.incident_id} led by {incident.lead_action_id}"
+        return f"{prefix}: {incident.explanation}" if incident.explanation else prefix
+
+    def set_status(self, incident: Incident, status: str):
+        if status != "open":
+            # later declarations start a new incident
+            self._unindex(incident)
+        incident.status = status
+        incident.updated_at = datetime.utcnow().isoformat()
+        self.store.store_incident(incident)
+
+    def stats(self) -> Dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "open_incidents": len(self._open),
+            "incidents": len(self.store.incidents),
+            "correlated_declarations": self.correlated,
+            "llm_assessments_saved": self.assessments_saved
+        }
+
+
+INCIDENT_WINDOW_SECONDS = float(os.getenv("INCIDENT_WINDOW_SECONDS", "120"))
+
+incident_correlator = IncidentCorrelator(store, risk_assessor, window_seconds=INCIDENT_WINDOW_SECONDS)
+
+metrics.counter(
+    "atp_incident_correlated_total", "Declarations correlated into an existing incident",
+    callback=lambda: incident_correlator.correlated
+)
+metrics.counter(
+    "atp_incident_assessments_saved_total", "Risk assessments served from the incident instead of the LLM",
+    callback=lambda: incident_correlator.assessments_saved
+)
@@ -0,0 +1,141 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from models import ActionDeclaration
+from components.ATPStore import store, ATPStore
+
+
+def hour_of_week(timestamp: str) -> int:
+    """Hour of the week (0 = Monday 00:00 UTC) of an ISO timestamp"""
+    moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    return moment.weekday() * 24 + moment.hour
+
+
+class RiskPriorLearner:
+    """
+    Layer 8 - Learning & Feedback.
+    Incrementally folds verification outcomes from the action history into
+    success/failure priors per (system, operation, namespace, service, hour_of_week).
+    Only history rows newer than the job watermark are processed on each run.
+    """
+
+    JOB_NAME = "risk_priors"
+
+    def __init__(self, store: ATPStore, interval_seconds: float = 300, batch_size: int = 5000):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        # hour agnostic rollup: (system, operation, namespace, service) -> [successes, failures]
+        self.rollup: Dict[Tuple, List[int]] = {}
+        self.rebuild()
+        self.last_run: Dict = {}
+
+    def rebuild(self) -> int:
+        """Recompute the rollup from the stored priors, once the store is open"""
+        self.rollup = {}
+        for key, (successes, failures) in self.store.risk_priors.items():
+            self._add_to_rollup(key, successes, failures)
+        return len(self.rollup)
+
+    def _add_to_rollup(self, key: Tuple, successes: int, failures: int):
+        counts = self.rollup.setdefault(key[:4], [0, 0])
+        counts[0] += successes
+        counts[1] += failures
+
+    @staticmethod
+    def _key(action: Dict) -> Tuple:
+        target = action.get("target", {})
+        context = action.get("context", {})
+        return (
+            target.get("system", "unknown"),
+            target.get("operation", "unknown"),
+            context.get("namespace") or "unknown",
+            context.get("service") or "unknown",
+            hour_of_week(action["timestamp"])
+        )
+
+    async def run_once(self) -> Dict:
+        """Fold every history entry newer than the watermark into the priors"""
+        started = datetime.utcnow()
+        watermark = self.store.get_watermark(self.JOB_NAME)
+        processed = 0
+
+        while True:
+            rows = self.store.get_history_since(watermark, limit=self.batch_size)
+            if not rows:
+                break
+
+            deltas: Dict[Tuple, List[int]] = {}
+            for position, entry in rows:
+                action = entry.get("action")
+                verification = entry.get("verification")
+                if not action or not verification:
+                    continue
+                counts = deltas.setdefault(self._key(action), [0, 0])
+                if verification.get("overall_status") == "verified":
+                    counts[0] += 1
+                else:
+                    counts[1] += 1
+
+            watermark = rows[-1][0]
+            self.store.merge_risk_priors(self.JOB_NAME, deltas, watermark)
+            for key, (successes, failures) in deltas.items():
+                self._add_to_rollup(key, successes, failures)
+            processed += len(rows)
+
+            # yield to the event loop between batches
+            await asyncio.sleep(0)
+
+        self.last_run = {
+            "started_at": started.isoformat(),
+            "completed_at": datetime.utcnow().isoformat(),
+            "processed": processed,
+            "watermark": watermark,
+            "priors": len(self.store.risk_priors)
+        }
+        return self.last_run
+
+    async def run_forever(self):
+        """Run the learning job on a fixed interval"""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Error in risk prior learning job: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def get_prior(self, action: ActionDeclaration) -> Dict:
+        """
+        Learned outcome counts for an action, both for its exact hour of the
+        week and across all hours, with a Laplace smoothed failure rate.
+        """
+        key = (
+            action.target.system,
+            action.target.operation,
+            action.context.get("namespace") or "unknown",
+            action.context.get("service") or "unknown",
+            hour_of_week(action.timestamp)
+        )
+        slot = self.store.risk_priors.get(key, [0, 0])
+        overall = self.rollup.get(key[:4], [0, 0])
+
+        def summarize(counts: List[int]) -> Dict:
+            successes, failures = counts
+            return {
+                "successes": successes,
+                "failures": failures,
+                "failure_rate": (failures + 1) / (successes + failures + 2)
+            }
+
+        return {
+            "hour_of_week": key[4],
+            "same_hour": summarize(slot),
+            "all_hours": summarize(overall)
+        }
+
+
+LEARNING_INTERVAL_SECONDS = float(os.getenv("LEARNING_INTERVAL_SECONDS", "300"))
+
+risk_prior_learner = RiskPriorLearner(store, interval_seconds=LEARNING_INTERVAL_SECONDS)
@@ -0,0 +1,235 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# latency buckets in seconds, from a cached store write up to an LLM call timing out
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, Labels, str, float]]:
+        """(sample name suffix, label values, extra label, value)"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, extra, value in self.samples():
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(self.labelnames, labels, extra)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(Metric):
+    """
+    Monotonic count per label values.
+    Without a callback it is incremented by the gateway, with one the values
+    are read at scrape time from counters a component already keeps.
+    """
+    kind = "counter"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Labels = (),
+            callback: Optional[Callable[[], Union[float, Dict[Labels, float]]]] = None
+        ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        values = self.values
+        values[labels] = values.get(labels, 0) + amount
+
+    def samples(self):
+        values = self.values
+        if self.callback is not None:
+            values = self.callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+        for labels, value in values.items():
+            yield "", labels, "", value
+
+
+class Gauge(Counter):
+    """Current value per label values, usually read at scrape time from a callback"""
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Distribution over fixed buckets per label values.
+    Every series is a plain list of per bucket counts plus the sum, an
+    observation is one bisect and two increments, cumulated at scrape time.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> counts of every bucket, then +Inf, then the sum
+        self.series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        # buckets are upper bounds, inclusive
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                yield "_bucket", labels, f'le="{_format_value(bound)}"', cumulative
+            yield "_sum", labels, "", series[-1]
+            yield "_count", labels, "", cumulative
+
+
+class MetricsRegistry:
+    """
+    In-process metrics of the gateway, rendered in the Prometheus text format.
+    Metrics are updated without locks: the gateway records them from the
+    event loop thread and single dict and list updates are atomic under the
+    GIL, so the hot path pays a dict lookup and an addition per sample.
+    Registering a name twice returns the metric registered first.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Labels = (), callback: Optional[Callable] = None) -> Counter:
+        return self._register(Counter(name, documentation, labelnames, callback))
+
+    def gauge(self, name: str, documentation: str, labelnames: Labels = (), callback: Optional[Callable] = None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Labels = (),
+            buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+        ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # a failing callback must not take the other metrics down
+                lines.append(f"# {metric.name} unavailable: {type(e).__name__}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests by method, route and status code and
+    observing the time until the response started, which for the streaming
+    endpoints (events, bulk declare) is the time to the first byte.
+    Requests are labelled with the route template, e.g.
+    /atp/v1/actions/{action_id}/audit-trail, unmatched paths as "unmatched",
+    so the number of series stays bounded.
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry"):
+        self.app = app
+        self.requests = registry.counter(
+            "atp_http_requests_total", "HTTP requests by method, route and status code",
+            ("method", "route", "status")
+        )
+        self.latency = registry.histogram(
+            "atp_http_request_duration_seconds", "Time until the response started, by method and route",
+            ("method", "route")
+        )
+        # endpoint function -> route template, filled on first use
+        self._routes: Optional[Dict[Callable, str]] = None
+
+    def _route(self, scope) -> str:
+        if self._routes is None:
+            self._routes = {
+                route.endpoint: route.path
+                for route in getattr(scope.get("app"), "routes", ())
+                if hasattr(route, "endpoint")
+            }
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                self._record(scope, status, started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if status is None:
+                self._record(scope, 500, started)
+            raise
+
+    def _record(self, scope, status: int, started: float):
+        route = self._route(scope)
+        self.requests.inc(scope["method"], route, str(status))
+        self.latency.observe(time.perf_counter() - started, scope["method"], route)
+
+
+metrics = MetricsRegistry()
+
+# shared by every component, one series per stage of the declare and execute pipelines
+STAGE_SECONDS = metrics.histogram(
+    "atp_stage_duration_seconds", "Duration of a declare or execute pipeline stage", ("stage",)
+)
@@ -1,16 +1,43 @@
 
-from ast import Dict
 from models import RiskAssessment
 
 import os
 import httpx
 import json
 from datetime import datetime
+from typing import Dict, Optional
 from models import (
     ActionDeclaration, 
-    RiskFactor
+    RiskFactor,
+    RiskWeights
 )
 from components.ATPStore import store
+from components.LearningEngine import risk_prior_learner
+from components.Metrics import metrics
+from components.Tracing import tracer
+
+LLM_REQUESTS = metrics.counter(
+    "atp_llm_requests_total", "OpenAI requests by call (assess, explain) and outcome", ("call", "outcome")
+)
+RISK_ASSESSMENTS = metrics.counter(
+    "atp_risk_assessments_total", "Risk assessments by source, the LLM or the rule-based fallback", ("source",)
+)
+LLM_TOKENS = metrics.counter(
+    "atp_llm_tokens_total", "OpenAI tokens used by call (assess, explain) and kind (prompt, completion)", ("call", "kind")
+)
+
+
+def _token_usage(call: str, result: Dict) -> Dict[str, int]:
+    """Token usage of a chat completion, counted in the metrics and set on its span"""
+    reported = result.get("usage") or {}
+    usage = {
+        f"{kind}_tokens": reported.get(f"{kind}_tokens")
+        for kind in ("prompt", "completion", "total")
+    }
+    for kind in ("prompt", "completion"):
+        if usage[f"{kind}_tokens"]:
+            LLM_TOKENS.inc(call, kind, amount=usage[f"{kind}_tokens"])
+    return {key: value for key, value in usage.items() if value is not None}
 
 class OpenAIRiskAssessor:
     """
@@ -18,15 +45,49 @@ class OpenAIRiskAssessor:
     to decide whether an automation action should be auto-approved, sent for human review, or rejected outright.   
     """
     
-    def __init__(self, api_key: str):
+    def __init__(
+            self,
+            api_key: str,
+            weights: Optional[RiskWeights] = None,
+            api_url: str = "https://api.openai.com/v1/chat/completions"
+        ):
         self.api_key = api_key
-        self.api_url = "https://api.openai.com/v1/chat/completions"
+        self.api_url = api_url
+        # weights used by the rule-based fallback scorer
+        self.weights = weights or RiskWeights()
+        # one connection pool for all assessments, creating a client per call costs more than the call
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient()
+        return self._http
+
+    async def start(self):
+        """Open the connection pool ahead of the first assessment"""
+        self._client()
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
-    async def assess_risk(self, action: ActionDeclaration) -> RiskAssessment:
-        """Use OpenAI to calculate risk score with nuanced understanding"""
+    async def assess_risk(self, action: ActionDeclaration, llm: bool = True) -> RiskAssessment:
+        """
+        Use OpenAI to calculate risk score with nuanced understanding.
+        llm=False goes straight to the rule based fallback, for declarations
+        admission control deferred.
+        """
         
         # Get historical context
-        similar = store.get_similar_actions(action)
+        with tracer.stage("similar_actions") as span:
+            similar = store.get_similar_actions(action)
+            # Learned priors from verified outcomes (Layer 8)
+            prior = risk_prior_learner.get_prior(action)
+            similar["learned_prior"] = prior
+            span.set(count=similar["count"])
+        if not llm:
+            return await self._fallback_assessment(action, similar)
         
         # Prepare prompt for GPT-4
         prompt = f"""You are a DevOps risk assessment expert. Analyze this automation action and provide a detailed risk assessment.
@@ -46,6 +107,8 @@ HISTORICAL CONTEXT:
 - Similar actions in past 30 days: {similar['count']}
 - Historical success rate: {similar['success_rate']:.1%}
 - Average completion time: {similar['avg_completion_time']}
+- Learned outcomes for this service at this hour of week: {prior['same_hour']['successes']} succeeded, {prior['same_hour']['failures']} failed
+- Learned outcomes for this service at any hour: {prior['all_hours']['successes']} succeeded, {prior['all_hours']['failures']} failed (smoothed failure rate {prior['all_hours']['failure_rate']:.1%})
 
 TASK:
 Analyze the risk of automatically executing this remediation action. Consider:
@@ -82,7 +145,8 @@ IMPORTANT:
 
         try:
             # Call OpenAI API
-            async with httpx.AsyncClient() as client:
+            client = self._client()
+            with tracer.stage("llm_assess", model="gpt-4o") as span:
                 response = await client.post(
                     self.api_url,
                     headers={
@@ -107,49 +171,59 @@ IMPORTANT:
                     timeout=30.0
                 )
                 
-                if response.status_code != 200:
-                    print(f"OpenAI API error: {response.status_code} - {response.text}")
-                    # Fallback to rule-based assessment
-                    return await self._fallback_assessment(action, similar)
+            span.set(status_code=response.status_code)
+            if response.status_code != 200:
+                print(f"OpenAI API error: {response.status_code} - {response.text}")
+                LLM_REQUESTS.inc("assess", "http_error")
+                # Fallback to rule-based assessment
+                return await self._fallback_assessment(action, similar)
                 
-                result = response.json()
-                content = result['choices'][0]['message']['content']
+            result = response.json()
+            span.set(**_token_usage("assess", result))
+            content = result['choices'][0]['message']['content']
                 
-                # Parse JSON response
-                # Remove markdown code blocks if present
+            # Parse JSON response
+            # Remove markdown code blocks if present
+            content = content.strip()
+            if content.startswith('```'):
+                content = content.split('```')[1]
+                if content.startswith('json'):
+                    content = content[4:]
                 content = content.strip()
-                if content.startswith('```'):
-                    content = content.split('```')[1]
-                    if content.startswith('json'):
-                        content = content[4:]
-                    content = content.strip()
                 
-                risk_data = json.loads(content)
+            risk_data = json.loads(content)
                 
-                # Validate and construct RiskAssessment
-                return RiskAssessment(
-                    action_id=action.action_id,
-                    timestamp=datetime.utcnow().isoformat(),
-                    risk_score=float(risk_data['risk_score']),
-                    risk_level=risk_data['risk_level'],
-                    risk_factors=[
-                        RiskFactor(**factor) for factor in risk_data['risk_factors']
-                    ],
-                    similar_actions=similar,
-                    recommendation=risk_data['recommendation'],
-                    confidence=float(risk_data['confidence'])
-                )
+            # Validate and construct RiskAssessment
+            assessment = RiskAssessment(
+                action_id=action.action_id,
+                timestamp=datetime.utcnow().isoformat(),
+                risk_score=float(risk_data['risk_score']),
+                risk_level=risk_data['risk_level'],
+                risk_factors=[
+                    RiskFactor(**factor) for factor in risk_data['risk_factors']
+                ],
+                similar_actions=similar,
+                recommendation=risk_data['recommendation'],
+                confidence=float(risk_data['confidence'])
+            )
+            LLM_REQUESTS.inc("assess", "ok")
+            RISK_ASSESSMENTS.inc("llm")
+            return assessment
                 
         except Exception as e:
             print(f"Error in OpenAI risk assessment: {e}")
+            LLM_REQUESTS.inc("assess", "error")
             # Fallback to rule-based assessment
             return await self._fallback_assessment(action, similar)
     
+    @tracer.staged("fallback_assess")
     async def _fallback_assessment(self, action: ActionDeclaration, similar: Dict) -> RiskAssessment:
         """Fallback rule-based assessment if OpenAI fails"""
         
+        RISK_ASSESSMENTS.inc("fallback")
         factors = []
         total_risk = 0.0
+        weights = self.weights
         
         # Factor 1: Environment
         env = action.context.get("namespace", "unknown")
@@ -157,75 +231,91 @@ IMPORTANT:
             factors.append(RiskFactor(
                 factor="production_environment",
                 severity="high",
-                weight=0.4,
+                weight=weights.production_weight,
                 details="Action affects production environment"
             ))
-            total_risk += 0.4
+            total_risk += weights.production_weight
         elif env == "staging":
             factors.append(RiskFactor(
                 factor="staging_environment",
                 severity="low",
-                weight=0.1,
+                weight=weights.staging_weight,
                 details="Action affects staging environment"
             ))
-            total_risk += 0.1
+            total_risk += weights.staging_weight
         
         # Factor 2: Service Criticality
         service = action.context.get("service", "unknown")
-        if "api" in service or "gateway" in service:
+        if any(marker in service for marker in weights.customer_facing_markers):
             factors.append(RiskFactor(
                 factor="customer_facing_service",
                 severity="high",
-                weight=0.3,
+                weight=weights.customer_facing_weight,
                 details="Service directly impacts customers"
             ))
-            total_risk += 0.3
+            total_risk += weights.customer_facing_weight
         else:
             factors.append(RiskFactor(
                 factor="internal_service",
                 severity="low",
-                weight=0.1,
+                weight=weights.internal_service_weight,
                 details="Internal service with limited user impact"
             ))
-            total_risk += 0.1
+            total_risk += weights.internal_service_weight
         
         # Factor 3: Time of day
         hour = datetime.utcnow().hour
-        if 9 <= hour <= 17:  # Business hours
+        if weights.business_hours_start <= hour <= weights.business_hours_end:  # Business hours
             factors.append(RiskFactor(
                 factor="business_hours",
                 severity="medium",
-                weight=0.15,
+                weight=weights.business_hours_weight,
                 details="Action during peak business hours"
             ))
-            total_risk += 0.15
+            total_risk += weights.business_hours_weight
         else:
             factors.append(RiskFactor(
                 factor="off_hours",
                 severity="low",
-                weight=0.05,
+                weight=weights.off_hours_weight,
                 details="Action during low-traffic period"
             ))
-            total_risk += 0.05
+            total_risk += weights.off_hours_weight
+        
+        # Factor 4: Learned failure rate from verified outcomes
+        prior = similar.get("learned_prior")
+        if prior:
+            observed = prior["all_hours"]["successes"] + prior["all_hours"]["failures"]
+            if observed >= weights.learned_min_samples:
+                failure_rate = prior["all_hours"]["failure_rate"]
+                factors.append(RiskFactor(
+                    factor="learned_failure_rate",
+                    severity="high" if failure_rate >= 0.5 else "medium" if failure_rate >= 0.2 else "low",
+                    weight=weights.learned_failure_weight * failure_rate,
+                    details=f"{prior['all_hours']['failures']} of {observed} past executions failed verification"
+                ))
+                total_risk += weights.learned_failure_weight * failure_rate
+        
+        total_risk = min(total_risk, 1.0)
         
         # Determine risk level
-        if total_risk >= 0.7:
+        if total_risk >= weights.high_threshold:
             risk_level = "high"
-        elif total_risk >= 0.3:
+        elif total_risk >= weights.medium_threshold:
             risk_level = "medium"
         else:
             risk_level = "low"
         
         # Determine recommendation
-        if risk_level == "high" or total_risk > 0.6:
+        if risk_level == "high" or total_risk > weights.review_threshold:
             recommendation = "human_review"
-        elif risk_level == "low" and total_risk < 0.3:
+        elif risk_level == "low" and total_risk < weights.medium_threshold:
             recommendation = "auto_approve"
         else:
             recommendation = "human_review"
         
         # If we have high success rate history, lower the requirement
-        if similar["success_rate"] > 0.95 and similar["count"] > 10:
+        if similar["success_rate"] > weights.history_success_rate and similar["count"] > weights.history_min_count:
             if recommendation == "human_review" and risk_level == "medium":
                 recommendation = "auto_approve"
         
@@ -240,8 +330,10 @@ IMPORTANT:
             confidence=0.75  # Lower confidence for fallback
         )
     
-    async def explain_risk(self, assessment: RiskAssessment) -> str:
+    async def explain_risk(self, assessment: RiskAssessment, llm: bool = True) -> str:
         """Generate natural language explanation using OpenAI"""
+        if not llm:
+            return self._fallback_explanation(assessment)
         
         prompt = f"""Explain this risk assessment in clear, concise language for a DevOps engineer:
 
@@ -265,7 +357,8 @@ Provide a 2-3 paragraph explanation that:
 Keep it professional and actionable."""
 
         try:
-            async with httpx.AsyncClient() as client:
+            client = self._client()
+            with tracer.stage("llm_explain", model="gpt-4o") as span:
                 response = await client.post(
                     self.api_url,
                     headers={
@@ -290,12 +383,17 @@ Keep it professional and actionable."""
                     timeout=30.0
                 )
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    return result['choices'][0]['message']['content']
+            span.set(status_code=response.status_code)
+            if response.status_code == 200:
+                result = response.json()
+                span.set(**_token_usage("explain", result))
+                LLM_REQUESTS.inc("explain", "ok")
+                return result['choices'][0]['message']['content']
+            LLM_REQUESTS.inc("explain", "http_error")
                 
         except Exception as e:
             print(f"Error generating explanation: {e}")
+            LLM_REQUESTS.inc("explain", "error")
         
         # Fallback explanation
         return self._fallback_explanation(assessment)
@@ -327,7 +425,8 @@ Keep it professional and actionable."""
 
 # Initialize risk assessor with OpenAI API key
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-if not OPENAI_API_KEY:
-    print("WARNING: OPENAI_API_KEY not set. Using fallback risk assessment.")
 
-risk_assessor = OpenAIRiskAssessor(OPENAI_API_KEY)
+# any OpenAI compatible chat completions endpoint, e.g. a local stub for benchmarks
+OPENAI_API_URL = os.getenv("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
+
+risk_assessor = OpenAIRiskAssessor(OPENAI_API_KEY, api_url=OPENAI_API_URL)
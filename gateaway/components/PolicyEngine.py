@@ -0,0 +1,338 @@
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models import ApprovalPolicy, PolicyDecision, PolicyRule
+
+# dimensions rules can be indexed on, in key order
+DIMENSIONS = ("namespace", "service", "system", "operation", "risk_level")
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+ALL_HOURS = (1 << 168) - 1
+
+# built-in policy, equivalent to the original hardcoded risk level chain
+DEFAULT_POLICY = {
+    "version": "builtin",
+    "default": {
+        "approval_type": "human_required",
+        "approvers": ["security_team"],
+        "deadline": "24h",
+        "priority": "high"
+    },
+    "rules": [
+        {
+            "name": "low_risk_auto_approve",
+            "match": {"risk_level": "low"},
+            "approval_type": "auto_approve",
+            "approvers": ["system"],
+            "deadline": "24h",
+            "priority": "low"
+        },
+        {
+            "name": "medium_risk_on_call",
+            "match": {"risk_level": "medium"},
+            "approval_type": "human_required",
+            "approvers": ["on_call_engineer"],
+            "deadline": "24h",
+            "escalate_after": "12h",
+            "escalation_approvers": ["cto_team"],
+            "priority": "low"
+        },
+        {
+            "name": "high_risk_cto",
+            "match": {"risk_level": "high"},
+            "approval_type": "human_required",
+            "approvers": ["cto_team"],
+            "deadline": "24h",
+            "escalate_after": "4h",
+            "escalation_approvers": ["security_team"],
+            "priority": "high"
+        }
+    ]
+}
+
+
+def parse_duration(value: str) -> int:
+    """Parse durations such as "90s", "30m", "4h", "1d" or "24 hours" into seconds"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(s|sec|seconds?|m|min|minutes?|h|hours?|d|days?)\s*", value)
+    if not match:
+        raise ValueError(f"Invalid duration: {value!r}")
+    amount, unit = float(match.group(1)), match.group(2)[0]
+    return int(amount * {"s": 1, "m": 60, "h": 3600, "d": 86400}[unit])
+
+
+def format_duration(seconds: int) -> str:
+    if seconds % 86400 == 0 and seconds >= 86400 * 2:
+        return f"{seconds // 86400} days"
+    if seconds % 3600 == 0:
+        hours = seconds // 3600
+        return f"{hours} hour" if hours == 1 else f"{hours} hours"
+    return f"{seconds // 60} minutes"
+
+
+class CompiledRule:
+    """A policy rule reduced to its index key and cheap residual checks"""
+
+    __slots__ = (
+        "order", "name", "decision", "deadline_seconds", "escalate_seconds",
+        "score_min", "score_max", "hours_mask"
+    )
+
+    def __init__(self, order: int, rule: PolicyRule):
+        self.order = order
+        self.name = rule.name
+        self.decision = PolicyDecision(**rule.dict(exclude={"name", "match"}))
+        self.deadline_seconds = parse_duration(rule.deadline)
+        self.escalate_seconds = parse_duration(rule.escalate_after) if rule.escalate_after else None
+        self.score_min = rule.match.risk_score_min if rule.match.risk_score_min is not None else float("-inf")
+        self.score_max = rule.match.risk_score_max if rule.match.risk_score_max is not None else float("inf")
+
+        # time windows become a 168 bit set of hours of the week
+        if not rule.match.time_windows:
+            self.hours_mask = ALL_HOURS
+        else:
+            mask = 0
+            for window in rule.match.time_windows:
+                hours = (
+                    range(window.start_hour, window.end_hour)
+                    if window.start_hour < window.end_hour
+                    else list(range(window.start_hour, 24)) + list(range(0, window.end_hour))
+                )
+                for day in window.days:
+                    for hour in hours:
+                        mask |= 1 << (DAYS.index(day) * 24 + hour)
+            self.hours_mask = mask
+
+    def matches(self, risk_score: float, hour_of_week: int) -> bool:
+        return (
+            self.score_min <= risk_score < self.score_max
+            and (self.hours_mask >> hour_of_week) & 1 == 1
+        )
+
+
+class CompiledPolicy:
+    """
+    Approval policy compiled into hash indexes.
+    Rules are grouped by which dimensions they constrain, each group is a dict
+    keyed by the constrained values, so a lookup costs one dict probe per
+    distinct group regardless of how many rules the policy has.
+    """
+
+    def __init__(self, policy: ApprovalPolicy, source: str):
+        started = time.perf_counter()
+        self.policy = policy
+        self.source = source
+        self.version = policy.version
+        self.default = policy.default
+        self.default_deadline_seconds = parse_duration(policy.default.deadline)
+        self.default_escalate_seconds = (
+            parse_duration(policy.default.escalate_after) if policy.default.escalate_after else None
+        )
+        self.rules: List[CompiledRule] = []
+        # mask of constrained dimensions -> {key: [rules in policy order]}
+        self.index: Dict[Tuple[bool, ...], Dict[Tuple, List[CompiledRule]]] = {}
+
+        for order, rule in enumerate(policy.rules):
+            compiled = CompiledRule(order, rule)
+            self.rules.append(compiled)
+
+            values = []
+            for dimension in DIMENSIONS:
+                value = getattr(rule.match, dimension)
+                values.append([value] if isinstance(value, str) else value)
+            mask = tuple(v is not None for v in values)
+            bucket = self.index.setdefault(mask, {})
+            for key in self._expand([v for v in values if v is not None]):
+                bucket.setdefault(key, []).append(compiled)
+
+        self.hits: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+        self.default_hits = 0
+        self.compiled_at = datetime.utcnow().isoformat()
+        self.compile_time_ms = (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _expand(values: List[List[str]]) -> List[Tuple]:
+        keys = [()]
+        for options in values:
+            keys = [key + (option,) for key in keys for option in options]
+        return keys
+
+    def evaluate(
+            self,
+            namespace: str,
+            service: str,
+            system: str,
+            operation: str,
+            risk_level: str,
+            risk_score: float,
+            hour_of_week: int
+        ) -> Tuple[Optional[CompiledRule], PolicyDecision, int, Optional[int]]:
+        """
+        Return the first matching rule (None for the default), its decision,
+        the approval deadline and the escalation delay in seconds
+        """
+        attributes = (namespace, service, system, operation, risk_level)
+        best: Optional[CompiledRule] = None
+
+        for mask, bucket in self.index.items():
+            key = tuple(value for value, used in zip(attributes, mask) if used)
+            for rule in bucket.get(key, ()):
+                if best is not None and rule.order >= best.order:
+                    break
+                if rule.matches(risk_score, hour_of_week):
+                    best = rule
+                    break
+
+        if best is None:
+            self.default_hits += 1
+            return None, self.default, self.default_deadline_seconds, self.default_escalate_seconds
+        self.hits[best.name] += 1
+        return best, best.decision, best.deadline_seconds, best.escalate_seconds
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "rules": len(self.rules),
+            "index_groups": len(self.index),
+            "compiled_at": self.compiled_at,
+            "compile_time_ms": round(self.compile_time_ms, 3),
+            "rule_hits": dict(self.hits),
+            "default_hits": self.default_hits
+        }
+
+
+class PolicyEngine:
+    """
+    Loads the declarative approval policy, compiles it and hot reloads it when
+    the policy file changes. A reload compiles the new policy aside and swaps
+    it in with a single assignment, so in-flight evaluations are never dropped
+    and a broken file keeps the previous policy active.
+    """
+
+    def __init__(self, policy_path: Optional[str] = None, reload_interval: float = 5.0):
+        self.policy_path = policy_path
+        self.reload_interval = reload_interval
+        self.last_error: Optional[str] = None
+        self._file_signature: Optional[Tuple[float, int]] = None
+        # the policy file is read on first use, the app container does it on startup
+        self._compiled: Optional[CompiledPolicy] = None
+
+    @property
+    def compiled(self) -> CompiledPolicy:
+        if self._compiled is None:
+            self._compiled = CompiledPolicy(ApprovalPolicy(**DEFAULT_POLICY), source="builtin")
+            self.reload()
+        return self._compiled
+
+    @compiled.setter
+    def compiled(self, compiled: CompiledPolicy):
+        self._compiled = compiled
+
+    @staticmethod
+    def compile(policy: Dict, source: str = "inline") -> CompiledPolicy:
+        return CompiledPolicy(ApprovalPolicy(**policy), source=source)
+
+    def reload(self) -> bool:
+        """Reload the policy file if it changed, returns True when a new policy was activated"""
+        if not self.policy_path or not os.path.exists(self.policy_path):
+            return False
+
+        stat = os.stat(self.policy_path)
+        signature = (stat.st_mtime, stat.st_size)
+        if signature == self._file_signature:
+            return False
+        self._file_signature = signature
+
+        try:
+            with open(self.policy_path) as f:
+                compiled = self.compile(json.load(f), source=self.policy_path)
+        except Exception as e:
+            self.last_error = f"{datetime.utcnow().isoformat()}: {e}"
+            print(f"Error loading approval policy {self.policy_path}: {e}")
+            return False
+
+        self.compiled = compiled
+        self.last_error = None
+        print(f"Loaded approval policy {compiled.version} with {len(compiled.rules)} rules")
+        return True
+
+    async def watch(self):
+        """Poll the policy file for changes"""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                self.reload()
+            except Exception as e:
+                self.last_error = f"{datetime.utcnow().isoformat()}: {e}"
+
+    def evaluate(self, compiled: Optional[CompiledPolicy] = None, **attributes):
+        return (compiled or self.compiled).evaluate(**attributes)
+
+    @staticmethod
+    def hour_of_week(timestamp: Optional[str] = None) -> int:
+        moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00')) if timestamp else datetime.utcnow()
+        return moment.weekday() * 24 + moment.hour
+
+    def dry_run(self, actions: List[Dict], risk_assessments: Dict, policy: Optional[Dict] = None) -> Dict:
+        """
+        Evaluate a policy against stored actions without activating it and
+        report per rule hit counts, decisions that would change and evaluation cost.
+        """
+        compiled = self.compile(policy) if policy is not None else CompiledPolicy(
+            self.compiled.policy, source=self.compiled.source
+        )
+
+        changed = 0
+        evaluated = 0
+        elapsed = 0.0
+        for action in actions:
+            risk = risk_assessments.get(action["action_id"])
+            if risk is None:
+                continue
+            context = action.get("context", {})
+            attributes = dict(
+                namespace=context.get("namespace"),
+                service=context.get("service"),
+                system=action["target"]["system"],
+                operation=action["target"]["operation"],
+                risk_level=risk.risk_level,
+                risk_score=risk.risk_score,
+                hour_of_week=self.hour_of_week(action.get("timestamp"))
+            )
+            started = time.perf_counter_ns()
+            _, decision, _, _ = compiled.evaluate(**attributes)
+            elapsed += time.perf_counter_ns() - started
+            evaluated += 1
+
+            current = action.get("approval_request") or {}
+            if (
+                current.get("approval_type") != decision.approval_type
+                or current.get("approvers") != decision.approvers
+            ):
+                changed += 1
+
+        return {
+            **compiled.stats(),
+            "evaluated_actions": evaluated,
+            "decisions_changed": changed,
+            "evaluation_time_us": round(elapsed / 1000, 3),
+            "mean_evaluation_ns": round(elapsed / evaluated, 1) if evaluated else 0.0
+        }
+
+    def status(self) -> Dict:
+        return {
+            "policy_path": self.policy_path,
+            "reload_interval": self.reload_interval,
+            "last_error": self.last_error,
+            **self.compiled.stats()
+        }
+
+
+APPROVAL_POLICY_PATH = os.getenv("APPROVAL_POLICY_PATH", "approval_policy.json")
+APPROVAL_POLICY_RELOAD_SECONDS = float(os.getenv("APPROVAL_POLICY_RELOAD_SECONDS", "5"))
+
+policy_engine = PolicyEngine(APPROVAL_POLICY_PATH, reload_interval=APPROVAL_POLICY_RELOAD_SECONDS)
@@ -0,0 +1,184 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Set, Tuple
+
+from models import ActionStatus, PreExecutionResult
+from components.ATPStore import store, ATPStore
+from components.VerficationEngine import verification_engine, VerificationEngine
+from components.Bulkhead import bulkhead, Bulkhead
+from components.DeadlineScheduler import to_epoch
+
+# an approval does not authorize an execution in these statuses anymore
+REVOKED_STATUSES = (ActionStatus.REJECTED, ActionStatus.EXPIRED, ActionStatus.ROLLED_BACK, ActionStatus.SKIPPED)
+
+
+class PreExecutionVerifier:
+    """
+    Layer 4, re-checks the preconditions of an approved action right before dispatch.
+    The approval must still be valid, the target still unhealthy, the rate
+    budget of the operation available and no other action in flight on the
+    same target. The checks run concurrently within a latency budget, a check
+    that does not finish in time does not hold the execution back.
+    An action whose target recovered meanwhile is skipped instead of
+    restarting a healthy service, conflicts and an exhausted rate budget
+    defer the execution without holding any bulkhead slot.
+    An approval given before its deadline stays valid until the action ran,
+    approval_ttl_seconds optionally bounds its age on top of that (0 disables).
+    """
+
+    def __init__(
+            self,
+            store: ATPStore,
+            verification_engine: VerificationEngine,
+            bulkhead: Bulkhead,
+            budget_ms: float = 500,
+            approval_ttl_seconds: float = 0,
+            conflict_retry_seconds: float = 2,
+            skip_recovered: bool = True
+        ):
+        self.store = store
+        self.verification_engine = verification_engine
+        self.bulkhead = bulkhead
+        self.budget_ms = budget_ms
+        self.approval_ttl_seconds = approval_ttl_seconds
+        self.conflict_retry_seconds = conflict_retry_seconds
+        self.skip_recovered = skip_recovered
+        # target -> actions dispatched and not finished yet
+        self._in_flight: Dict[Tuple, Set[str]] = defaultdict(set)
+        self.decisions: Dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def target_key(action: Dict) -> Tuple:
+        target = action.get("target", {})
+        context = action.get("context", {})
+        return (target.get("system"), target.get("resource"), context.get("namespace"), context.get("service"))
+
+    def release(self, action_id: str):
+        """Mark an action dispatched by check() as finished"""
+        action = self.store.actions.get(action_id, {})
+        key = self.target_key(action)
+        self._in_flight[key].discard(action_id)
+        if not self._in_flight[key]:
+            del self._in_flight[key]
+
+    async def check(self, action_id: str) -> PreExecutionResult:
+        """Run the pre-execution checks, a proceed decision claims the target until release()"""
+        started = time.perf_counter()
+        action = self.store.actions[action_id]
+
+        named = {
+            "approval_valid": self._check_approval(action_id, action),
+            "target_unhealthy": self._check_target(action),
+            "rate_budget": self._check_rate(action)
+        }
+        tasks = {name: asyncio.create_task(check) for name, check in named.items()}
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.budget_ms / 1000)
+        for task in pending:
+            task.cancel()
+
+        checks = []
+        for name, task in tasks.items():
+            if task in pending:
+                checks.append({"type": name, "status": "timeout", "details": f"No result within {self.budget_ms}ms"})
+            elif task.exception() is not None:
+                checks.append({"type": name, "status": "error", "details": f"{type(task.exception()).__name__}: {task.exception()}"})
+            else:
+                checks.append({"type": name, **task.result()})
+        # checked after the awaits so the decision and the claim of the target are atomic
+        checks.append({"type": "no_conflict", **self._check_conflict(action_id, action)})
+
+        failed = {check["type"]: check for check in checks if check["status"] == "fail"}
+        retry_after = None
+        if "approval_valid" in failed:
+            decision, reason = "block", failed["approval_valid"]["details"]
+        elif "target_unhealthy" in failed and self.skip_recovered:
+            decision, reason = "skip", failed["target_unhealthy"]["details"]
+        elif "no_conflict" in failed or "rate_budget" in failed:
+            decision = "defer"
+            reason = "; ".join(failed[name]["details"] for name in ("no_conflict", "rate_budget") if name in failed)
+            retry_after = max(failed[name].get("retry_after_seconds", 0) for name in ("no_conflict", "rate_budget") if name in failed)
+        else:
+            decision, reason = "proceed", None
+            self._in_flight[self.target_key(action)].add(action_id)
+
+        result = PreExecutionResult(
+            action_id=action_id,
+            timestamp=datetime.utcnow().isoformat(),
+            decision=decision,
+            checks=checks,
+            duration_ms=round((time.perf_counter() - started) * 1000, 3),
+            reason=reason,
+            retry_after_seconds=retry_after
+        )
+        self.decisions[decision] += 1
+        self.store.audit_log(action_id, "pre_execution_verification", result.dict(exclude={"action_id", "timestamp"}))
+        return result
+
+    async def _check_approval(self, action_id: str, action: Dict) -> Dict:
+        approval = self.store.approvals.get(action_id)
+        if approval is None or approval.decision == "rejected":
+            return {"status": "fail", "details": "Action is not approved"}
+        if action.get("status") in REVOKED_STATUSES:
+            return {"status": "fail", "details": f"Action is {ActionStatus(action['status']).value}"}
+
+        deadline_at = (action.get("approval_request") or {}).get("deadline_at")
+        if deadline_at and to_epoch(approval.timestamp) > to_epoch(deadline_at):
+            return {"status": "fail", "details": f"Approved after the approval deadline {deadline_at}"}
+        age = time.time() - to_epoch(approval.timestamp)
+        if self.approval_ttl_seconds and age > self.approval_ttl_seconds:
+            return {"status": "fail", "details": f"Approval is {age:.0f}s old, valid for {self.approval_ttl_seconds:.0f}s"}
+        return {"status": "pass", "details": f"Approved by {approval.approver}"}
+
+    async def _check_target(self, action: Dict) -> Dict:
+        readings = await self.verification_engine.current_health(self.store.declaration(action["action_id"]))
+        if not readings:
+            return {"status": "skipped", "details": "No health probe configured"}
+        unhealthy = [probe.name for probe, result in readings if not result.healthy]
+        if unhealthy:
+            return {"status": "pass", "details": f"Still unhealthy: {', '.join(unhealthy)}"}
+        return {"status": "fail", "details": "Target already recovered, " + "; ".join(result.details for _, result in readings)}
+
+    async def _check_rate(self, action: Dict) -> Dict:
+        wait = self.bulkhead.rate_wait(action)
+        if wait > 0:
+            return {
+                "status": "fail",
+                "details": f"Rate limit of {action.get('target', {}).get('operation')} exhausted for {wait:.1f}s",
+                "retry_after_seconds": round(wait, 3)
+            }
+        return {"status": "pass", "details": "Rate budget available"}
+
+    def _check_conflict(self, action_id: str, action: Dict) -> Dict:
+        others = self._in_flight.get(self.target_key(action), set()) - {action_id}
+        if others:
+            return {
+                "status": "fail",
+                "details": f"Conflicting action in flight: {', '.join(sorted(others))}",
+                "retry_after_seconds": self.conflict_retry_seconds
+            }
+        return {"status": "pass", "details": "No other action in flight on the target"}
+
+    def stats(self) -> Dict:
+        return {
+            "budget_ms": self.budget_ms,
+            "decisions": dict(self.decisions),
+            "in_flight_targets": len(self._in_flight)
+        }
+
+
+PRE_EXECUTION_BUDGET_MS = float(os.getenv("PRE_EXECUTION_BUDGET_MS", "500"))
+# how long an approval authorizes an execution, 0 keeps it valid until the action ran
+PRE_EXECUTION_APPROVAL_TTL_SECONDS = float(os.getenv("PRE_EXECUTION_APPROVAL_TTL_SECONDS", "0"))
+PRE_EXECUTION_SKIP_RECOVERED = os.getenv("PRE_EXECUTION_SKIP_RECOVERED", "true").lower() in ("1", "true", "yes")
+
+pre_execution_verifier = PreExecutionVerifier(
+    store,
+    verification_engine,
+    bulkhead,
+    budget_ms=PRE_EXECUTION_BUDGET_MS,
+    approval_ttl_seconds=PRE_EXECUTION_APPROVAL_TTL_SECONDS,
+    skip_recovered=PRE_EXECUTION_SKIP_RECOVERED
+)
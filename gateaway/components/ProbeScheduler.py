@@ -0,0 +1,161 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from components.VerificationProbes import Probe
+
+
+class ProbeResult:
+    __slots__ = ("healthy", "details", "latency_ms", "checked_at")
+
+    def __init__(self, healthy: bool, details: str, latency_ms: float):
+        self.healthy = healthy
+        self.details = details
+        self.latency_ms = latency_ms
+        self.checked_at = time.monotonic()
+
+
+class ProbeLoop:
+    """One polling loop of a probe target and the verifications subscribed to it"""
+
+    def __init__(self, probe: Probe):
+        self.probe = probe
+        self.subscribers = 0
+        self.result: Optional[ProbeResult] = None
+        self.task: Optional[asyncio.Task] = None
+        self._updated = asyncio.Event()
+        # set by subscribers that need a fresh result while the loop sleeps
+        self.wake = asyncio.Event()
+
+    def publish(self, result: ProbeResult):
+        self.result = result
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def next_result(self) -> ProbeResult:
+        await self._updated.wait()
+        return self.result
+
+
+class ProbeScheduler:
+    """
+    Shares probe results between verifications of the same target.
+    Every distinct probe target is polled by a single loop, backing off while
+    the target is unhealthy. Verifications subscribe to the loop and read its
+    results until the target is healthy or their own deadline expires, a
+    result younger than the TTL is handed to new subscribers without probing
+    again. A loop stops once nobody is subscribed.
+    """
+
+    def __init__(self, ttl_seconds: float = 1.0, check_timeout: float = 5):
+        self.ttl_seconds = ttl_seconds
+        self.check_timeout = check_timeout
+        self._loops: Dict[Tuple, ProbeLoop] = {}
+        self.probes_executed = 0
+        self.results_delivered = 0
+        self.subscriptions = 0
+        # monotonic times of recent probes, for the probe rate
+        self._probed_at: Deque[float] = deque(maxlen=4096)
+
+    async def run(self, probe: Probe) -> Dict:
+        """Wait until the probe target is healthy or the probe deadline expires, returns the check entry"""
+        loop = self._subscribe(probe)
+        started = time.perf_counter()
+        deadline = started + probe.spec.deadline_seconds
+        attempts = 0
+        result = loop.result
+        if result is None or time.monotonic() - result.checked_at > self.ttl_seconds:
+            # no recent result, ask a sleeping loop to probe right away
+            result = None
+            loop.wake.set()
+        try:
+            while True:
+                if result is None:
+                    try:
+                        result = await asyncio.wait_for(
+                            loop.next_result(), max(0.001, deadline - time.perf_counter())
+                        )
+                    except asyncio.TimeoutError:
+                        last = loop.result
+                        details = last.details if last is not None else "Probe timed out"
+                        return probe.report(False, details, attempts, last.latency_ms if last else 0.0, 0.0)
+                attempts += 1
+                self.results_delivered += 1
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if result.healthy or time.perf_counter() >= deadline:
+                    return probe.report(result.healthy, result.details, attempts, result.latency_ms, elapsed_ms)
+                result = None
+        finally:
+            loop.subscribers -= 1
+
+    async def sample(self, probe: Probe) -> ProbeResult:
+        """Current state of the probe target, a result within the TTL or the next one of its loop"""
+        loop = self._subscribe(probe)
+        try:
+            result = loop.result
+            if result is None or time.monotonic() - result.checked_at > self.ttl_seconds:
+                loop.wake.set()
+                result = await loop.next_result()
+            self.results_delivered += 1
+            return result
+        finally:
+            loop.subscribers -= 1
+
+    def _subscribe(self, probe: Probe) -> ProbeLoop:
+        self.subscriptions += 1
+        loop = self._loops.get(probe.key)
+        if loop is None:
+            loop = self._loops[probe.key] = ProbeLoop(probe)
+            loop.task = asyncio.create_task(self._poll(probe.key, loop))
+        loop.subscribers += 1
+        return loop
+
+    async def _poll(self, key: Tuple, loop: ProbeLoop):
+        spec = loop.probe.spec
+        interval = spec.initial_interval
+        try:
+            while loop.subscribers > 0:
+                checked = time.perf_counter()
+                try:
+                    healthy, details = await asyncio.wait_for(loop.probe.check(), self.check_timeout)
+                except asyncio.TimeoutError:
+                    healthy, details = False, "Probe timed out"
+                except Exception as e:
+                    healthy, details = False, f"{type(e).__name__}: {e}"
+                self.probes_executed += 1
+                self._probed_at.append(time.monotonic())
+                loop.publish(ProbeResult(healthy, details, (time.perf_counter() - checked) * 1000))
+                loop.wake.clear()
+
+                # back off while the target stays unhealthy
+                wait = spec.initial_interval if healthy else interval
+                interval = spec.initial_interval if healthy else min(interval * 2, spec.max_interval)
+                try:
+                    await asyncio.wait_for(loop.wake.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._loops.get(key) is loop:
+                del self._loops[key]
+
+    async def stop(self):
+        loops = list(self._loops.values())
+        for loop in loops:
+            loop.task.cancel()
+        await asyncio.gather(*(loop.task for loop in loops), return_exceptions=True)
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        recent = sum(1 for probed_at in self._probed_at if now - probed_at <= 60)
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "active_loops": len(self._loops),
+            "subscribers": sum(loop.subscribers for loop in self._loops.values()),
+            "subscriptions": self.subscriptions,
+            "probes_executed": self.probes_executed,
+            "results_delivered": self.results_delivered,
+            # verification reads served per probe actually sent
+            "fan_in": round(self.results_delivered / self.probes_executed, 3) if self.probes_executed else 0.0,
+            "probe_rate_per_second": round(recent / 60, 3)
+        }
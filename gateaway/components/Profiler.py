@@ -0,0 +1,141 @@
+import cProfile
+import os
+import pstats
+import random
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, Optional
+
+SORT_KEYS = {"cumulative": 3, "tottime": 2, "calls": 1}
+
+
+def _location(filename: str) -> str:
+    """Path of a profiled function relative to the gateway or its site-packages"""
+    for marker in ("site-packages" + os.sep, os.getcwd() + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
+
+
+class _Profiling:
+    __slots__ = ("profiler", "profile")
+
+    def __init__(self, profiler: "RequestProfiler"):
+        self.profiler = profiler
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        try:
+            self.profile.enable()
+        except ValueError:
+            # another profiler owns the interpreter, e.g. a debugger
+            self.profile = None
+            return None
+        self.profiler._active = self.profile
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is None:
+            return False
+        self.profile.disable()
+        self.profiler._collect(self.profile)
+        return False
+
+    def discard(self):
+        """Stop without collecting, the response is a stream that would hold the profiler for its whole lifetime"""
+        if self.profile is None:
+            return
+        self.profile.disable()
+        self.profile = None
+        self.profiler._active = None
+        self.profiler.streaming += 1
+
+
+class RequestProfiler:
+    """
+    Profiles a sample of requests with cProfile while it is switched on from
+    the admin API, and aggregates the hot functions over all sampled requests.
+    One request is profiled at a time: the profiler sees everything the event
+    loop runs while that request is in flight, so concurrent requests and
+    background jobs show up too, which is what a regression hunt wants.
+    Streaming responses (event stream, NDJSON) are discarded once they
+    start, a connection held open for minutes would block every other sample.
+    Requests that are not sampled pay a random() call at most.
+    """
+
+    def __init__(self):
+        self.sample_rate = 0.0
+        self.until = 0.0
+        self.started_at: Optional[str] = None
+        self.sampled = 0
+        # sampled while another request was being profiled
+        self.skipped = 0
+        # sampled but discarded because the response was a stream
+        self.streaming = 0
+        self._active: Optional[cProfile.Profile] = None
+        self._stats: Optional[pstats.Stats] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and time.monotonic() < self.until
+
+    def start(self, sample_rate: float, duration_seconds: float, reset: bool = True):
+        if reset:
+            self._stats = None
+            self.sampled = 0
+            self.skipped = 0
+            self.streaming = 0
+        self.sample_rate = sample_rate
+        self.until = time.monotonic() + duration_seconds
+        self.started_at = datetime.utcnow().isoformat()
+
+    def stop(self):
+        self.sample_rate = 0.0
+
+    def sample(self):
+        """Context manager profiling the block when this request is sampled"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return nullcontext()
+        if self._active is not None:
+            self.skipped += 1
+            return nullcontext()
+        return _Profiling(self)
+
+    def _collect(self, profile: cProfile.Profile):
+        self._active = None
+        self.sampled += 1
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+
+    def report(self, limit: int = 30, sort: str = "cumulative") -> Dict:
+        functions = []
+        if self._stats is not None:
+            index = SORT_KEYS.get(sort, SORT_KEYS["cumulative"])
+            ranked = sorted(self._stats.stats.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+            for (filename, line, name), (primitive_calls, calls, total, cumulative, _) in ranked:
+                functions.append({
+                    "function": name,
+                    "location": f"{_location(filename)}:{line}",
+                    "calls": calls,
+                    "primitive_calls": primitive_calls,
+                    "total_ms": round(total * 1000, 3),
+                    "cumulative_ms": round(cumulative * 1000, 3),
+                    "cumulative_per_call_us": round(cumulative / calls * 1e6, 3) if calls else 0.0
+                })
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "started_at": self.started_at,
+            "remaining_seconds": round(max(0.0, self.until - time.monotonic()), 3) if self.enabled else 0.0,
+            "sampled_requests": self.sampled,
+            "skipped_concurrent": self.skipped,
+            "skipped_streaming": self.streaming,
+            "sort": sort if sort in SORT_KEYS else "cumulative",
+            "functions": functions
+        }
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,250 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from models import (
+    ActionDeclaration,
+    ApprovalDecision,
+    ActionStatus,
+    CompensatingAction,
+    RollbackAction,
+    RollbackStep
+)
+from components.ATPStore import store, ATPStore
+from components.ExecutionEngine import execution_engine, ExecutionEngine
+from components.Tracing import tracer
+
+
+class RollbackEngine:
+    """
+    Layer 7, undoes a remediation by running its compensating actions.
+    The compensating actions form a dependency DAG, every step starts as soon
+    as all the steps it depends on succeeded, so independent steps run in
+    parallel. Dependents of a failed step are skipped. Each step is executed
+    through n8n like any other action and timed in the audit trail.
+    """
+
+    def __init__(self, store: ATPStore, execution_engine: ExecutionEngine):
+        self.store = store
+        self.execution_engine = execution_engine
+        self._background: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def validate(steps: List[CompensatingAction]):
+        """Reject plans with duplicate steps, unknown dependencies or cycles"""
+        ids = [step.step_id for step in steps]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate compensating action step_id")
+        for step in steps:
+            unknown = set(step.depends_on) - set(ids)
+            if unknown:
+                raise ValueError(f"Step {step.step_id} depends on unknown steps {sorted(unknown)}")
+
+        indegree = {step.step_id: len(set(step.depends_on)) for step in steps}
+        dependents = defaultdict(list)
+        for step in steps:
+            for dependency in set(step.depends_on):
+                dependents[dependency].append(step.step_id)
+        ready = [step_id for step_id, degree in indegree.items() if degree == 0]
+        visited = 0
+        while ready:
+            step_id = ready.pop()
+            visited += 1
+            for dependent in dependents[step_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(steps):
+            raise ValueError("Compensating actions contain a dependency cycle")
+
+    def plan(self, action_id: str, steps: Optional[List[CompensatingAction]] = None) -> List[CompensatingAction]:
+        """The requested plan, or the compensating actions declared with the action"""
+        if steps:
+            return steps
+        return [CompensatingAction(**step) for step in self.store.actions[action_id].get("compensating_actions") or []]
+
+    def record_failure(self, action_id: str, reason: str, trigger: str, error: Exception):
+        """Record a rollback that could not run, e.g. an invalid plan, as failed"""
+        self.store.store_rollback(RollbackAction(
+            action_id=action_id,
+            timestamp=datetime.utcnow().isoformat(),
+            reason=reason,
+            status="failed",
+            trigger=trigger,
+            completed_at=datetime.utcnow().isoformat()
+        ))
+        self.store.audit_log(action_id, "rollback_error", {"error": str(error), "trigger": trigger})
+
+    def is_running(self, action_id: str) -> bool:
+        rollback = self.store.rollbacks.get(action_id)
+        return rollback is not None and rollback.status in ("pending", "in_progress")
+
+    async def rollback(
+            self,
+            action_id: str,
+            reason: str,
+            steps: Optional[List[CompensatingAction]] = None,
+            trigger: str = "manual"
+        ) -> Optional[RollbackAction]:
+        """Run the rollback plan of an action, returns None when the action has no plan"""
+        steps = self.plan(action_id, steps)
+        if not steps:
+            self.store.audit_log(action_id, "rollback_skipped", {
+                "reason": reason,
+                "trigger": trigger,
+                "details": "No compensating actions declared"
+            })
+            return None
+        self.validate(steps)
+
+        started = time.perf_counter()
+        rollback = RollbackAction(
+            action_id=action_id,
+            timestamp=datetime.utcnow().isoformat(),
+            reason=reason,
+            status="in_progress",
+            compensating_actions=[step.step_id for step in steps],
+            trigger=trigger,
+            steps=[RollbackStep(step_id=step.step_id, depends_on=step.depends_on) for step in steps]
+        )
+        self.store.store_rollback(rollback)
+        self.store.audit_log(action_id, "rollback_started", {
+            "reason": reason,
+            "trigger": trigger,
+            "steps": rollback.compensating_actions
+        })
+
+        await self._run_dag(action_id, steps, {step.step_id: step for step in rollback.steps})
+
+        succeeded = sum(1 for step in rollback.steps if step.status == "success")
+        rollback.compensating_actions_executed = sum(1 for step in rollback.steps if step.status in ("success", "failure"))
+        rollback.status = (
+            "completed" if succeeded == len(steps)
+            else "partial" if succeeded > 0
+            else "failed"
+        )
+        rollback.completed_at = datetime.utcnow().isoformat()
+        rollback.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.store.store_rollback(rollback)
+        if rollback.status == "completed":
+            self.store.update_action_status(action_id, ActionStatus.ROLLED_BACK)
+        self.store.audit_log(action_id, "rollback_completed", {
+            "status": rollback.status,
+            "compensating_actions_executed": rollback.compensating_actions_executed,
+            "duration_ms": rollback.duration_ms
+        })
+        return rollback
+
+    async def _run_dag(self, action_id: str, steps: List[CompensatingAction], results: Dict[str, RollbackStep]):
+        by_id = {step.step_id: step for step in steps}
+        waiting_on = {step.step_id: set(step.depends_on) for step in steps}
+        dependents = defaultdict(list)
+        for step in steps:
+            for dependency in set(step.depends_on):
+                dependents[dependency].append(step.step_id)
+
+        def skip(step_id: str, cause: str):
+            for dependent in dependents[step_id]:
+                if results[dependent].status == "pending":
+                    results[dependent].status = "skipped"
+                    results[dependent].result = {"skipped_because": cause}
+                    skip(dependent, cause)
+
+        running: Dict[asyncio.Task, str] = {}
+        ready = [step_id for step_id, dependencies in waiting_on.items() if not dependencies]
+        while ready or running:
+            for step_id in ready:
+                task = asyncio.create_task(self._run_step(action_id, by_id[step_id], results[step_id]))
+                running[task] = step_id
+            ready = []
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                step_id = running.pop(task)
+                if results[step_id].status != "success":
+                    skip(step_id, step_id)
+                    continue
+                for dependent in dependents[step_id]:
+                    waiting_on[dependent].discard(step_id)
+                    if not waiting_on[dependent] and results[dependent].status == "pending":
+                        ready.append(dependent)
+
+    async def _run_step(self, action_id: str, step: CompensatingAction, result: RollbackStep):
+        original = self.store.actions[action_id]
+        approval = self.store.approvals.get(action_id) or ApprovalDecision(
+            action_id=action_id,
+            decision="approved",
+            approver="system:rollback_engine",
+            timestamp=datetime.utcnow().isoformat(),
+            reason="Rollback"
+        )
+        compensation = ActionDeclaration(
+            action_id=f"{action_id}.rollback.{step.step_id}",
+            workflow_id=original["workflow_id"],
+            initiator=original["initiator"],
+            timestamp=datetime.utcnow().isoformat(),
+            action_type=f"rollback.{step.type}",
+            target=step.target,
+            payload={**step.payload, "compensates": action_id, "step_id": step.step_id},
+            context={**original.get("context", {}), "rollback_of": action_id},
+            risk_assessment=original.get("risk_assessment")
+        )
+
+        result.status = "running"
+        result.started_at = datetime.utcnow().isoformat()
+        started = time.perf_counter()
+        try:
+            with tracer.span("rollback_step", step_id=step.step_id, type=step.type) as span:
+                execution = await self.execution_engine.execute(compensation, approval)
+                span.set(status=execution.status)
+            result.status = "success" if execution.status == "success" else "failure"
+            result.result = execution.result
+        except Exception as e:
+            result.status = "failure"
+            result.result = {"error": str(e)}
+        result.completed_at = datetime.utcnow().isoformat()
+        result.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+
+        self.store.audit_log(action_id, "rollback_step_completed", {
+            "step_id": step.step_id,
+            "status": result.status,
+            "depends_on": step.depends_on,
+            "started_at": result.started_at,
+            "duration_ms": result.duration_ms
+        })
+
+    def start(self, action_id: str, reason: str, steps: Optional[List[CompensatingAction]] = None) -> asyncio.Task:
+        """Run a manual rollback in the background"""
+        planned = self.plan(action_id, steps)
+        self.validate(planned)
+        # claim the action right away so a second request sees the rollback running
+        self.store.store_rollback(RollbackAction(
+            action_id=action_id,
+            timestamp=datetime.utcnow().isoformat(),
+            reason=reason,
+            status="pending",
+            compensating_actions=[step.step_id for step in planned]
+        ))
+        task = asyncio.create_task(self._rollback_logged(action_id, reason, steps))
+        # keep a reference so the task is not garbage collected mid-flight
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _rollback_logged(self, action_id: str, reason: str, steps: Optional[List[CompensatingAction]]):
+        with tracer.trace("rollback", reason=reason):
+            tracer.bind(action_id)
+            try:
+                await self.rollback(action_id, reason, steps)
+            except Exception as e:
+                print(f"Error rolling back {action_id}: {e}")
+                self.record_failure(action_id, reason, "manual", e)
+
+
+# roll back automatically when verification reports verification_failed
+ROLLBACK_ON_VERIFICATION_FAILURE = os.getenv("ROLLBACK_ON_VERIFICATION_FAILURE", "true").lower() in ("1", "true", "yes")
+
+rollback_engine = RollbackEngine(store, execution_engine)
@@ -0,0 +1,58 @@
+import json
+from enum import Enum
+from typing import Any, Dict, Optional, Union
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """JSON bytes, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default).encode()
+
+
+def dumps_str(value: Any) -> str:
+    """JSON text for the TEXT columns of the store"""
+    return dumps(value).decode()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compose(fields: Dict[str, Optional[bytes]]) -> bytes:
+    """A JSON object from values that are already encoded, None becomes null"""
+    return b"{" + b",".join(
+        dumps(key) + b":" + (value if value is not None else b"null") for key, value in fields.items()
+    ) + b"}"
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded with the fast encoder.
+    Returning it from an endpoint also skips FastAPI's jsonable_encoder pass,
+    bytes content is sent as it is.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
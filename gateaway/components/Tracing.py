@@ -0,0 +1,306 @@
+import functools
+import inspect
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from components.Metrics import STAGE_SECONDS, Histogram
+from components.Profiler import RequestProfiler
+
+# responses sent as a stream, never profiled
+STREAMING_MEDIA_TYPES = (b"text/event-stream", b"application/x-ndjson")
+
+
+class Span:
+    """One timed step of a trace, times are perf_counter seconds"""
+    __slots__ = ("name", "start", "end", "attributes", "children")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.children: List["Span"] = []
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin: float) -> Dict:
+        span = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((self.end - self.start) * 1000, 3) if self.end is not None else None
+        }
+        if self.attributes:
+            span["attributes"] = self.attributes
+        if self.children:
+            span["spans"] = [child.to_dict(origin) for child in self.children]
+        return span
+
+
+class _NullSpan:
+    """Stands in for a span when no trace is recording, attributes are dropped"""
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """Span tree of one request or background job and the actions it belongs to"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any], max_spans: int):
+        # most traces are never exported, the id and timestamp are formatted on export
+        self.wall_start = time.time()
+        self.root = Span(name, attributes)
+        self.action_ids: List[str] = []
+        self.spans = 0
+        self.max_spans = max_spans
+        self.dropped = 0
+        self.finished = False
+
+    @functools.cached_property
+    def trace_id(self) -> str:
+        return uuid.uuid4().hex[:16]
+
+    def to_dict(self) -> Dict:
+        root = self.root.to_dict(self.root.start)
+        return {
+            "trace_id": self.trace_id,
+            "name": root["name"],
+            "started_at": datetime.utcfromtimestamp(self.wall_start).isoformat(),
+            "duration_ms": root["duration_ms"],
+            "attributes": root.get("attributes", {}),
+            "spans": root.get("spans", []),
+            "dropped_spans": self.dropped
+        }
+
+
+# (trace, innermost open span) of the running task
+_current: ContextVar[Optional[Tuple[Trace, Span]]] = ContextVar("atp_trace", default=None)
+
+
+class SpanScope:
+    """with block recording a child span of the current one, and the stage histogram when given"""
+    __slots__ = ("name", "attributes", "histogram", "span", "token", "started")
+
+    def __init__(self, name: str, attributes: Dict[str, Any], histogram: Optional[Histogram] = None):
+        self.name = name
+        self.attributes = attributes
+        self.histogram = histogram
+        self.span = None
+        self.token = None
+
+    def __enter__(self):
+        current = _current.get()
+        if current is not None and not current[0].finished:
+            trace, parent = current
+            if trace.spans < trace.max_spans:
+                trace.spans += 1
+                self.span = Span(self.name, self.attributes)
+                parent.children.append(self.span)
+                self.token = _current.set((trace, self.span))
+            else:
+                trace.dropped += 1
+        self.started = time.perf_counter()
+        return self.span if self.span is not None else NULL_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter()
+        if self.histogram is not None:
+            self.histogram.observe(ended - self.started, self.name)
+        if self.span is not None:
+            self.span.end = ended
+            if exc_type is not None:
+                self.span.attributes["error"] = exc_type.__name__
+            _current.reset(self.token)
+        return False
+
+
+class TraceBuffer:
+    """
+    The latest traces of the most recently traced actions. Kept in memory
+    only, tracing adds no store write to the request path, the oldest
+    actions' traces are dropped first.
+    """
+
+    def __init__(self, max_actions: int = 10000, per_action: int = 20):
+        self.max_actions = max_actions
+        self.per_action = per_action
+        self._traces: "OrderedDict[str, Deque[Dict]]" = OrderedDict()
+
+    def add(self, action_id: str, trace: Dict):
+        traces = self._traces.get(action_id)
+        if traces is None:
+            traces = self._traces[action_id] = deque(maxlen=self.per_action)
+            if len(self._traces) > self.max_actions:
+                self._traces.popitem(last=False)
+        else:
+            self._traces.move_to_end(action_id)
+        traces.append(trace)
+
+    def get(self, action_id: str) -> List[Dict]:
+        return list(self._traces.get(action_id, ()))
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+
+class TraceScope:
+    """with block running as a new trace, exported for the bound actions on exit"""
+
+    def __init__(self, tracer: "Tracer", trace: Optional[Trace], export: bool):
+        self.tracer = tracer
+        self.trace = trace
+        self.export = export
+        self.token = None
+
+    def __enter__(self) -> Optional[Trace]:
+        if self.trace is not None:
+            self.token = _current.set((self.trace, self.trace.root))
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.trace is None:
+            return False
+        if exc_type is not None:
+            self.trace.root.attributes["error"] = exc_type.__name__
+        self.trace.root.end = time.perf_counter()
+        self.trace.finished = True
+        _current.reset(self.token)
+        if self.export:
+            self.tracer.export(self.trace)
+        return False
+
+
+class Tracer:
+    """
+    Lightweight span tracing of requests and execution jobs.
+    A trace is a tree of spans with start offsets and durations relative to
+    its start, kept in a context variable so concurrent requests never mix.
+    Once finished it is kept in the recent traces of every action it was
+    bound to, next to the action's audit trail rather than in it; traces of
+    requests that touched no action (reads, health checks) are dropped.
+    Pipeline stages are recorded with stage(), which also feeds the stage
+    latency histogram of /metrics.
+    """
+
+    def __init__(self, enabled: bool = True, max_spans: int = 256, recent: Optional[TraceBuffer] = None):
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.recent = recent or TraceBuffer()
+        # called with (action_id, exported trace) for every bound action
+        self.exporters: List[Callable[[str, Dict], None]] = [self.recent.add]
+        self.exported = 0
+
+    def trace(self, name: str, export: bool = True, **attributes) -> TraceScope:
+        """Run the block as a new trace, export=False leaves exporting to the caller"""
+        trace = Trace(name, attributes, self.max_spans) if self.enabled else None
+        return TraceScope(self, trace, export)
+
+    def span(self, name: str, **attributes) -> SpanScope:
+        return SpanScope(name, attributes)
+
+    def stage(self, name: str, **attributes) -> SpanScope:
+        """A span that is also observed in the stage latency histogram"""
+        return SpanScope(name, attributes, STAGE_SECONDS)
+
+    def staged(self, name: str):
+        """Decorator recording every call of a function or coroutine function as a stage"""
+        def decorate(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def staged_coroutine(*args, **kwargs):
+                    with SpanScope(name, {}, STAGE_SECONDS):
+                        return await func(*args, **kwargs)
+                return staged_coroutine
+
+            @functools.wraps(func)
+            def staged_function(*args, **kwargs):
+                with SpanScope(name, {}, STAGE_SECONDS):
+                    return func(*args, **kwargs)
+            return staged_function
+        return decorate
+
+    def current(self) -> Optional[Trace]:
+        current = _current.get()
+        return current[0] if current is not None else None
+
+    def annotate(self, **attributes):
+        """Set attributes on the innermost open span of the current trace"""
+        current = _current.get()
+        if current is not None:
+            current[1].set(**attributes)
+
+    def bind(self, action_id: str, trace: Optional[Trace] = None):
+        """Attach the current (or given) trace to an action"""
+        trace = trace or self.current()
+        if trace is not None and action_id not in trace.action_ids:
+            trace.action_ids.append(action_id)
+
+    def export(self, trace: Optional[Trace]):
+        if trace is None or not trace.action_ids:
+            return
+        exported = trace.to_dict()
+        for action_id in trace.action_ids:
+            for exporter in self.exporters:
+                try:
+                    exporter(action_id, exported)
+                except Exception as e:
+                    print(f"Exporting trace {trace.trace_id} of {action_id} failed: {e}")
+        self.exported += 1
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware running every HTTP request as a trace, and under the
+    request profiler when the request is sampled and not answered with a stream
+    """
+
+    def __init__(self, app, tracer: "Tracer", profiler: RequestProfiler):
+        self.app = app
+        self.tracer = tracer
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with self.tracer.trace(f"{scope['method']} {scope['path']}") as trace, self.profiler.sample() as profiling:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    if trace is not None:
+                        trace.root.set(status_code=message["status"])
+                    if profiling is not None and _is_stream(message):
+                        profiling.discard()
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+def _is_stream(message: Dict) -> bool:
+    for name, value in message.get("headers", ()):
+        if name.lower() == b"content-type":
+            return value.split(b";")[0].strip().lower() in STREAMING_MEDIA_TYPES
+    return False
+
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "256"))
+# actions whose recent traces are kept, and traces kept per action
+TRACE_BUFFER_ACTIONS = int(os.getenv("TRACE_BUFFER_ACTIONS", "10000"))
+TRACE_BUFFER_PER_ACTION = int(os.getenv("TRACE_BUFFER_PER_ACTION", "20"))
+
+tracer = Tracer(
+    enabled=TRACING_ENABLED,
+    max_spans=TRACE_MAX_SPANS,
+    recent=TraceBuffer(TRACE_BUFFER_ACTIONS, TRACE_BUFFER_PER_ACTION)
+)
@@ -1,48 +1,186 @@
+import asyncio
+import os
+import time
 from datetime import datetime
-from models import ActionDeclaration, ExecutionResultModel, VerificationResult
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from models import ActionDeclaration, ExecutionResultModel, VerificationResult, ProbeSpec
+from components.VerificationProbes import Probe, HttpProbe, TcpProbe, UptimeKumaProbe, UptimeKumaClient
+from components.ProbeScheduler import ProbeScheduler, ProbeResult
+from components.Metrics import metrics
+from components.Tracing import tracer
 
 class VerificationEngine:
     """
     Verify that the action achieved its intended outcome
+    Health probes of the action (HTTP, TCP or an Uptime Kuma monitor) run
+    concurrently, each polled until it passes or its deadline expires, so
+    verification takes as long as the slowest probe rather than their sum.
+    Probes go through a shared scheduler, so verifications of actions that
+    target the same service read one polling loop instead of each probing it.
     """
-    
+
+    def __init__(
+            self,
+            uptime_kuma_url: Optional[str] = None,
+            uptime_kuma_status_page: Optional[str] = None,
+            deadline_seconds: float = 30,
+            timeout: float = 5,
+            result_ttl_seconds: float = 1.0
+        ):
+        self.uptime_kuma_url = uptime_kuma_url
+        self.uptime_kuma_status_page = uptime_kuma_status_page
+        self.deadline_seconds = deadline_seconds
+        self.timeout = timeout
+        self._http: Optional[httpx.AsyncClient] = None
+        self.scheduler = ProbeScheduler(ttl_seconds=result_ttl_seconds, check_timeout=timeout)
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=self.timeout)
+        return self._http
+
+    async def start(self):
+        """Open the probe connection pool ahead of the first verification"""
+        self._client()
+
+    async def close(self):
+        await self.scheduler.stop()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def specs_for(self, action: ActionDeclaration) -> List[ProbeSpec]:
+        """The declared probes, or probes derived from context.health_url and context.monitor_id"""
+        if action.verification_probes:
+            return list(action.verification_probes)
+
+        specs = []
+        context = action.context
+        if context.get("health_url"):
+            specs.append(ProbeSpec(type="http", url=context["health_url"], deadline_seconds=self.deadline_seconds))
+        status_page = context.get("status_page") or self.uptime_kuma_status_page
+        if context.get("monitor_id") is not None and self.uptime_kuma_url and status_page:
+            specs.append(ProbeSpec(
+                type="uptime_kuma",
+                monitor_id=int(context["monitor_id"]),
+                status_page=status_page,
+                deadline_seconds=self.deadline_seconds
+            ))
+        return specs
+
+    def probe(self, spec: ProbeSpec) -> Probe:
+        if spec.type == "http":
+            return HttpProbe(spec, self._client())
+        if spec.type == "tcp":
+            return TcpProbe(spec)
+        if not self.uptime_kuma_url:
+            raise ValueError("Uptime Kuma probe requires UPTIME_KUMA_URL")
+        if spec.status_page is None:
+            spec = spec.model_copy(update={"status_page": self.uptime_kuma_status_page})
+        return UptimeKumaProbe(spec, UptimeKumaClient(self.uptime_kuma_url, self._client()))
+
+    async def current_health(self, action: ActionDeclaration) -> List[Tuple[Probe, ProbeResult]]:
+        """One reading of every service_health probe of the action, shared with running verifications"""
+        probes = [
+            self.probe(spec) for spec in self.specs_for(action)
+            if spec.check == "service_health" and (spec.type != "uptime_kuma" or self.uptime_kuma_url)
+        ]
+        results = await asyncio.gather(*(self.scheduler.sample(probe) for probe in probes))
+        return list(zip(probes, results))
+
+    def stats(self) -> Dict:
+        return self.scheduler.stats()
+
+    async def _run_probe(self, probe: Probe) -> Dict:
+        with tracer.span("verification.probe", probe=probe.name, check=probe.spec.check) as span:
+            result = await self.scheduler.run(probe)
+            span.set(status=result.get("status"), attempts=result.get("attempts"))
+            return result
+
+    @tracer.staged("verification")
     async def verify(self, action: ActionDeclaration, execution: ExecutionResultModel) -> VerificationResult:
         """Verify action outcome"""
-        
+        started = time.perf_counter()
         checks = []
         overall_status = "verified"
-        
+
         # Check 1: Execution completed successfully
         checks.append({
             "type": "execution_status",
             "status": "pass" if execution.status == "success" else "fail",
             "details": f"Execution status: {execution.status}"
         })
-        
+
         if execution.status != "success":
             overall_status = "verification_failed"
-        
-        # Check 2: Service health (would query Uptime Kuma or K8s)
-        # Simulated for demo
-        checks.append({
-            "type": "service_health",
-            "status": "pass",
-            "details": "Service responding with 200 OK"
-        })
-        
-        # Check 3: No unintended side effects
-        checks.append({
-            "type": "side_effects_check",
-            "status": "pass",
-            "details": "No unexpected changes detected in related services"
-        })
-        
+
+        # Checks 2 and 3: service health and side effects, a failed execution is not probed
+        results = []
+        if execution.status == "success":
+            probes = []
+            for spec in self.specs_for(action):
+                try:
+                    probes.append(self.probe(spec))
+                except ValueError as e:
+                    checks.append({"type": "probe_config", "probe": spec.type, "status": "skipped", "details": str(e)})
+            results = await asyncio.gather(*(self._run_probe(probe) for probe in probes))
+
+        for check_type, label in (("service_health", "health"), ("side_effects_check", "side effect")):
+            if not any(result["type"] == check_type for result in results):
+                checks.append({
+                    "type": check_type,
+                    "status": "skipped",
+                    "details": f"No {label} probe configured"
+                })
+        checks.extend(results)
+
+        if overall_status == "verified":
+            if any(r["type"] == "service_health" and r["status"] == "fail" for r in results):
+                overall_status = "verification_failed"
+            elif any(r["type"] == "side_effects_check" and r["status"] == "fail" for r in results):
+                overall_status = "anomaly_detected"
+
+        # without a health probe only the execution status was observed
+        probed = any(result["type"] == "service_health" for result in results)
+
         return VerificationResult(
             action_id=action.action_id,
             timestamp=datetime.utcnow().isoformat(),
             overall_status=overall_status,
             checks=checks,
-            confidence=0.95
+            confidence=0.95 if probed else 0.6,
+            duration_ms=round((time.perf_counter() - started) * 1000, 3)
         )
 
-verification_engine = VerificationEngine()
+
+UPTIME_KUMA_URL = os.getenv("UPTIME_KUMA_URL")
+UPTIME_KUMA_STATUS_PAGE = os.getenv("UPTIME_KUMA_STATUS_PAGE")
+# deadline of probes derived from the action context
+VERIFICATION_DEADLINE_SECONDS = float(os.getenv("VERIFICATION_DEADLINE_SECONDS", "30"))
+VERIFICATION_PROBE_TIMEOUT = float(os.getenv("VERIFICATION_PROBE_TIMEOUT", "5"))
+# probe results younger than this are shared with verifications that start later
+PROBE_RESULT_TTL_SECONDS = float(os.getenv("PROBE_RESULT_TTL_SECONDS", "1.0"))
+
+verification_engine = VerificationEngine(
+    uptime_kuma_url=UPTIME_KUMA_URL,
+    uptime_kuma_status_page=UPTIME_KUMA_STATUS_PAGE,
+    deadline_seconds=VERIFICATION_DEADLINE_SECONDS,
+    timeout=VERIFICATION_PROBE_TIMEOUT,
+    result_ttl_seconds=PROBE_RESULT_TTL_SECONDS
+)
+
+metrics.counter(
+    "atp_probe_requests_total", "Health probe requests actually sent",
+    callback=lambda: verification_engine.scheduler.probes_executed
+)
+metrics.counter(
+    "atp_probe_results_delivered_total", "Probe results read by verifications, shared results included",
+    callback=lambda: verification_engine.scheduler.results_delivered
+)
+metrics.gauge(
+    "atp_probe_loops", "Active probe polling loops",
+    callback=lambda: len(verification_engine.scheduler._loops)
+)
@@ -0,0 +1,109 @@
+import asyncio
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from models import ProbeSpec
+
+
+class UptimeKumaClient:
+    """
+    Reads monitor status from an Uptime Kuma status page.
+    Uses the public heartbeat endpoint of status pages, so no credentials are needed.
+    """
+
+    def __init__(self, base_url: str, client: httpx.AsyncClient):
+        self.base_url = base_url.rstrip("/")
+        self.client = client
+
+    async def monitor_status(self, status_page: str, monitor_id: int) -> Tuple[Optional[int], str]:
+        """Latest heartbeat status of a monitor (1 up, 0 down, None unknown) and its message"""
+        response = await self.client.get(f"{self.base_url}/api/status-page/heartbeat/{status_page}")
+        response.raise_for_status()
+        heartbeats = response.json().get("heartbeatList", {}).get(str(monitor_id)) or []
+        if not heartbeats:
+            return None, f"No heartbeats for monitor {monitor_id}"
+        latest = heartbeats[-1]
+        return latest.get("status"), latest.get("msg") or ""
+
+
+class Probe:
+    """A single health check of one target, polled by the probe scheduler"""
+
+    def __init__(self, spec: ProbeSpec):
+        self.spec = spec
+
+    @property
+    def name(self) -> str:
+        return self.spec.name or self.spec.type
+
+    @property
+    def key(self) -> Tuple:
+        """
+        Identity of the probed target and its polling backoff, probes with
+        the same key share one polling loop
+        """
+        spec = self.spec
+        return (
+            spec.type, spec.url, spec.expected_status, spec.host, spec.port, spec.monitor_id, spec.status_page,
+            spec.initial_interval, spec.max_interval
+        )
+
+    async def check(self) -> Tuple[bool, str]:
+        raise NotImplementedError
+
+    def report(self, healthy: bool, details: str, attempts: int, latency_ms: float, elapsed_ms: float) -> Dict:
+        """Verification check entry of this probe"""
+        return {
+            "type": "side_effects_check" if self.spec.check == "side_effects" else "service_health",
+            "probe": self.spec.type,
+            "name": self.name,
+            "status": "pass" if healthy else "fail",
+            "details": details if healthy else f"{details} (deadline {self.spec.deadline_seconds}s expired)",
+            "attempts": attempts,
+            "latency_ms": round(latency_ms, 3),
+            "time_to_healthy_ms": round(elapsed_ms, 3) if healthy else None
+        }
+
+
+class HttpProbe(Probe):
+    def __init__(self, spec: ProbeSpec, client: httpx.AsyncClient):
+        super().__init__(spec)
+        self.client = client
+
+    @property
+    def name(self) -> str:
+        return self.spec.name or self.spec.url
+
+    async def check(self) -> Tuple[bool, str]:
+        response = await self.client.get(self.spec.url)
+        return (
+            response.status_code == self.spec.expected_status,
+            f"Service responding with {response.status_code}"
+        )
+
+
+class TcpProbe(Probe):
+    @property
+    def name(self) -> str:
+        return self.spec.name or f"{self.spec.host}:{self.spec.port}"
+
+    async def check(self) -> Tuple[bool, str]:
+        reader, writer = await asyncio.open_connection(self.spec.host, self.spec.port)
+        writer.close()
+        await writer.wait_closed()
+        return True, f"Accepting connections on {self.spec.host}:{self.spec.port}"
+
+
+class UptimeKumaProbe(Probe):
+    def __init__(self, spec: ProbeSpec, client: UptimeKumaClient):
+        super().__init__(spec)
+        self.client = client
+
+    @property
+    def name(self) -> str:
+        return self.spec.name or f"uptime_kuma:{self.spec.monitor_id}"
+
+    async def check(self) -> Tuple[bool, str]:
+        status, message = await self.client.monitor_status(self.spec.status_page, self.spec.monitor_id)
+        return status == 1, f"Uptime Kuma monitor {self.spec.monitor_id} is {'up' if status == 1 else 'down'} {message}".strip()
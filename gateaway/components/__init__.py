@@ -1,5 +1,54 @@
-from .ATPStore import store
-from .OpenAIRiskAssestor import risk_assessor
-from .ExecutionEngine import ExecutionEngine
-from .VerficationEngine import verification_engine
-from .ApprovalEngine import approval_engine 
+# Components are imported on first access, importing one module (e.g.
+# components.BatchRiskScorer from rescore.py) does not build every singleton.
+# Classes named like their module (ExecutionEngine, BatchRiskScorer) are
+# imported from the module itself, the package attribute is the submodule.
+import importlib
+
+_EXPORTS = {
+    "FastJSONResponse": ".Serialization",
+    "compose": ".Serialization",
+    "dumps": ".Serialization",
+    "loads": ".Serialization",
+    "metrics": ".Metrics",
+    "MetricsMiddleware": ".Metrics",
+    "METRICS_CONTENT_TYPE": ".Metrics",
+    "tracer": ".Tracing",
+    "TracingMiddleware": ".Tracing",
+    "request_profiler": ".Profiler",
+    "store": ".ATPStore",
+    "risk_assessor": ".OpenAIRiskAssestor",
+    "execution_engine": ".ExecutionEngine",
+    "verification_engine": ".VerficationEngine",
+    "approval_engine": ".ApprovalEngine",
+    "risk_prior_learner": ".LearningEngine",
+    "policy_engine": ".PolicyEngine",
+    "execution_pipeline": ".ExecutionPipeline",
+    "AUTO_EXECUTE_ENABLED": ".ExecutionPipeline",
+    "deadline_scheduler": ".DeadlineScheduler",
+    "execution_queue": ".ExecutionQueue",
+    "bulkhead": ".Bulkhead",
+    "admission_controller": ".AdmissionController",
+    "AdmissionRejected": ".AdmissionController",
+    "declaration_deduplicator": ".DeclarationDeduplicator",
+    "incident_correlator": ".IncidentCorrelator",
+    "rollback_engine": ".RollbackEngine",
+    "pre_execution_verifier": ".PreExecutionVerifier",
+    "event_bus": ".EventBus",
+    "app_container": ".AppContainer",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
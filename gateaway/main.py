@@ -1,25 +1,67 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
-import uuid
+from typing import Dict, List, Literal, Optional
+from pydantic import ValidationError
+import asyncio
+import itertools
 import os
+import uuid
 from models import (
     ApprovalDecision, 
     ActionDeclaration, 
     ActionInitiator, 
     ActionStatus,
     ManualApprovalRequest,
-    ActionExecutePayload
+    BulkApprovalRequest,
+    IncidentDecisionRequest,
+    RollbackRequest,
+    ActionExecutePayload,
+    RiskWeights,
+    RiskAssessment,
+    PolicyDryRunRequest,
+    ProfilingRequest
 )
 
 from components import (
     store, 
     risk_assessor,
-    ExecutionEngine,
+    approval_engine,
+    risk_prior_learner,
+    policy_engine,
+    execution_engine,
+    execution_queue,
+    bulkhead,
+    admission_controller,
+    AdmissionRejected,
+    declaration_deduplicator,
+    incident_correlator,
+    rollback_engine,
     verification_engine,
-    approval_engine) 
+    event_bus,
+    app_container,
+    metrics,
+    MetricsMiddleware,
+    METRICS_CONTENT_TYPE,
+    tracer,
+    TracingMiddleware,
+    request_profiler,
+    FastJSONResponse,
+    compose,
+    dumps,
+    loads,
+    AUTO_EXECUTE_ENABLED,
+    deadline_scheduler) 
+from components.BatchRiskScorer import BatchRiskScorer, RiskColumns
+
+# concurrent assessments and actions per store transaction of a bulk declare
+BULK_DECLARE_CONCURRENCY = int(os.getenv("BULK_DECLARE_CONCURRENCY", "16"))
+BULK_DECLARE_BATCH_SIZE = int(os.getenv("BULK_DECLARE_BATCH_SIZE", "50"))
+BULK_DECLARE_MAX_ITEMS = int(os.getenv("BULK_DECLARE_MAX_ITEMS", "1000"))
 
-app = FastAPI(title="ATP Gateway")
+# the container opens the store and starts the background jobs on startup
+app = FastAPI(title="ATP Gateway", lifespan=app_container.lifespan)
 
 # Enable CORS for dashboard
 app.add_middleware(
@@ -30,70 +72,350 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# request counts and latency by route and status code, served at /metrics
+app.add_middleware(MetricsMiddleware, registry=metrics)
+# span tree of every request, kept in the audit trail of the actions it touched
+app.add_middleware(TracingMiddleware, tracer=tracer, profiler=request_profiler)
 
-@app.post("/atp/v1/actions/declare")
-async def declare_action(
-  req: ActionDeclaration
-):
+
+async def assess_declaration(
+        req: ActionDeclaration,
+        idempotency_key: Optional[str],
+        initiator: ActionInitiator,
+        llm: bool = True
+    ) -> Dict:
     """
-    Webhook endpoint for Uptime Kuma
-    This is the entry point when a service goes down
-    Allow Uptime Kuma to declare a remediation action
-    which is configured in uptime kuma notification webhook
-    with the proper data.
+    Dedup, correlate and assess a declaration, and build its approval request.
+    Returns {"folded": response} for a repeat of an open action, otherwise
+    {"action", "risk", "incident", "leads_incident", "fingerprint"} ready to be
+    stored, or released with release_declaration when it never is.
+    llm=False assesses with the rule based fallback only.
     """
-    
     action_id = f"act_{uuid.uuid4().hex[:8]}"
     
-    # Declare the remediation action
     action = ActionDeclaration(
         action_id=action_id,
         workflow_id="wf_service_remediation_v1",
-        initiator=ActionInitiator(
-            type="webhook",
-            source="uptime_kuma",
-            session_id=f"session_{uuid.uuid4().hex[:8]}"
-        ),
+        initiator=initiator,
         timestamp=datetime.utcnow().isoformat(),
         action_type="service.remediation",
         target=req.target,
         status=ActionStatus.DECLARED,
         payload=req.payload,
-        context=req.context
+        context=req.context,
+        idempotency_key=idempotency_key,
+        compensating_actions=req.compensating_actions,
+        verification_probes=req.verification_probes
     )
 
+    # Fold repeats into the open action before spending a risk assessment
+    existing_id, fingerprint, reason = declaration_deduplicator.check(action, idempotency_key)
+    while existing_id is not None and not await declaration_deduplicator.settled(existing_id):
+        # the declaration it repeats failed before it was stored
+        existing_id, fingerprint, reason = declaration_deduplicator.check(action, idempotency_key)
+    if existing_id is not None:
+        folded_count = declaration_deduplicator.fold(existing_id, fingerprint, reason, action, idempotency_key)
+        existing = store.risk_assessments.get(existing_id)
+        return {"folded": {
+            "action_id": existing_id,
+            "risk_assessment": existing.dict() if existing else None,
+            "explanation": f"Folded into open action {existing_id} ({folded_count} repeats so far)",
+            "next_step": "folded"
+        }}
+    declaration_deduplicator.register(fingerprint, action_id, idempotency_key)
 
-  
-    
-    # Assess risk using OpenAI
-    risk = await risk_assessor.assess_risk(action)
+    # Correlate with declarations caused by the same failure
+    incident, leads_incident = incident_correlator.correlate(action)
+    if incident is not None and not leads_incident:
+        # a lead's incident is only stored once a member joins it
+        action.incident_id = incident.incident_id
+
+    try:
+        # Assess risk using OpenAI, once per incident
+        risk = await incident_correlator.assess(incident, leads_incident, action, llm)
+    except BaseException:
+        # also when the request is cancelled, a later retry must not fold into nothing
+        declaration_deduplicator.release(fingerprint, action_id, idempotency_key)
+        raise
 
     # Determine approval request intelligently
-    action.approval_request = approval_engine.get_approval_request(
-        risk.risk_level,
-        action.action_id,
-        risk.risk_score
-    )
+    with tracer.stage("approval_policy"):
+        action.approval_request = approval_engine.get_approval_request(
+            risk.risk_level,
+            action.action_id,
+            risk.risk_score,
+            action
+        )
 
     # attach risk assessment to action
     action.risk_assessment = risk
+    return {
+        "action": action,
+        "risk": risk,
+        "incident": incident,
+        "leads_incident": leads_incident,
+        "fingerprint": fingerprint
+    }
+
 
+def persist_declaration(action: ActionDeclaration, risk: RiskAssessment) -> bool:
+    """
+    Store an assessed action with its risk assessment, and the system approval
+    when the policy auto approves it. Returns whether it is auto executed.
+    """
     # Store action
     store.store_action(action)
 
     # Store risk assessment
     store.store_risk_assessment(risk)
     
+    # Auto approve fast path: record a system approval and execute
+    # in the background, no /approve or /execute round trips needed
+    auto_execute = (
+        AUTO_EXECUTE_ENABLED
+        and action.approval_request.approval_type == "auto_approve"
+        and risk.recommendation == "auto_approve"
+    )
+    if auto_execute:
+        store.store_approval(ApprovalDecision(
+            action_id=action.action_id,
+            decision="approved",
+            approver="system",
+            timestamp=datetime.utcnow().isoformat(),
+            reason=f"Auto-approved by approval policy rule {action.approval_request.policy_rule or 'default'}"
+        ))
+    return auto_execute
+
+
+def release_declaration(prepared: Dict):
+    """Drop the dedup claims of an assessed declaration that was never stored"""
+    action = prepared["action"]
+    declaration_deduplicator.release(prepared["fingerprint"], action.action_id, action.idempotency_key)
+
+
+def dispatch_declaration(action: ActionDeclaration, auto_execute: bool):
+    """
+    Queue a stored action for execution, or enforce its approval deadline.
+    Repeats waiting for the action fold into it from here on.
+    """
+    declaration_deduplicator.stored(action.action_id)
+    if auto_execute:
+        execution_queue.enqueue(action.action_id)
+    else:
+        # enforce the approval deadline and escalation of the policy
+        deadline_scheduler.schedule_approval(action.action_id, action.approval_request.dict())
+
+
+@app.post("/atp/v1/actions/declare")
+async def declare_action(
+  req: ActionDeclaration,
+  idempotency_key: Optional[str] = Header(default=None)
+):
+    """
+    Webhook endpoint for Uptime Kuma
+    This is the entry point when a service goes down
+    Allow Uptime Kuma to declare a remediation action
+    which is configured in uptime kuma notification webhook
+    with the proper data.
+    Repeats of an open action, by Idempotency-Key or by fingerprint within
+    the dedup window, are folded into it instead of creating a new action.
+    Admission control bounds the declarations assessed at once: beyond its
+    queue a declaration is assessed by the fallback scorer (production) or
+    answered with 429 and Retry-After.
+    """
+    
+    try:
+        # a broken rollback plan would only surface once verification failed
+        rollback_engine.validate(req.compensating_actions)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid compensating actions: {e}")
+    try:
+        async with admission_controller.admit(req) as llm:
+            return await declare_admitted(req, idempotency_key or req.idempotency_key, llm)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def declare_admitted(req: ActionDeclaration, idempotency_key: Optional[str], llm: bool) -> Dict:
+    prepared = await assess_declaration(
+        req,
+        idempotency_key,
+        ActionInitiator(
+            type="webhook",
+            source="uptime_kuma",
+            session_id=f"session_{uuid.uuid4().hex[:8]}"
+        ),
+        llm
+    )
+    if "folded" in prepared:
+        return prepared["folded"]
+    action, risk = prepared["action"], prepared["risk"]
+    tracer.bind(action.action_id)
+
+    try:
+        auto_execute = persist_declaration(action, risk)
+    except Exception:
+        release_declaration(prepared)
+        raise
+    dispatch_declaration(action, auto_execute)
+    
     # Get explanation
-    explanation = await risk_assessor.explain_risk(risk)
+    explanation = await incident_correlator.explain(prepared["incident"], prepared["leads_incident"], risk, llm)
     
     return {
-        "action_id": action_id,
+        "action_id": action.action_id,
+        "incident_id": action.incident_id,
         "risk_assessment": risk.dict(),
         "explanation": explanation,
-        "next_step": "approval_required" if risk.recommendation == "human_review" else "auto_executing"
+        "next_step": "auto_executing" if auto_execute else "approval_required"
     }
 
+
+async def stream_bulk_declarations(results: asyncio.Queue, total: int, tasks: List[asyncio.Task]):
+    """
+    NDJSON lines of the bulk declarations as their assessments complete.
+    Assessments that finish together are stored in one transaction.
+    """
+    remaining = total
+    try:
+        while remaining:
+            ready = [await results.get()]
+            while len(ready) < BULK_DECLARE_BATCH_SIZE and not results.empty():
+                ready.append(results.get_nowait())
+            remaining -= len(ready)
+
+            lines = []
+            assessed = [result for result in ready if "action" in result]
+            try:
+                with store.batch():
+                    auto_executes = [persist_declaration(result["action"], result["risk"]) for result in assessed]
+            except Exception as e:
+                print(f"Bulk declare: storing {len(assessed)} actions failed: {e}")
+                for result in assessed:
+                    release_declaration(result)
+                lines.extend(
+                    {"index": result["index"], "status": "error", "error": f"{type(e).__name__}: {e}"}
+                    for result in assessed
+                )
+                assessed, auto_executes = [], []
+            for result in ready:
+                if "folded" in result:
+                    lines.append({"index": result["index"], "status": "folded", **result["folded"]})
+                elif "action" not in result:
+                    lines.append(result)
+            for result, auto_execute in zip(assessed, auto_executes):
+                action = result["action"]
+                dispatch_declaration(action, auto_execute)
+                # each item was traced on its own, the action exists now
+                tracer.bind(action.action_id, result["trace"])
+                tracer.export(result["trace"])
+                lines.append({
+                    "index": result["index"],
+                    "status": "declared",
+                    "action_id": action.action_id,
+                    "incident_id": action.incident_id,
+                    "risk_assessment": result["risk"].model_dump(),
+                    "next_step": "auto_executing" if auto_execute else "approval_required"
+                })
+            yield b"".join(dumps(line) + b"\n" for line in lines)
+    finally:
+        # the client went away, stop assessing the rest
+        for task in tasks:
+            task.cancel()
+        # and give up the claims of those assessed but not stored
+        while not results.empty():
+            result = results.get_nowait()
+            if "action" in result:
+                release_declaration(result)
+
+
+@app.post("/atp/v1/actions/declare/bulk")
+async def bulk_declare_actions(request: Request):
+    """
+    Declare many actions in one call, for replays of missed alerts, backfills
+    and agents proposing several actions at once.
+    The body is a JSON array of declarations, or NDJSON with one declaration
+    per line (Content-Type: application/x-ndjson). Declarations are assessed
+    concurrently while the body is still being read, stored in batched
+    transactions and a result line per item is streamed back as NDJSON in
+    completion order, with the index of the item in the body.
+    Items go through the same admission control as single declarations,
+    an item turned away gets a "rejected" line with its retry_after.
+    No explanations are generated, use /atp/v1/actions/{action_id}/explain.
+    """
+    results: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(BULK_DECLARE_CONCURRENCY)
+    tasks: List[asyncio.Task] = []
+    # items in the body, including those rejected before assessment
+    indexes = itertools.count()
+
+    async def assess(index: int, item):
+        try:
+            req = ActionDeclaration.model_validate(item)
+        except ValidationError as e:
+            results.put_nowait({"index": index, "status": "invalid", "error": e.errors(include_url=False)})
+            return
+        try:
+            rollback_engine.validate(req.compensating_actions)
+        except ValueError as e:
+            results.put_nowait({"index": index, "status": "invalid", "error": f"Invalid compensating actions: {e}"})
+            return
+        async with semaphore:
+            with tracer.trace("bulk_declare_item", export=False, index=index) as trace:
+                try:
+                    async with admission_controller.admit(req) as llm:
+                        prepared = await assess_declaration(req, req.idempotency_key, req.initiator, llm)
+                except AdmissionRejected as e:
+                    results.put_nowait({
+                        "index": index, "status": "rejected", "error": str(e), "retry_after": e.retry_after
+                    })
+                    return
+                except Exception as e:
+                    results.put_nowait({"index": index, "status": "error", "error": f"{type(e).__name__}: {e}"})
+                    return
+        results.put_nowait({"index": index, "trace": trace, **prepared})
+
+    def submit(line: Optional[bytes] = None, item=None):
+        index = next(indexes)
+        if index >= BULK_DECLARE_MAX_ITEMS:
+            for task in tasks:
+                task.cancel()
+            raise HTTPException(status_code=413, detail=f"At most {BULK_DECLARE_MAX_ITEMS} declarations per call")
+        if line is not None:
+            try:
+                item = loads(line)
+            except ValueError as e:
+                results.put_nowait({"index": index, "status": "invalid", "error": f"Invalid JSON: {e}"})
+                return
+        tasks.append(asyncio.create_task(assess(index, item)))
+
+    # the whole body is read before responding, the streaming response
+    # listens for disconnects on the same receive channel
+    if "ndjson" in request.headers.get("content-type", ""):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    submit(line=line)
+        if buffer.strip():
+            submit(line=buffer)
+    else:
+        try:
+            items = loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=422, detail="Expected a JSON array of declarations")
+        for item in items:
+            submit(item=item)
+
+    return StreamingResponse(
+        stream_bulk_declarations(results, next(indexes), tasks),
+        media_type="application/x-ndjson"
+    )
+
 @app.post("/atp/v1/actions/approve")
 async def approve_action(req: ManualApprovalRequest):
     """
@@ -104,6 +426,10 @@ async def approve_action(req: ManualApprovalRequest):
     action = store.actions.get(req.action_id)
     if not action:
         raise HTTPException(status_code=404, detail="Action not found")
+    # an expired, rejected or already decided action must not become executable again
+    if not deadline_scheduler.is_pending(req.action_id):
+        raise HTTPException(status_code=409, detail="Action is not pending approval")
+    tracer.bind(req.action_id)
     
     approval = ApprovalDecision(
         action_id=req.action_id,
@@ -114,6 +440,7 @@ async def approve_action(req: ManualApprovalRequest):
     )
     
     store.store_approval(approval)
+    deadline_scheduler.cancel(req.action_id)
     
     return {
         "action_id": req.action_id,
@@ -122,10 +449,94 @@ async def approve_action(req: ManualApprovalRequest):
     }
 
 
+def apply_decisions(action_ids: List[str], decision: str, approver: str, reason: str, execute: bool) -> List[Dict]:
+    """
+    Record one decision for many pending actions in a single store transaction,
+    cancel their deadlines and optionally queue them for execution
+    """
+    timestamp = datetime.utcnow().isoformat()
+    with store.batch():
+        for action_id in action_ids:
+            store.store_approval(ApprovalDecision(
+                action_id=action_id,
+                decision=decision,
+                approver=approver,
+                timestamp=timestamp,
+                reason=reason
+            ))
+    results = []
+    for action_id in action_ids:
+        deadline_scheduler.cancel(action_id)
+        result = {"action_id": action_id, "status": decision}
+        if execute:
+            result["job_id"] = execution_queue.enqueue(action_id).job_id
+        results.append(result)
+    return results
+
+
+@app.post("/atp/v1/actions/approve/bulk")
+async def bulk_approve_actions(req: BulkApprovalRequest):
+    """
+    Approve or reject many pending actions in one call, either by id or by
+    filter (namespace, service, risk level, status, assigned approver).
+    All decisions are written in a single store transaction.
+    """
+    if not req.action_ids and req.filter is None:
+        raise HTTPException(status_code=422, detail="Provide action_ids or a filter")
+
+    results = []
+    selected = []
+    if req.action_ids:
+        for action_id in dict.fromkeys(req.action_ids):
+            if action_id not in store.actions:
+                results.append({"action_id": action_id, "status": "not_found"})
+            elif not deadline_scheduler.is_pending(action_id):
+                results.append({
+                    "action_id": action_id,
+                    "status": "skipped",
+                    "reason": "Action is not pending approval"
+                })
+            else:
+                selected.append(action_id)
+    else:
+        criteria = req.filter
+        for action_id, action in store.actions.items():
+            if not deadline_scheduler.is_pending(action_id):
+                continue
+            context = action.get("context", {})
+            if criteria.namespace and context.get("namespace") != criteria.namespace:
+                continue
+            if criteria.service and context.get("service") != criteria.service:
+                continue
+            if criteria.status and action.get("status") != criteria.status:
+                continue
+            if criteria.risk_level:
+                risk = store.risk_assessments.get(action_id)
+                if risk is None or risk.risk_level != criteria.risk_level:
+                    continue
+            if criteria.approver and criteria.approver not in (action.get("approval_request") or {}).get("approvers", []):
+                continue
+            selected.append(action_id)
+
+    selected = selected[:req.limit]
+    executing = req.execute and req.decision == "approved"
+    results.extend(apply_decisions(selected, req.decision, req.approver, req.reason, executing))
+
+    return {
+        "decision": req.decision,
+        "processed": len(selected),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "not_found": sum(1 for r in results if r["status"] == "not_found"),
+        "executing": len(selected) if executing else 0,
+        "results": results
+    }
+
+
 @app.post("/atp/v1/actions/execute")
 async def execute_action(req: ActionExecutePayload):
     """
-    Execute the approved action through n8n
+    Queue the approved action for execution through n8n.
+    Returns 202 right away, poll the status URL for the outcome.
     """
     
     action_dict = store.actions.get(req.action_id)
@@ -136,35 +547,162 @@ async def execute_action(req: ActionExecutePayload):
     
     if not approval_dict:
         raise HTTPException(status_code=403, detail="Action not approved")
+    tracer.bind(req.action_id)
+    
+    # never restart a remediation that already ran successfully
+    execution = store.executions.get(req.action_id)
+    if execution is not None and execution.status == "success":
+        return FastJSONResponse(compose({
+            "action_id": dumps(req.action_id),
+            "status": b'"already_executed"',
+            "execution": dumps(execution.model_dump()),
+            "verification": store.encoded("verification", req.action_id)
+        }))
     
-    action = ActionDeclaration(**action_dict)
-    approval = approval_dict
+    job = execution_queue.enqueue(req.action_id)
     
-    # Execute through n8n
-    AUTOMATION_ENGINE_LOW_RISK_WEBHOOK = os.getenv("AUTOMATION_ENGINE_LOW_RISK_WEBHOOK", "")
-    AUTOMATION_ENGINE_HIGH_RISK_WEBHOOK = os.getenv("AUTOMATION_ENGINE_HIGH_RISK_WEBHOOK", "")
-    executor = ExecutionEngine(AUTOMATION_ENGINE_HIGH_RISK_WEBHOOK, AUTOMATION_ENGINE_LOW_RISK_WEBHOOK)
-    execution = await executor.execute(action, approval)
+    return JSONResponse(status_code=202, content={
+        "action_id": req.action_id,
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/atp/v1/executions/{job.job_id}"
+    })
+
 
-    try : 
-        store.store_execution(execution)
-    except Exception as e:
-        store.update_action_status(req.action_id, ActionStatus.EXECUTED)
+@app.get("/atp/v1/executions/{job_id}")
+async def get_execution_job(job_id: str):
+    """
+    Status of a queued execution, with the execution and verification
+    results once the job completed
+    """
+    job = store.execution_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Execution job not found")
     
-    # Verify execution
-    verification = await verification_engine.verify(action, execution)
-    store.store_verification(verification)
+    execution = store.executions.get(job.action_id)
+    verification = store.verifications.get(job.action_id)
+    completed = job.status == "completed"
+    return FastJSONResponse({
+        **job.model_dump(),
+        "execution": execution.model_dump() if execution and completed else None,
+        "verification": verification.model_dump() if verification and completed else None
+    })
+
+@app.post("/atp/v1/actions/{action_id}/rollback")
+async def rollback_action(action_id: str, req: RollbackRequest):
+    """
+    Layer 7, roll back an executed action by running its compensating actions.
+    The plan in the request wins over the one declared with the action.
+    Returns 202 right away, poll the status URL for per step progress.
+    """
+    if action_id not in store.actions:
+        raise HTTPException(status_code=404, detail="Action not found")
+    if action_id not in store.executions:
+        raise HTTPException(status_code=409, detail="Action has not been executed")
+    if rollback_engine.is_running(action_id):
+        raise HTTPException(status_code=409, detail="Rollback already in progress")
+    if not rollback_engine.plan(action_id, req.compensating_actions):
+        raise HTTPException(status_code=422, detail="No compensating actions declared or requested")
     
+    tracer.bind(action_id)
+    try:
+        rollback_engine.start(action_id, req.reason, req.compensating_actions)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    return JSONResponse(status_code=202, content={
+        "action_id": action_id,
+        "status": "pending",
+        "status_url": f"/atp/v1/actions/{action_id}/rollback"
+    })
+
+
+@app.get("/atp/v1/actions/{action_id}/rollback")
+async def get_rollback(action_id: str):
+    """Status of the rollback of an action with per step timing"""
+    rollback = store.rollbacks.get(action_id)
+    if not rollback:
+        raise HTTPException(status_code=404, detail="No rollback for this action")
+    return rollback.dict()
+
+
+@app.get("/atp/v1/incidents")
+async def get_incidents(status: Optional[str] = None):
+    """Correlated incidents, most recent first"""
+    incidents = sorted(store.incidents.values(), key=lambda incident: incident.updated_at, reverse=True)
     return {
-        "action_id": req.action_id,
-        "execution": execution.dict(),
-        "verification": verification.dict()
+        "incidents": [incident.dict() for incident in incidents if status is None or incident.status == status],
+        "correlation": incident_correlator.stats()
+    }
+
+
+@app.get("/atp/v1/incidents/{incident_id}")
+async def get_incident(incident_id: str):
+    """An incident with the current status of its member actions"""
+    incident = store.incidents.get(incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return {
+        **incident.dict(),
+        "members": [
+            {"action_id": action_id, "status": store.actions.get(action_id, {}).get("status")}
+            for action_id in incident.member_action_ids
+        ]
     }
 
+
+@app.post("/atp/v1/incidents/{incident_id}/approve")
+async def decide_incident(incident_id: str, req: IncidentDecisionRequest):
+    """
+    Approve or reject every pending member of an incident at once,
+    optionally queueing the approved members for execution
+    """
+    incident = store.incidents.get(incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    pending = [action_id for action_id in incident.member_action_ids if deadline_scheduler.is_pending(action_id)]
+    results = apply_decisions(pending, req.decision, req.approver, req.reason, req.execute and req.decision == "approved")
+    # later declarations start a new incident
+    incident_correlator.set_status(incident, req.decision)
+    
+    return {
+        "incident_id": incident_id,
+        "decision": req.decision,
+        "processed": len(results),
+        "results": results
+    }
+
+
+@app.post("/atp/v1/incidents/{incident_id}/execute")
+async def execute_incident(incident_id: str):
+    """Queue every approved, not yet executed member of an incident for execution"""
+    incident = store.incidents.get(incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    results = []
+    for action_id in incident.member_action_ids:
+        approval = store.approvals.get(action_id)
+        execution = store.executions.get(action_id)
+        if approval is None or approval.decision != "approved":
+            results.append({"action_id": action_id, "status": "not_approved"})
+        elif execution is not None and execution.status == "success":
+            results.append({"action_id": action_id, "status": "already_executed"})
+        else:
+            job = execution_queue.enqueue(action_id)
+            results.append({"action_id": action_id, "status": job.status, "job_id": job.job_id})
+    
+    return JSONResponse(status_code=202, content={"incident_id": incident_id, "results": results})
+
+
 @app.get("/atp/v1/actions/{action_id}/audit-trail")
 async def get_audit_trail(action_id: str):
     """
-    Get complete audit trail for an action
+    Get complete audit trail for an action.
+    "traces" holds the span trees of the action's latest requests and
+    execution jobs, with start offsets and durations of each step. They are
+    kept in memory next to the audit trail, not persisted.
     """
     
     logs = store.audit_logs.get(action_id, [])
@@ -172,15 +710,19 @@ async def get_audit_trail(action_id: str):
     if not logs:
         raise HTTPException(status_code=404, detail="Action not found")
     
-    return {
-        "action_id": action_id,
-        "audit_trail": logs,
-        "action": store.actions.get(action_id),
-        "risk_assessment": store.risk_assessments.get(action_id).dict() if action_id in store.risk_assessments else None,
-        "approval": store.approvals.get(action_id).dict() if action_id in store.approvals else None,
-        "execution": store.executions.get(action_id).dict() if action_id in store.executions else None,
-        "verification": store.verifications.get(action_id).dict() if action_id in store.verifications else None
-    }
+    approval = store.approvals.get(action_id)
+    execution = store.executions.get(action_id)
+    # encoded straight to JSON, stored records are not validated again
+    return FastJSONResponse(compose({
+        "action_id": dumps(action_id),
+        "audit_trail": dumps(logs),
+        "action": dumps(store.actions.get(action_id)),
+        "risk_assessment": store.encoded("risk_assessment", action_id),
+        "approval": dumps(approval.model_dump()) if approval else None,
+        "execution": dumps(execution.model_dump()) if execution else None,
+        "verification": store.encoded("verification", action_id),
+        "traces": dumps(tracer.recent.get(action_id))
+    }))
 
 @app.get("/atp/v1/actions/{action_id}/explain")
 async def explain_action(action_id: str):
@@ -205,8 +747,193 @@ async def get_actions():
     """
     Get list of all declared actions
     """
-    actions = [action for action in store.actions.values()]
-    return actions 
+    return FastJSONResponse(list(store.actions.values()))
+
+@app.get("/atp/v1/stats")
+async def get_stats(
+    period: Literal["hour", "day"] = "hour",
+    window: int = Query(default=24, ge=1, le=1000),
+    namespace: Optional[str] = None,
+    service: Optional[str] = None
+):
+    """
+    Action counts by status and risk level, mean risk score, and the
+    declared/approved/executed/verified/failed counts of the last `window`
+    hours or days, in total and per namespace and service.
+    Served from counters the store maintains on every write.
+    """
+    return FastJSONResponse(store.get_stats(period, window, namespace, service))
+
+@app.post("/atp/v1/admin/risk/rescore")
+async def rescore_history(weights: RiskWeights, sample_size: int = 20):
+    """
+    Rescore the whole action history with the given weights
+    and report how many past actions change risk bucket
+    """
+    if store.use_db:
+        columns = RiskColumns.from_database(store.db_path)
+    else:
+        columns = RiskColumns.from_history(store.action_history)
+    
+    return BatchRiskScorer(weights).compare(columns, sample_size=sample_size)
+
+@app.post("/atp/v1/admin/learning/run")
+async def run_learning_job():
+    """
+    Fold new verification outcomes into the risk priors now
+    instead of waiting for the next scheduled run
+    """
+    return await risk_prior_learner.run_once()
+
+@app.get("/atp/v1/admin/learning/priors")
+async def get_learning_priors():
+    """
+    Get the learned success/failure priors and the last job run
+    """
+    return {
+        "last_run": risk_prior_learner.last_run,
+        "watermark": store.get_watermark(risk_prior_learner.JOB_NAME),
+        "priors": [
+            {
+                "system": system,
+                "operation": operation,
+                "namespace": namespace,
+                "service": service,
+                "hour_of_week": hour_of_week,
+                "successes": successes,
+                "failures": failures
+            }
+            for (system, operation, namespace, service, hour_of_week), (successes, failures) in store.risk_priors.items()
+        ]
+    }
+
+@app.get("/atp/v1/admin/policy")
+async def get_policy():
+    """
+    Get the active approval policy, its source and rule hit counts
+    """
+    return {
+        **policy_engine.status(),
+        "policy": policy_engine.compiled.policy.dict()
+    }
+
+@app.post("/atp/v1/admin/policy/dry-run")
+async def dry_run_policy(req: PolicyDryRunRequest):
+    """
+    Evaluate an approval policy against the most recent actions without
+    activating it, reports per rule hits and evaluation cost
+    """
+    actions = sorted(
+        store.actions.values(),
+        key=lambda action: action.get("timestamp", ""),
+        reverse=True
+    )[:req.limit]
+    
+    try:
+        return policy_engine.dry_run(actions, store.risk_assessments, req.policy)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid policy: {e}")
+
+@app.get("/atp/v1/admin/scheduler")
+async def get_scheduler_stats():
+    """
+    Get approval deadline scheduler queue depth, fired timers and lag
+    """
+    return deadline_scheduler.stats()
+
+@app.get("/atp/v1/admin/execution")
+async def get_execution_stats():
+    """
+    Connection pool settings, per webhook latency and error metrics,
+    execution queue, bulkhead and verification probe scheduler state
+    """
+    return {
+        **execution_engine.stats(),
+        "queue": execution_queue.stats(),
+        "bulkhead": bulkhead.stats(),
+        "verification": verification_engine.stats()
+    }
+
+
+@app.get("/atp/v1/events")
+async def stream_events(
+        last_event_id: Optional[int] = None,
+        action_id: Optional[str] = None,
+        last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID")
+    ):
+    """
+    Server-sent events of every audit log entry, optionally of one action.
+    Reconnecting clients resume after Last-Event-ID (header or query), a
+    reset event tells them the missed events are gone and to refetch.
+    """
+    subscriber = event_bus.subscribe(
+        last_event_id_header if last_event_id_header is not None else last_event_id,
+        action_id
+    )
+    return StreamingResponse(
+        event_bus.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/atp/v1/admin/profiling")
+async def start_profiling(req: ProfilingRequest):
+    """
+    Profile a sample of requests with cProfile for a while, e.g. 1% for five
+    minutes, without redeploying. Read the hot functions from GET.
+    """
+    request_profiler.start(req.sample_rate, req.duration_seconds, reset=req.reset)
+    return request_profiler.report(limit=0)
+
+
+@app.get("/atp/v1/admin/profiling")
+async def get_profiling(
+    limit: int = Query(default=30, ge=1, le=500),
+    sort: Literal["cumulative", "tottime", "calls"] = "cumulative"
+):
+    """Hot functions aggregated over the sampled requests"""
+    return request_profiler.report(limit=limit, sort=sort)
+
+
+@app.delete("/atp/v1/admin/profiling")
+async def stop_profiling(limit: int = Query(default=30, ge=1, le=500)):
+    """Stop sampling, the aggregated functions stay readable until the next start"""
+    request_profiler.stop()
+    return request_profiler.report(limit=limit)
+
+
+@app.get("/atp/v1/admin/admission")
+async def get_admission_stats():
+    """
+    Declarations being assessed and waiting, admitted, deferred to the
+    fallback scorer and rejected counts, and queue wait times
+    """
+    return admission_controller.stats()
+
+
+@app.get("/atp/v1/admin/events")
+async def get_event_stats():
+    """Event stream subscribers, history and slow consumer evictions"""
+    return event_bus.stats()
+
+
+@app.get("/atp/v1/admin/dedup")
+async def get_dedup_stats():
+    """Declaration dedup window, tracked fingerprints and folded declarations"""
+    return declaration_deduplicator.stats()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus metrics: per stage latency histograms (similar actions lookup,
+    LLM assess and explain, fallback scorer, approval policy, every store
+    write, pre-execution checks, n8n dispatch, verification), requests by
+    route and status code, LLM fallback and cache hit counts, queue depths
+    """
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 
 @app.get("/atp/v1/health")
 async def health_check():
@@ -217,6 +944,20 @@ async def health_check():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/atp/v1/ready")
+async def readiness_check():
+    """
+    Readiness, unlike /health it answers 503 until the store is loaded and
+    the background warm-up finished, with the duration of every step
+    """
+    readiness = app_container.readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
 if __name__ == "__main__":
+    import gc
     import uvicorn
+    # load the store up front and keep the modules and caches, which live as
+    # long as the process, out of later collections
+    store.open()
+    gc.freeze()
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
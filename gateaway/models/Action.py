@@ -1,17 +1,34 @@
 from typing import Dict, List, Optional, Literal, Any, Union
 from .VerificationResult import ApprovalDecision, ApprovalRequest, VerificationResult
 from .RiskAssessment import RiskAssessment
+from .Probe import ProbeSpec
 from pydantic import BaseModel, Field
 from datetime import datetime
 from enum import Enum
 from .enums import ActionStatus
 
+class RollbackStep(BaseModel):
+    step_id: str
+    depends_on: List[str] = Field(default_factory=list)
+    status: Literal["pending", "running", "success", "failure", "skipped"] = "pending"
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    duration_ms: Optional[float] = None
+    result: Dict[str, Any] = Field(default_factory=dict)
+
+
 class RollbackAction(BaseModel):
     action_id: str
     timestamp: str
     reason: str
-    status: Literal["pending", "in_progress", "completed", "failed"]
+    status: Literal["pending", "in_progress", "completed", "partial", "failed"]
     compensating_actions: List[str] = Field(default_factory=list)
+    # "automatic" when triggered by a failed verification
+    trigger: Literal["manual", "automatic"] = "manual"
+    steps: List[RollbackStep] = Field(default_factory=list)
+    compensating_actions_executed: int = 0
+    completed_at: Optional[str] = None
+    duration_ms: Optional[float] = None
     
 
 
@@ -20,6 +37,24 @@ class ActionTarget(BaseModel):
     resource: str  # e.g., "charges", "leads", "contacts", "ec2"
     operation: str  # e.g., "refund", "create", "update", "restart_service"
 
+class CompensatingAction(BaseModel):
+    """One step of a rollback plan, executed through n8n once its dependencies succeeded"""
+    step_id: str
+    type: str = "n8n.workflow"
+    target: ActionTarget
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    # steps that must succeed before this one runs
+    depends_on: List[str] = Field(default_factory=list)
+
+
+class RollbackRequest(BaseModel):
+    reason: str
+    details: Optional[str] = None
+    strategy: Literal["compensating_transaction", "state_restoration"] = "compensating_transaction"
+    # plan to run, the compensating actions declared with the action are used when empty
+    compensating_actions: List[CompensatingAction] = Field(default_factory=list)
+
+
 class ActionInitiator(BaseModel):
     type: Literal["webhook", "scheduled", "human", "ai_agent"]
     source: str
@@ -54,6 +89,14 @@ class ActionDeclaration(BaseModel):
     # Optional fields to be filled later
     approval_request: Optional[ApprovalRequest] = None
     risk_assessment: Optional[RiskAssessment] = None
+    # client supplied key, repeated declarations with the same key return the same action
+    idempotency_key: Optional[str] = None
+    # incident the declaration was correlated into
+    incident_id: Optional[str] = None
+    # rollback plan, run when verification fails or on request
+    compensating_actions: List[CompensatingAction] = Field(default_factory=list)
+    # post-execution probes, derived from context.health_url / context.monitor_id when empty
+    verification_probes: List[ProbeSpec] = Field(default_factory=list)
 
 
 class CompleteAction(BaseModel):
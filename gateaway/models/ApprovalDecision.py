@@ -8,6 +8,14 @@ class ApprovalRequestModel(BaseModel):
     approvers: List[str]
     deadline: str
     priority: Literal["low", "normal", "high"]
+    # approval policy rule that produced this request, None for the policy default
+    policy_rule: Optional[str] = None
+    # absolute UTC timestamps enforced by the deadline scheduler
+    deadline_at: Optional[str] = None
+    escalate_at: Optional[str] = None
+    escalation_approvers: List[str] = Field(default_factory=list)
+    on_expiry: Literal["reject", "expire"] = "reject"
+    escalated_at: Optional[str] = None
 
 
 class ApprovalDecision(BaseModel):
@@ -32,4 +40,8 @@ class ExecutionResultModel(BaseModel):
     completed_at: Optional[str] = None
     status: Literal["success", "failure", "partial", "in_progress"]
     result: Dict[str, Any]
-    side_effects: List[Dict[str, Any]] = Field(default_factory=list)
\ No newline at end of file
+    side_effects: List[Dict[str, Any]] = Field(default_factory=list)
+    # key sent to n8n with every request of this execution, derived from action id and attempt
+    idempotency_key: Optional[str] = None
+    # HTTP requests made to n8n, retries included
+    requests: int = 1
\ No newline at end of file
@@ -1,5 +1,5 @@
 from typing import Dict, List, Optional, Literal, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class ApprovalRequest(BaseModel):
     action_id: str
@@ -22,4 +22,26 @@ class ApprovalDecision(BaseModel):
 class ManualApprovalRequest(BaseModel):
     action_id: str
     approver: str 
-    reason: str
\ No newline at end of file
+    reason: str
+
+
+class ApprovalFilter(BaseModel):
+    namespace: Optional[str] = None
+    service: Optional[str] = None
+    risk_level: Optional[Literal["low", "medium", "high"]] = None
+    # only actions still awaiting a decision can be selected
+    status: Optional[Literal["declared", "pending", "pending_approval"]] = None
+    # approvers the pending request is assigned to, e.g. "on_call_engineer"
+    approver: Optional[str] = None
+
+
+class BulkApprovalRequest(BaseModel):
+    # explicit actions, or every pending action matching the filter
+    action_ids: List[str] = Field(default_factory=list)
+    filter: Optional[ApprovalFilter] = None
+    decision: Literal["approved", "rejected"] = "approved"
+    approver: str
+    reason: str
+    # run approved actions through the execution pipeline right away
+    execute: bool = False
+    limit: int = Field(default=1000, ge=1, le=10000)
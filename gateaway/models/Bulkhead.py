@@ -0,0 +1,21 @@
+from typing import Dict, Optional
+from pydantic import BaseModel, Field
+
+
+class OperationLimits(BaseModel):
+    """Overrides of the bulkhead limits for one operation, unset values fall back to the defaults"""
+    target_concurrency: Optional[int] = Field(default=None, ge=1)
+    namespace_concurrency: Optional[int] = Field(default=None, ge=1)
+    rate_per_minute: Optional[float] = Field(default=None, gt=0)
+    burst: Optional[int] = Field(default=None, ge=1)
+
+
+class BulkheadSettings(BaseModel):
+    # concurrent executions against one target system and service
+    target_concurrency: int = Field(default=2, ge=1)
+    # concurrent executions within one namespace
+    namespace_concurrency: int = Field(default=10, ge=1)
+    # token bucket per operation and target
+    rate_per_minute: float = Field(default=30, gt=0)
+    burst: int = Field(default=5, ge=1)
+    operations: Dict[str, OperationLimits] = Field(default_factory=dict)
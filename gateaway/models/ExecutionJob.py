@@ -0,0 +1,29 @@
+from typing import Optional, Literal
+from pydantic import BaseModel
+
+
+class ExecutionJob(BaseModel):
+    job_id: str
+    action_id: str
+    status: Literal["queued", "running", "completed", "failed"] = "queued"
+    # approval priority, higher priority jobs are served first
+    priority: Literal["low", "normal", "high"] = "normal"
+    # delivery attempts so far, a job interrupted by a restart is delivered again
+    attempts: int = 0
+    # the running attempt was cut off by a restart, it is redelivered under
+    # the same idempotency key since n8n may have received it already
+    interrupted: bool = False
+    max_attempts: int = 3
+    enqueued_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    # time from enqueue to start, and the part of it spent in the bulkhead
+    queue_wait_ms: Optional[float] = None
+    bulkhead_wait_ms: Optional[float] = None
+    error: Optional[str] = None
+    # pre-execution checks that postponed the job, and their last decision
+    deferrals: int = 0
+    pre_execution: Optional[str] = None
+    # outcome of the pipeline once completed
+    execution_status: Optional[str] = None
+    verification_status: Optional[str] = None
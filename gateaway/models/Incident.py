@@ -0,0 +1,28 @@
+from typing import Dict, List, Optional, Literal, Any
+from pydantic import BaseModel, Field
+
+
+class Incident(BaseModel):
+    incident_id: str
+    namespace: Optional[str] = None
+    # target system and operation every member shares
+    system: Optional[str] = None
+    operation: Optional[str] = None
+    status: Literal["open", "approved", "rejected", "closed"] = "open"
+    created_at: str
+    updated_at: str
+    # first declaration of the incident, its risk assessment is shared by all members
+    lead_action_id: str
+    member_action_ids: List[str] = Field(default_factory=list)
+    # union of the members' context.related_entities, used to correlate new declarations
+    related_entities: List[str] = Field(default_factory=list)
+    risk_assessment: Optional[Dict[str, Any]] = None
+    explanation: Optional[str] = None
+
+
+class IncidentDecisionRequest(BaseModel):
+    approver: str
+    reason: str
+    decision: Literal["approved", "rejected"] = "approved"
+    # queue approved members for execution right away
+    execute: bool = False
@@ -0,0 +1,57 @@
+from typing import Dict, List, Optional, Literal, Union, Any
+from pydantic import BaseModel, Field
+
+# a single value or any of several values, None matches everything
+MatchValue = Optional[Union[str, List[str]]]
+
+
+class TimeWindow(BaseModel):
+    days: List[Literal["mon", "tue", "wed", "thu", "fri", "sat", "sun"]] = Field(
+        default_factory=lambda: ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+    )
+    # UTC hours, start inclusive and end exclusive, wraps around midnight when start > end
+    start_hour: int = Field(default=0, ge=0, le=23)
+    end_hour: int = Field(default=24, ge=1, le=24)
+
+
+class PolicyMatch(BaseModel):
+    namespace: MatchValue = None
+    service: MatchValue = None
+    system: MatchValue = None
+    operation: MatchValue = None
+    risk_level: MatchValue = None
+    # risk score range, min inclusive and max exclusive
+    risk_score_min: Optional[float] = None
+    risk_score_max: Optional[float] = None
+    time_windows: List[TimeWindow] = Field(default_factory=list)
+
+
+class PolicyDecision(BaseModel):
+    approval_type: Literal["auto_approve", "human_required"]
+    approvers: List[str]
+    # duration such as "30m", "4h" or "1d"
+    deadline: str = "24h"
+    priority: Literal["low", "normal", "high"] = "normal"
+    # pending approvals are escalated to these approvers after this duration
+    escalate_after: Optional[str] = None
+    escalation_approvers: List[str] = Field(default_factory=list)
+    # what happens when nobody decided before the deadline
+    on_expiry: Literal["reject", "expire"] = "reject"
+
+
+class PolicyRule(PolicyDecision):
+    name: str
+    match: PolicyMatch = Field(default_factory=PolicyMatch)
+
+
+class ApprovalPolicy(BaseModel):
+    version: str = "1"
+    default: PolicyDecision
+    # evaluated in order, the first matching rule wins
+    rules: List[PolicyRule] = Field(default_factory=list)
+
+
+class PolicyDryRunRequest(BaseModel):
+    # policy to evaluate, the active policy is used when omitted
+    policy: Optional[Dict[str, Any]] = None
+    limit: int = Field(default=1000, ge=1)
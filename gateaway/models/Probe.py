@@ -0,0 +1,22 @@
+from typing import Optional, Literal
+from pydantic import BaseModel, Field
+
+
+class ProbeSpec(BaseModel):
+    """A post-execution health probe, polled with backoff until it passes or its deadline expires"""
+    type: Literal["http", "uptime_kuma", "tcp"]
+    name: Optional[str] = None
+    # "service_health" probes the remediated service, "side_effects" its dependents
+    check: Literal["service_health", "side_effects"] = "service_health"
+    # http
+    url: Optional[str] = None
+    expected_status: int = 200
+    # tcp
+    host: Optional[str] = None
+    port: Optional[int] = None
+    # uptime_kuma, the status page the monitor is published on
+    monitor_id: Optional[int] = None
+    status_page: Optional[str] = None
+    deadline_seconds: float = Field(default=30, gt=0)
+    initial_interval: float = Field(default=0.5, gt=0)
+    max_interval: float = Field(default=5, gt=0)
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+
+
+class ProfilingRequest(BaseModel):
+    # share of requests profiled while profiling is on
+    sample_rate: float = Field(default=0.01, gt=0, le=1)
+    # profiling switches itself off after this long
+    duration_seconds: float = Field(default=300, gt=0, le=3600)
+    # drop the functions aggregated by the previous session
+    reset: bool = True
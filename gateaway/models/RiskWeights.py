@@ -0,0 +1,33 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class RiskWeights(BaseModel):
+    """
+    Tunable weights and thresholds of the rule-based risk scorer.
+    Defaults reproduce the original hardcoded fallback assessment.
+    """
+    production_weight: float = 0.4
+    staging_weight: float = 0.1
+    customer_facing_weight: float = 0.3
+    internal_service_weight: float = 0.1
+    business_hours_weight: float = 0.15
+    off_hours_weight: float = 0.05
+
+    # business hours are inclusive, in UTC
+    business_hours_start: int = Field(default=9, ge=0, le=23)
+    business_hours_end: int = Field(default=17, ge=0, le=23)
+    customer_facing_markers: List[str] = Field(default_factory=lambda: ["api", "gateway"])
+
+    high_threshold: float = 0.7
+    medium_threshold: float = 0.3
+    # scores above this always go to human review
+    review_threshold: float = 0.6
+
+    # medium risk actions are auto approved with a proven track record
+    history_success_rate: float = 0.95
+    history_min_count: int = 10
+
+    # contribution of the learned failure rate once enough outcomes were observed
+    learned_failure_weight: float = 0.2
+    learned_min_samples: int = 5
@@ -1,5 +1,5 @@
 from typing import Dict, List, Optional, Literal, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class ApprovalRequest(BaseModel):
     action_id: str
@@ -8,6 +8,14 @@ class ApprovalRequest(BaseModel):
     approvers: List[str]
     deadline: str
     priority: Literal["low", "normal", "high"]
+    # approval policy rule that produced this request, None for the policy default
+    policy_rule: Optional[str] = None
+    # absolute UTC timestamps enforced by the deadline scheduler
+    deadline_at: Optional[str] = None
+    escalate_at: Optional[str] = None
+    escalation_approvers: List[str] = Field(default_factory=list)
+    on_expiry: Literal["reject", "expire"] = "reject"
+    escalated_at: Optional[str] = None
 
 
 class ApprovalDecision(BaseModel):
@@ -24,4 +32,18 @@ class VerificationResult(BaseModel):
     timestamp: str
     overall_status: Literal["verified", "anomaly_detected", "verification_failed"]
     checks: List[Dict]
-    confidence: float
\ No newline at end of file
+    confidence: float
+    # wall time of all checks, probes run concurrently
+    duration_ms: Optional[float] = None
+
+
+class PreExecutionResult(BaseModel):
+    """Outcome of the pre-execution checks of an approved action"""
+    action_id: str
+    timestamp: str
+    # skip: target already recovered, defer: retry later, block: never dispatch
+    decision: Literal["proceed", "skip", "defer", "block"]
+    checks: List[Dict]
+    duration_ms: float
+    reason: Optional[str] = None
+    retry_after_seconds: Optional[float] = None
@@ -19,6 +19,13 @@ from .Audit import AuditEvent, AuditTrail
 from .enums import RiskLevel, Recommendation, ApprovalType, Decision, ExecutionStatus, VerificationStatus
 from .ExecutionResult import ApprovalDecision, ApprovalRequest
 from .RiskFactor import RiskFactor
-from .VerificationResult import VerificationResult 
-from .Action import RollbackAction
-from .ApprovalRequest import ManualApprovalRequest
\ No newline at end of file
+from .VerificationResult import VerificationResult, PreExecutionResult
+from .Action import RollbackAction, RollbackStep, RollbackRequest, CompensatingAction
+from .ApprovalRequest import ManualApprovalRequest, BulkApprovalRequest, ApprovalFilter
+from .RiskWeights import RiskWeights
+from .Policy import ApprovalPolicy, PolicyRule, PolicyMatch, PolicyDecision, TimeWindow, PolicyDryRunRequest
+from .ExecutionJob import ExecutionJob
+from .Bulkhead import BulkheadSettings, OperationLimits
+from .Incident import Incident, IncidentDecisionRequest
+from .Probe import ProbeSpec
+from .Profiling import ProfilingRequest
@@ -47,3 +47,5 @@ class ActionStatus(str, Enum):
     VERIFIED = "verified"
     DECLARED = "declared"
     ROLLED_BACK = "rolled_back"
+    EXPIRED = "expired"
+    SKIPPED = "skipped"
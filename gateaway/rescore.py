@@ -0,0 +1,80 @@
+"""
+Rescore the whole action history with tuned risk weights and report how many
+past actions would change risk bucket.
+
+Usage:
+    python rescore.py --db atp_store.db --set production_weight=0.5 --set high_threshold=0.75
+    python rescore.py --weights tuned_weights.json --json
+"""
+import argparse
+import json
+import time
+
+from models import RiskWeights
+from components.BatchRiskScorer import BatchRiskScorer, RiskColumns
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Batch rescore ATP action history")
+    parser.add_argument("--db", default="atp_store.db", help="Path to the ATP SQLite database")
+    parser.add_argument("--weights", help="JSON file with RiskWeights overrides")
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override a single weight, can be repeated"
+    )
+    parser.add_argument("--sample", type=int, default=10, help="Number of changed actions to list")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    return parser.parse_args()
+
+
+def load_weights(args) -> RiskWeights:
+    overrides = {}
+    if args.weights:
+        with open(args.weights) as f:
+            overrides.update(json.load(f))
+    for item in args.set:
+        key, _, value = item.partition("=")
+        overrides[key.strip()] = json.loads(value)
+    return RiskWeights(**overrides)
+
+
+def main():
+    args = parse_args()
+    weights = load_weights(args)
+
+    started = time.perf_counter()
+    columns = RiskColumns.from_database(args.db)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    report = BatchRiskScorer(weights).compare(columns, sample_size=args.sample)
+    report["load_time_ms"] = round(load_ms, 3)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    total = report["total_actions"]
+    print(f"Actions rescored:        {total}")
+    print(f"Risk level changed:      {report['level_changed']}")
+    print(f"Recommendation changed:  {report['recommendation_changed']}")
+    print(f"Mean risk score:         {report['mean_risk_score']['current']:.3f} -> {report['mean_risk_score']['rescored']:.3f}")
+    print(f"Load / score time:       {report['load_time_ms']:.1f} ms / {report['scoring_time_ms']:.1f} ms")
+    print("\nLevel transitions (current -> rescored):")
+    for old, targets in report["level_transitions"].items():
+        for new, count in targets.items():
+            print(f"  {old:>7} -> {new:<7} {count}")
+    if report["sample_changes"]:
+        print("\nSample changed actions:")
+        for change in report["sample_changes"]:
+            print(
+                f"  {change['action_id']}: "
+                f"{change['risk_level']['current']} -> {change['risk_level']['rescored']}, "
+                f"{change['recommendation']['current']} -> {change['recommendation']['rescored']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime
+
+# set before the components build their singletons: in-memory store, no LLM
+os.environ["ATP_DB_PATH"] = ""
+os.environ["OPENAI_API_KEY"] = ""
+os.environ["OPENAI_API_URL"] = "http://127.0.0.1:9/v1/chat/completions"
+os.environ["AUTOMATION_ENGINE_HIGH_RISK_WEBHOOK"] = "http://127.0.0.1:9/webhook/high"
+os.environ["AUTOMATION_ENGINE_LOW_RISK_WEBHOOK"] = "http://127.0.0.1:9/webhook/low"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from models import ActionDeclaration, ActionInitiator, ActionTarget
+
+
+def build_declaration(
+        service: str = "checkout-api",
+        namespace: str = "staging",
+        system: str = "kubernetes",
+        operation: str = "restart_service",
+        **context
+    ) -> ActionDeclaration:
+    return ActionDeclaration(
+        action_id=f"act_{uuid.uuid4().hex[:8]}",
+        workflow_id="wf_service_remediation_v1",
+        initiator=ActionInitiator(type="webhook", source="tests"),
+        timestamp=datetime.utcnow().isoformat(),
+        action_type="service.remediation",
+        target=ActionTarget(system=system, resource="deployment", operation=operation),
+        payload={},
+        context={"service": service, "namespace": namespace, **context}
+    )
+
+
+@pytest.fixture
+def declaration():
+    """Factory of declarations, keyword arguments beyond the target go to the context"""
+    return build_declaration
+
+
+@pytest.fixture
+def api():
+    """Calls the gateway in process, without running its lifespan"""
+    import httpx
+    import main
+
+    def call(method: str, url: str, **kwargs) -> httpx.Response:
+        async def send():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+                return await client.request(method, url, **kwargs)
+        return asyncio.run(send())
+    return call
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from components.AdmissionController import AdmissionController, AdmissionRejected
+
+
+async def hold(controller, declaration, order, release):
+    """Assess a declaration, holding its slot until release is set"""
+    try:
+        async with controller.admit(declaration) as llm:
+            order.append((declaration.context["service"], llm))
+            await release.wait()
+    except AdmissionRejected as e:
+        order.append((declaration.context["service"], e.reason))
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_declarations_below_the_limit_are_admitted_immediately(declaration):
+    controller = AdmissionController(max_in_flight=2)
+
+    async def run():
+        async with controller.admit(declaration()) as llm:
+            assert llm is True
+            assert controller.in_flight == 1
+        assert controller.in_flight == 0
+
+    asyncio.run(run())
+    assert controller.outcomes == {"admitted": 1, "deferred": 0, "rejected": 0}
+
+
+def test_production_and_high_priority_are_served_first(declaration):
+    controller = AdmissionController(max_in_flight=1)
+    order = []
+
+    async def run():
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, declaration(service="first"), order, release))]
+        await settle()
+        for service, namespace, priority in (
+            ("staging", "staging", "normal"),
+            ("production", "production", "normal"),
+            ("staging_high", "staging", "high"),
+            ("production_high", "production", "high"),
+        ):
+            tasks.append(asyncio.create_task(
+                hold(controller, declaration(service=service, namespace=namespace, priority=priority), order, release)
+            ))
+        await settle()
+        assert controller.queued == 4
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert [service for service, _ in order] == ["first", "production_high", "production", "staging_high", "staging"]
+    assert controller.in_flight == 0 and controller.queued == 0
+
+
+def test_full_queue_defers_production_and_rejects_the_rest(declaration):
+    controller = AdmissionController(max_in_flight=1, max_queue=1)
+    order = []
+
+    async def run():
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, declaration(service="first"), order, release))]
+        await settle()
+        tasks.append(asyncio.create_task(
+            hold(controller, declaration(service="queued", namespace="production"), order, release)
+        ))
+        await settle()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit(declaration(service="staging")):
+                pass
+        assert rejected.value.reason == "queue_full" and rejected.value.retry_after >= 1
+
+        async with controller.admit(declaration(service="production", namespace="production")) as llm:
+            assert llm is False
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert controller.outcomes == {"admitted": 2, "deferred": 1, "rejected": 1}
+
+
+def test_better_ranked_declaration_pushes_the_worst_waiter_out(declaration):
+    controller = AdmissionController(max_in_flight=1, max_queue=1)
+    order = []
+
+    async def run():
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, declaration(service="first"), order, release))]
+        await settle()
+        tasks.append(asyncio.create_task(hold(controller, declaration(service="staging"), order, release)))
+        await settle()
+        tasks.append(asyncio.create_task(
+            hold(controller, declaration(service="production", namespace="production"), order, release)
+        ))
+        await settle()
+        assert ("staging", "pushed_out") in order
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == [("first", True), ("staging", "pushed_out"), ("production", True)]
+
+
+def test_waiting_too_long_falls_back_in_fallback_mode(declaration):
+    controller = AdmissionController(max_in_flight=1, max_wait_seconds=0.05, overflow="fallback")
+    order = []
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(controller, declaration(service="first"), order, release))
+        await settle()
+        async with controller.admit(declaration(service="late")) as llm:
+            assert llm is False
+        release.set()
+        await holder
+
+    asyncio.run(run())
+    assert controller.outcomes["deferred"] == 1
+    assert controller.in_flight == 0 and controller.queued == 0
+
+
+def test_cancelled_waiter_gives_its_slot_back(declaration):
+    controller = AdmissionController(max_in_flight=1)
+    order = []
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(controller, declaration(service="first"), order, release))
+        await settle()
+        waiter = asyncio.create_task(hold(controller, declaration(service="gone"), order, release))
+        await settle()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        release.set()
+        await holder
+
+    asyncio.run(run())
+    assert controller.in_flight == 0 and controller.queued == 0
+    assert order == [("first", True)]
+
+
+def test_unknown_overflow_mode_is_refused():
+    with pytest.raises(ValueError):
+        AdmissionController(overflow="drop")
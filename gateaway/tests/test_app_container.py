@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from components.AppContainer import AppContainer
+from components.PolicyEngine import PolicyEngine
+
+
+class Recorder:
+    """Stands in for every component, records the calls in order"""
+
+    api_key = ""
+
+    def __init__(self, calls, name):
+        self.calls = calls
+        self.name = name
+
+    def open(self):
+        self.calls.append(f"{self.name}.open")
+
+    @property
+    def compiled(self):
+        self.calls.append(f"{self.name}.compiled")
+
+    def rebuild(self):
+        self.calls.append(f"{self.name}.rebuild")
+        return 0
+
+    async def start(self):
+        self.calls.append(f"{self.name}.start")
+        return 0
+
+    async def stop(self):
+        self.calls.append(f"{self.name}.stop")
+
+    async def close(self):
+        self.calls.append(f"{self.name}.close")
+
+    async def run(self):
+        await asyncio.Event().wait()
+
+    run_forever = watch = run
+
+
+def container(calls):
+    return AppContainer(*(
+        Recorder(calls, name) for name in (
+            "store", "risk_assessor", "execution_engine", "verification_engine", "execution_queue",
+            "risk_prior_learner", "policy_engine", "deadline_scheduler", "declaration_deduplicator",
+            "incident_correlator", "event_bus"
+        )
+    ))
+
+
+def test_indexes_are_rebuilt_before_serving():
+    calls = []
+
+    async def scenario():
+        app_container = container(calls)
+        await app_container.start()
+        # nothing of the warm-up ran yet, requests may come in from here on
+        served = list(calls)
+        await app_container._warmup_task
+        readiness = app_container.readiness()
+        await app_container.stop()
+        return served, readiness
+
+    served, readiness = asyncio.run(scenario())
+    assert served == [
+        "store.open",
+        "event_bus.rebuild",
+        "risk_prior_learner.rebuild",
+        "policy_engine.compiled",
+        "declaration_deduplicator.rebuild",
+        "incident_correlator.rebuild",
+        "deadline_scheduler.rebuild",
+        "execution_queue.start",
+    ]
+    assert readiness["ready"] is True
+    assert set(readiness["warmup"]) == {"execution_engine", "risk_assessor", "verification_engine", "background_loops"}
+
+
+def test_policy_is_loaded_on_first_use(tmp_path, capsys):
+    policy_path = tmp_path / "approval_policy.json"
+    policy_path.write_text(json.dumps({
+        "version": "7",
+        "default": {"approval_type": "human_required", "approvers": ["security_team"], "deadline": "1h"},
+        "rules": []
+    }))
+
+    engine = PolicyEngine(str(policy_path))
+    assert capsys.readouterr().out == ""
+
+    assert engine.compiled.version == "7"
+    assert "Loaded approval policy 7" in capsys.readouterr().out
+
+
+def test_missing_policy_file_keeps_the_builtin_policy(tmp_path):
+    engine = PolicyEngine(str(tmp_path / "missing.json"))
+    assert engine.compiled.source == "builtin"
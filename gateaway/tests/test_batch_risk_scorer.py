@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+
+from components.BatchRiskScorer import BatchRiskScorer, LEVELS, RECOMMENDATIONS, RiskColumns
+from components.OpenAIRiskAssestor import OpenAIRiskAssessor
+
+CASES = [
+    ("production", "checkout-api", 25, 0.99, None),
+    ("production", "batch-reporter", 0, 0.0, None),
+    ("staging", "checkout-api", 30, 0.95, (40, 2)),
+    ("staging", "batch-reporter", 2, 0.5, (1, 9)),
+    # below learned_min_samples, ignored
+    ("staging", "inventory-sync", 0, 0.0, (0, 3)),
+    ("development", "payments-web", 12, 0.9, (2, 6)),
+    (None, "inventory-sync", 0, 0.0, None),
+]
+
+
+def learned_prior(successes, failures):
+    return {"all_hours": {
+        "successes": successes,
+        "failures": failures,
+        "failure_rate": (failures + 1) / (successes + failures + 2)
+    }}
+
+
+def test_batch_scores_match_the_rule_based_fallback(declaration):
+    assessor = OpenAIRiskAssessor(api_key="")
+    hour = datetime.utcnow().hour
+    rows, expected = [], []
+    for namespace, service, count, success_rate, prior in CASES:
+        action = declaration(service=service, namespace=namespace)
+        similar = {"count": count, "success_rate": success_rate}
+        if prior:
+            similar["learned_prior"] = learned_prior(*prior)
+        assessment = asyncio.run(assessor._fallback_assessment(action, similar))
+        expected.append((assessment.risk_score, assessment.risk_level, assessment.recommendation))
+        successes, failures = prior or (0, 0)
+        rows.append((action.action_id, namespace, service, hour, count, success_rate, 0.0, None, None, successes, failures))
+
+    scored = BatchRiskScorer(assessor.weights).score(RiskColumns.from_rows(rows))
+    assert np.allclose(scored["risk_score"], [score for score, _, _ in expected])
+    assert [str(LEVELS[code]) for code in scored["level_codes"]] == [level for _, level, _ in expected]
+    assert [str(RECOMMENDATIONS[code]) for code in scored["recommendation_codes"]] == [rec for _, _, rec in expected]
+
+
+def test_compare_reports_the_actions_whose_bucket_changes():
+    columns = RiskColumns.from_rows([
+        ("act_1", "production", "checkout-api", 12, 0, 0.0, 0.9, "high", "human_review", 0, 0),
+        ("act_2", "staging", "batch-reporter", 3, 0, 0.0, 0.9, "high", "human_review", 0, 0),
+        ("act_3", "staging", "batch-reporter", 3, 0, 0.0, 0.1, None, None, 0, 0),
+    ])
+
+    report = BatchRiskScorer().compare(columns)
+    assert report["total_actions"] == 3
+    assert report["level_changed"] == 2
+    assert report["level_transitions"]["high"] == {"high": 1, "low": 1}
+    assert report["level_transitions"]["unknown"] == {"low": 1}
+    assert [change["action_id"] for change in report["sample_changes"]] == ["act_2", "act_3"]
+
+
+def test_learned_weights_change_the_rescored_history():
+    history = [{
+        "action": {"action_id": "act_1", "timestamp": "2026-01-05T03:00:00", "context": {
+            "namespace": "staging", "service": "batch-reporter"
+        }},
+        "risk_assessment": {"similar_actions": {"count": 0, "success_rate": 0.0, "learned_prior": learned_prior(0, 8)}}
+    }]
+    columns = RiskColumns.from_history(history)
+    baseline = BatchRiskScorer().score(columns)["risk_score"][0]
+
+    weights = OpenAIRiskAssessor(api_key="").weights.model_copy(update={"learned_failure_weight": 0.5})
+    assert BatchRiskScorer(weights).score(columns)["risk_score"][0] > baseline
+    weights = weights.model_copy(update={"learned_min_samples": 9})
+    assert BatchRiskScorer(weights).score(columns)["risk_score"][0] < baseline
@@ -0,0 +1,38 @@
+import uuid
+
+import main
+from models import ActionStatus
+
+
+def stored_action(declaration, namespace, status):
+    action = declaration(namespace=namespace)
+    main.store.store_action(action)
+    main.store.update_action_status(action.action_id, status)
+    return action.action_id
+
+
+def test_filter_selects_pending_actions_by_status(declaration, api):
+    namespace = f"storm-{uuid.uuid4().hex[:6]}"
+    awaiting = stored_action(declaration, namespace, ActionStatus.PENDING_APPROVAL)
+    declared = stored_action(declaration, namespace, ActionStatus.DECLARED)
+
+    response = api("POST", "/atp/v1/actions/approve/bulk", json={
+        "filter": {"namespace": namespace, "status": "pending_approval"},
+        "approver": "oncall",
+        "reason": "incident storm"
+    })
+
+    assert response.status_code == 200
+    assert response.json()["processed"] == 1
+    assert main.store.approvals[awaiting].approver == "oncall"
+    assert declared not in main.store.approvals
+
+
+def test_filter_refuses_statuses_that_take_no_decision(api):
+    response = api("POST", "/atp/v1/actions/approve/bulk", json={
+        "filter": {"status": "executed"},
+        "approver": "oncall",
+        "reason": "incident storm"
+    })
+
+    assert response.status_code == 422
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+
+from components.Bulkhead import Bulkhead, PrioritySemaphore
+from models import BulkheadSettings, OperationLimits
+
+
+def action(operation: str, service: str = "checkout-api", namespace: str = "production"):
+    return {
+        "target": {"system": "kubernetes", "resource": "deployment", "operation": operation},
+        "context": {"service": service, "namespace": namespace}
+    }
+
+
+def test_operation_limit_applies_whichever_operation_came_first():
+    bulkhead = Bulkhead(BulkheadSettings(
+        target_concurrency=2,
+        rate_per_minute=600,
+        burst=10,
+        operations={"restart_service": OperationLimits(target_concurrency=1)}
+    ))
+    running = []
+
+    async def execute(operation: str, hold: asyncio.Event):
+        async with bulkhead.admit(action(operation)):
+            running.append(operation)
+            await hold.wait()
+
+    async def scenario():
+        hold = asyncio.Event()
+        # a default operation opens the target's slots with the default limit of 2
+        first = asyncio.create_task(execute("scale", hold))
+        await asyncio.sleep(0)
+        restart = asyncio.create_task(execute("restart_service", hold))
+        await asyncio.sleep(0.01)
+        admitted_while_busy = list(running)
+        hold.set()
+        await asyncio.gather(first, restart)
+        return admitted_while_busy
+
+    assert asyncio.run(scenario()) == ["scale"]
+
+
+def test_semaphore_serves_waiters_in_priority_order_within_their_limit():
+    async def scenario():
+        semaphore = PrioritySemaphore(2)
+        order = []
+        await semaphore.acquire()
+        await semaphore.acquire()
+
+        async def waiter(name, rank, limit=None):
+            await semaphore.acquire(rank, limit)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(waiter("low", 2)),
+            asyncio.create_task(waiter("high_capped", 0, limit=1)),
+            asyncio.create_task(waiter("normal", 1)),
+        ]
+        await asyncio.sleep(0)
+        semaphore.release()
+        await asyncio.sleep(0)
+        # one slot in use: the capped high priority waiter holds back the others
+        assert order == []
+        semaphore.release()
+        await asyncio.sleep(0)
+        # the capped waiter takes the free slot, the next one fits under the default limit
+        assert order == ["high_capped", "normal"]
+        semaphore.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["high_capped", "normal", "low"]
+
+
+def test_rate_limit_throttles_beyond_the_burst():
+    bulkhead = Bulkhead(BulkheadSettings(rate_per_minute=60, burst=1))
+
+    async def twice():
+        waits = []
+        for _ in range(2):
+            async with bulkhead.admit(action("restart_service")) as wait_ms:
+                waits.append(wait_ms)
+        return waits
+
+    waits = asyncio.run(twice())
+    assert waits[0] < 100 and waits[1] >= 900
+    assert bulkhead.throttled == 1
+
+
+def test_cancelled_head_waiter_lets_the_next_one_in():
+    async def scenario():
+        semaphore = PrioritySemaphore(2)
+        order = []
+        await semaphore.acquire()
+
+        async def waiter(name, rank, limit=None):
+            await semaphore.acquire(rank, limit)
+            order.append(name)
+
+        # the capped head waiter holds back the one behind it
+        capped = asyncio.create_task(waiter("capped", 0, limit=1))
+        behind = asyncio.create_task(waiter("behind", 1))
+        await asyncio.sleep(0)
+        assert order == []
+        capped.cancel()
+        await asyncio.gather(capped, return_exceptions=True)
+        await asyncio.sleep(0)
+        await asyncio.wait_for(behind, 1)
+        return order, semaphore
+
+    order, semaphore = asyncio.run(scenario())
+    assert order == ["behind"]
+    assert semaphore.in_use == 2 and semaphore.waiting == 0
+
+
+def test_cancelled_execution_does_not_leave_its_slots_behind():
+    bulkhead = Bulkhead(BulkheadSettings(target_concurrency=1, rate_per_minute=600, burst=10))
+
+    async def execute():
+        async with bulkhead.admit(action("restart_service")):
+            pass
+
+    async def scenario():
+        waiting = asyncio.create_task(execute())
+        async with bulkhead.admit(action("restart_service")):
+            await asyncio.sleep(0)
+        # the slot was handed over, the waiter is cancelled before it runs
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert bulkhead.stats()["busy"] == {}
+
+
+def test_throttled_target_does_not_hold_its_namespace():
+    bulkhead = Bulkhead(BulkheadSettings(
+        namespace_concurrency=1,
+        rate_per_minute=600,
+        burst=10,
+        operations={"restart_service": OperationLimits(rate_per_minute=6, burst=1)}
+    ))
+    order = []
+
+    async def execute(operation, service):
+        async with bulkhead.admit(action(operation, service=service)):
+            order.append(service)
+
+    async def scenario():
+        async with bulkhead.admit(action("restart_service")):
+            pass
+        # out of tokens for ten seconds
+        throttled = asyncio.create_task(execute("restart_service", "checkout-api"))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(execute("scale", "payments-api"), 1)
+        throttled.cancel()
+        await asyncio.gather(throttled, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert order == ["payments-api"]
+
+
+def test_shipped_overrides_name_real_operations():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bulkhead.json")
+    with open(path) as f:
+        operations = json.load(f)["operations"]
+    assert "restart_service" in operations
+    assert Bulkhead.from_file(path).limits("restart_service")["target_concurrency"] == 1
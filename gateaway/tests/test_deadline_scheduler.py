@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import main
+from components.ATPStore import ATPStore
+from components.DeadlineScheduler import DeadlineScheduler
+from models.VerificationResult import ApprovalRequest
+
+
+def pending_action(store, declaration, on_expiry="reject", deadline_in=0.0, escalate_in=None):
+    action = declaration()
+    now = datetime.utcnow()
+    action.approval_request = ApprovalRequest(
+        action_id=action.action_id,
+        risk_score=0.8,
+        approval_type="human_required",
+        approvers=["oncall"],
+        deadline="1 hour",
+        priority="normal",
+        deadline_at=(now + timedelta(seconds=deadline_in)).isoformat(),
+        escalate_at=(now + timedelta(seconds=escalate_in)).isoformat() if escalate_in is not None else None,
+        escalation_approvers=["sre-lead"],
+        on_expiry=on_expiry
+    )
+    store.store_action(action)
+    return action
+
+
+def run_for(scheduler, seconds):
+    async def run():
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(seconds)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(run())
+
+
+def test_due_deadline_rejects_or_expires_the_action(declaration):
+    store = ATPStore()
+    scheduler = DeadlineScheduler(store)
+    rejected = pending_action(store, declaration, on_expiry="reject")
+    expired = pending_action(store, declaration, on_expiry="expire")
+    later = pending_action(store, declaration, deadline_in=3600)
+    for action in (rejected, expired, later):
+        scheduler.schedule_approval(action.action_id, action.approval_request.dict())
+
+    run_for(scheduler, 0.05)
+
+    assert store.approvals[rejected.action_id].decision == "rejected"
+    assert store.actions[expired.action_id]["status"] == "expired"
+    assert scheduler.is_pending(later.action_id)
+    assert scheduler.fired["expire"] == 2
+
+
+def test_escalation_adds_approvers_and_raises_priority(declaration):
+    store = ATPStore()
+    scheduler = DeadlineScheduler(store)
+    action = pending_action(store, declaration, deadline_in=3600, escalate_in=0)
+    scheduler.schedule_approval(action.action_id, action.approval_request.dict())
+
+    run_for(scheduler, 0.05)
+
+    request = store.actions[action.action_id]["approval_request"]
+    assert request["approvers"] == ["oncall", "sre-lead"]
+    assert request["priority"] == "high"
+    assert scheduler.is_pending(action.action_id)
+
+
+def test_cancelled_deadline_never_fires(declaration):
+    store = ATPStore()
+    scheduler = DeadlineScheduler(store)
+    action = pending_action(store, declaration)
+    scheduler.schedule_approval(action.action_id, action.approval_request.dict())
+    scheduler.cancel(action.action_id)
+
+    run_for(scheduler, 0.05)
+
+    assert scheduler.is_pending(action.action_id)
+    assert scheduler.fired["expire"] == 0
+
+
+def test_approve_refuses_actions_whose_deadline_passed(declaration, api):
+    action = pending_action(main.store, declaration, on_expiry="expire")
+    main.deadline_scheduler._fire(action.action_id, "expire")
+    assert main.store.actions[action.action_id]["status"] == "expired"
+
+    response = api("POST", "/atp/v1/actions/approve", json={
+        "action_id": action.action_id, "approver": "oncall", "reason": "late"
+    })
+
+    assert response.status_code == 409
+    assert action.action_id not in main.store.approvals
+
+
+def test_approve_records_the_decision_of_a_pending_action(declaration, api):
+    action = pending_action(main.store, declaration, deadline_in=3600)
+
+    response = api("POST", "/atp/v1/actions/approve", json={
+        "action_id": action.action_id, "approver": "oncall", "reason": "looks safe"
+    })
+
+    assert response.status_code == 200
+    assert main.store.approvals[action.action_id].approver == "oncall"
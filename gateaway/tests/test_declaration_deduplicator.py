@@ -0,0 +1,124 @@
+import asyncio
+
+from components.ATPStore import ATPStore
+from components.DeclarationDeduplicator import DeclarationDeduplicator
+from models import ActionStatus
+
+
+def declared(store, deduplicator, declaration, idempotency_key=None):
+    """Declare a new action the way the declare endpoint does"""
+    existing_id, fingerprint, _ = deduplicator.check(declaration, idempotency_key)
+    assert existing_id is None
+    deduplicator.register(fingerprint, declaration.action_id, idempotency_key)
+    declaration.idempotency_key = idempotency_key
+    store.store_action(declaration)
+    return fingerprint
+
+
+def test_repeat_of_an_open_action_is_folded_into_it(declaration):
+    store = ATPStore()
+    deduplicator = DeclarationDeduplicator(store)
+    first = declaration()
+    declared(store, deduplicator, first)
+
+    repeat = declaration()
+    existing_id, fingerprint, reason = deduplicator.check(repeat)
+    assert (existing_id, reason) == (first.action_id, "fingerprint")
+    assert deduplicator.fold(existing_id, fingerprint, reason, repeat) == 1
+
+    assert deduplicator.check(declaration(service="payments-api"))[0] is None
+    folded = [entry for entry in store.audit_logs[first.action_id] if entry["event"] == "declaration_folded"]
+    assert folded[0]["data"]["folded_count"] == 1
+
+
+def test_repeat_of_a_finished_action_starts_a_new_one(declaration):
+    store = ATPStore()
+    deduplicator = DeclarationDeduplicator(store)
+    first = declaration()
+    declared(store, deduplicator, first)
+
+    store.update_action_status(first.action_id, ActionStatus.EXECUTED)
+    assert deduplicator.check(declaration())[0] is None
+
+
+def test_repeat_outside_the_window_starts_a_new_one(declaration):
+    store = ATPStore()
+    deduplicator = DeclarationDeduplicator(store, window_seconds=0)
+    declared(store, deduplicator, declaration())
+
+    assert deduplicator.check(declaration())[0] is None
+
+
+def test_idempotency_key_lands_on_its_action_even_once_finished(declaration):
+    store = ATPStore()
+    deduplicator = DeclarationDeduplicator(store)
+    first = declaration()
+    declared(store, deduplicator, first, idempotency_key="alert-42")
+    store.update_action_status(first.action_id, ActionStatus.EXECUTED)
+
+    existing_id, _, reason = deduplicator.check(declaration(service="payments-api"), "alert-42")
+    assert (existing_id, reason) == (first.action_id, "idempotency_key")
+
+
+def test_released_claims_do_not_fold_later_declarations(declaration):
+    store = ATPStore()
+    deduplicator = DeclarationDeduplicator(store)
+    failed = declaration()
+    _, fingerprint, _ = deduplicator.check(failed, "alert-42")
+    deduplicator.register(fingerprint, failed.action_id, "alert-42")
+
+    deduplicator.release(fingerprint, failed.action_id, "alert-42")
+    assert deduplicator.check(declaration(), "alert-42")[0] is None
+
+
+def test_rebuild_restores_open_actions_and_keys_from_the_store(declaration):
+    store = ATPStore()
+    first = declaration()
+    declared(store, DeclarationDeduplicator(store), first, idempotency_key="alert-42")
+    closed = declaration(service="payments-api")
+    declared(store, DeclarationDeduplicator(store), closed)
+    store.update_action_status(closed.action_id, ActionStatus.EXECUTED)
+
+    deduplicator = DeclarationDeduplicator(store)
+    assert deduplicator.rebuild() == 1
+    assert deduplicator.check(declaration())[0] == first.action_id
+    assert deduplicator.check(declaration(service="payments-api"))[0] is None
+    assert deduplicator.check(declaration(service="other"), "alert-42")[0] == first.action_id
+
+
+def test_repeat_of_a_declaration_being_assessed_waits_until_it_is_stored(declaration):
+    store = ATPStore()
+    deduplicator = DeclarationDeduplicator(store)
+    first = declaration()
+
+    async def scenario():
+        _, fingerprint, _ = deduplicator.check(first)
+        deduplicator.register(fingerprint, first.action_id)
+        existing_id, _, _ = deduplicator.check(declaration())
+        assert existing_id == first.action_id
+        repeat = asyncio.create_task(deduplicator.settled(existing_id))
+        await asyncio.sleep(0)
+        assert not repeat.done()
+        store.store_action(first)
+        deduplicator.stored(first.action_id)
+        return await repeat
+
+    assert asyncio.run(scenario()) is True
+    assert asyncio.run(deduplicator.settled(first.action_id)) is True
+
+
+def test_repeat_of_a_failed_declaration_is_declared_on_its_own(declaration):
+    store = ATPStore()
+    deduplicator = DeclarationDeduplicator(store)
+    failed = declaration()
+
+    async def scenario():
+        _, fingerprint, _ = deduplicator.check(failed, "alert-42")
+        deduplicator.register(fingerprint, failed.action_id, "alert-42")
+        repeat = asyncio.create_task(deduplicator.settled(failed.action_id))
+        await asyncio.sleep(0)
+        deduplicator.release(fingerprint, failed.action_id, "alert-42")
+        return await repeat
+
+    assert asyncio.run(scenario()) is False
+    assert deduplicator.check(declaration(), "alert-42")[0] is None
@@ -0,0 +1,135 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import main
+from components.AdmissionController import AdmissionController
+from models import RiskAssessment
+from models.VerificationResult import ApprovalRequest
+
+
+def assessed(declaration, approval_type: str, recommendation: str):
+    action = declaration()
+    action.approval_request = ApprovalRequest(
+        action_id=action.action_id,
+        risk_score=0.2,
+        approval_type=approval_type,
+        approvers=[],
+        deadline="",
+        priority="low"
+    )
+    risk = RiskAssessment(
+        action_id=action.action_id,
+        timestamp=datetime.utcnow().isoformat(),
+        risk_score=0.2,
+        risk_level="low",
+        risk_factors=[],
+        similar_actions={"count": 0},
+        recommendation=recommendation,
+        confidence=0.9
+    )
+    return action, risk
+
+
+@pytest.mark.parametrize("recommendation", ["human_review", "reject"])
+def test_auto_approve_policy_needs_an_auto_approve_recommendation(declaration, recommendation):
+    action, risk = assessed(declaration, "auto_approve", recommendation)
+    assert main.persist_declaration(action, risk) is False
+    assert action.action_id not in main.store.approvals
+
+
+def test_auto_approved_declaration_records_a_system_approval(declaration):
+    action, risk = assessed(declaration, "auto_approve", "auto_approve")
+    assert main.persist_declaration(action, risk) is main.AUTO_EXECUTE_ENABLED
+    if main.AUTO_EXECUTE_ENABLED:
+        assert main.store.approvals[action.action_id].approver == "system"
+
+
+def test_human_required_policy_is_never_auto_executed(declaration):
+    action, risk = assessed(declaration, "human_required", "auto_approve")
+    assert main.persist_declaration(action, risk) is False
+
+
+def declaration_body(compensating_actions):
+    return {
+        "action_id": "ignored",
+        "workflow_id": "wf",
+        "initiator": {"type": "webhook", "source": "tests"},
+        "timestamp": datetime.utcnow().isoformat(),
+        "action_type": "service.remediation",
+        "target": {"system": "kubernetes", "resource": "deployment", "operation": "restart_service"},
+        "payload": {},
+        "context": {"service": "checkout-api", "namespace": "staging"},
+        "compensating_actions": compensating_actions
+    }
+
+
+def compensating(step_id, *depends_on):
+    return {
+        "step_id": step_id,
+        "target": {"system": "kubernetes", "resource": "deployment", "operation": "rollback"},
+        "depends_on": list(depends_on)
+    }
+
+
+def test_declare_rejects_a_cyclic_rollback_plan(api):
+    response = api("POST", "/atp/v1/actions/declare", json=declaration_body(
+        [compensating("a", "b"), compensating("b", "a")]
+    ))
+    assert response.status_code == 422
+    assert "cycle" in response.json()["detail"]
+
+
+def test_bulk_declare_marks_an_unknown_rollback_dependency_invalid(api):
+    response = api("POST", "/atp/v1/actions/declare/bulk", json=[
+        declaration_body([compensating("a", "missing")])
+    ])
+    line = response.json()
+    assert line["status"] == "invalid"
+    assert "unknown steps" in line["error"]
+
+
+def test_bulk_declare_streams_one_line_per_declaration(api):
+    body = declaration_body([])
+    body["context"]["service"] = "bulk-ndjson"
+    lines = [json.dumps(body), "{broken", json.dumps(body), json.dumps({"workflow_id": "wf"})]
+    response = api(
+        "POST", "/atp/v1/actions/declare/bulk",
+        content="\n".join(lines), headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+    assert sorted(results) == [0, 1, 2, 3]
+    assert results[0]["status"] == "declared"
+    assert results[1]["status"] == "invalid" and "Invalid JSON" in results[1]["error"]
+    # the repeat of the same declaration folds into the open action
+    assert results[2]["status"] == "folded"
+    assert results[2]["action_id"] == results[0]["action_id"]
+    assert results[3]["status"] == "invalid"
+
+
+def saturated(**kwargs):
+    """An admission controller whose only slot is taken"""
+    controller = AdmissionController(max_in_flight=1, max_queue=0, **kwargs)
+    controller.in_flight = 1
+    return controller
+
+
+def test_bulk_declare_items_rejected_by_admission_get_a_retry_hint(api, monkeypatch):
+    monkeypatch.setattr(main, "admission_controller", saturated(overflow="reject"))
+    body = declaration_body([])
+    body["context"]["service"] = "bulk-rejected"
+    response = api("POST", "/atp/v1/actions/declare/bulk", json=[body])
+    line = response.json()
+    assert line["status"] == "rejected" and line["retry_after"] >= 1
+    assert main.admission_controller.outcomes["rejected"] == 1
+
+
+def test_bulk_declare_items_deferred_by_admission_use_the_fallback_scorer(api, monkeypatch):
+    monkeypatch.setattr(main, "admission_controller", saturated(overflow="fallback"))
+    body = declaration_body([])
+    body["context"]["service"] = "bulk-deferred"
+    response = api("POST", "/atp/v1/actions/declare/bulk", json=[body])
+    assert response.json()["status"] == "declared"
+    assert main.admission_controller.outcomes["deferred"] == 1
@@ -0,0 +1,81 @@
+from components.ATPStore import ATPStore
+from components.EventBus import EventBus
+
+
+def frames(subscriber):
+    received = []
+    while not subscriber.queue.empty():
+        received.append(subscriber.queue.get_nowait())
+    return received
+
+
+def test_lifecycle_events_are_streamed_in_order(declaration):
+    store = ATPStore()
+    bus = EventBus(store)
+    subscriber = bus.subscribe()
+
+    action = declaration()
+    store.store_action(action)
+    store.update_action_status(action.action_id, "approved")
+
+    received = frames(subscriber)
+    assert [frame.split("\n")[0] for frame in received] == ["id: 1", "id: 2"]
+    assert '"event":"action_declared"' in received[0] and '"status":"approved"' in received[1]
+
+
+def test_internal_events_are_not_streamed(declaration):
+    store = ATPStore()
+    bus = EventBus(store)
+    subscriber = bus.subscribe()
+    action = declaration()
+    store.store_action(action)
+
+    store.audit_log(action.action_id, "trace", {"trace_id": "abc", "spans": []})
+
+    assert len(frames(subscriber)) == 1
+    assert bus.sequence == 1
+
+
+def test_reconnecting_client_resumes_after_its_last_event_id(declaration):
+    store = ATPStore()
+    bus = EventBus(store)
+    for _ in range(3):
+        store.store_action(declaration())
+
+    resumed = bus.subscribe(last_event_id=1)
+    assert not resumed.gap
+    assert [frame.split("\n")[0] for frame in frames(resumed)] == ["id: 2", "id: 3"]
+
+
+def test_slow_subscriber_is_evicted(declaration):
+    store = ATPStore()
+    bus = EventBus(store, queue_size=2)
+    subscriber = bus.subscribe()
+
+    for _ in range(3):
+        store.store_action(declaration())
+
+    assert subscriber.evicted
+    assert bus.evictions == 1 and bus.stats()["subscribers"] == 0
+
+
+def test_ids_continue_after_a_restart(declaration, tmp_path):
+    db_path = str(tmp_path / "atp.db")
+    store = ATPStore(db_path)
+    store.open()
+    bus = EventBus(store)
+    for _ in range(3):
+        store.store_action(declaration())
+    assert bus.sequence == 3
+
+    restarted = ATPStore(db_path)
+    restarted_bus = EventBus(restarted)
+    restarted.open()
+    assert restarted_bus.rebuild() == 3
+    for _ in range(3):
+        restarted.store_action(declaration())
+
+    # event 3 was published by the previous process, it is not in the history
+    resumed = restarted_bus.subscribe(last_event_id=2)
+    assert resumed.gap
+    assert restarted_bus.subscribe(last_event_id=4).gap is False
@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+from components.ExecutionEngine import ExecutionEngine
+
+WEBHOOK = "http://n8n.test/webhook/low"
+
+
+def engine_with(handler, **kwargs):
+    engine = ExecutionEngine("http://n8n.test/webhook/high", WEBHOOK, backoff_base=0, **kwargs)
+    engine._clients[WEBHOOK] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return engine
+
+
+def execute(engine, declaration, **kwargs):
+    declared = declaration()
+    action = SimpleNamespace(
+        action_id=declared.action_id,
+        workflow_id=declared.workflow_id,
+        target=declared.target,
+        payload=declared.payload,
+        context=declared.context,
+        risk_assessment=SimpleNamespace(risk_level="low")
+    )
+    approval = SimpleNamespace(approver="oncall", timestamp="2026-01-01T00:00:00")
+
+    async def run():
+        try:
+            return await engine.execute(action, approval, **kwargs)
+        finally:
+            await engine.close()
+    return asyncio.run(run())
+
+
+def test_retries_carry_the_same_idempotency_key(declaration):
+    keys = []
+
+    def handler(request):
+        keys.append(request.headers["Idempotency-Key"])
+        return httpx.Response(503 if len(keys) == 1 else 200, json={"ok": True})
+
+    engine = engine_with(handler)
+    result = execute(engine, declaration, attempt=2, idempotency_key="job_1:2")
+
+    assert result.status == "success" and result.requests == 2
+    assert keys == ["job_1:2", "job_1:2"] and result.idempotency_key == "job_1:2"
+    assert engine.metrics["low_risk"].retries == 1
+
+
+def test_client_errors_are_not_retried(declaration):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(400, json={"error": "bad payload"})
+
+    result = execute(engine_with(handler), declaration)
+    assert result.status == "failure" and result.requests == 1 and len(requests) == 1
+    assert result.idempotency_key.endswith(":1")
+
+
+def test_network_errors_give_up_after_max_retries(declaration):
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    engine = engine_with(handler, max_retries=2)
+    result = execute(engine, declaration)
+    assert result.status == "failure" and result.requests == 3
+    assert "connection refused" in result.result["error"]
+    assert engine.metrics["low_risk"].snapshot()["errors"] == 3
+
+
+
+def test_webhook_client_is_pooled_until_closed():
+    engine = ExecutionEngine("http://n8n.test/webhook/high", WEBHOOK)
+
+    async def run():
+        await engine.start()
+        client = engine._client(WEBHOOK)
+        assert engine._client(WEBHOOK) is client and len(engine._clients) == 2
+        await engine.close()
+        return client
+
+    assert asyncio.run(run()).is_closed
+    assert engine._clients == {}
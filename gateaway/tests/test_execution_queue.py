@@ -0,0 +1,169 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from components.ATPStore import ATPStore
+from components.Bulkhead import Bulkhead
+from components.ExecutionQueue import ExecutionQueue
+from models import ActionStatus, BulkheadSettings, ExecutionJob, PreExecutionResult
+
+
+class RecordingPipeline:
+    """Records the idempotency key of every delivery, fails the first `failures` of them"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.keys = []
+
+    async def run(self, action_id, attempt=1, idempotency_key=None):
+        self.keys.append(idempotency_key)
+        if len(self.keys) <= self.failures:
+            raise RuntimeError("n8n unavailable")
+        return (
+            SimpleNamespace(status="failure", idempotency_key=idempotency_key),
+            SimpleNamespace(overall_status="verification_failed")
+        )
+
+
+class Proceed:
+    def __init__(self, error: Exception = None, decision: str = "proceed"):
+        self.error = error
+        self.decision = decision
+
+    async def check(self, action_id):
+        if self.error is not None:
+            raise self.error
+        return PreExecutionResult(
+            action_id=action_id,
+            timestamp=datetime.utcnow().isoformat(),
+            decision=self.decision,
+            checks=[],
+            duration_ms=0.0,
+            reason=None if self.decision == "proceed" else "Target already recovered"
+        )
+
+    def release(self, action_id):
+        pass
+
+    def stats(self):
+        return {}
+
+
+def queue(store, pipeline, pre_execution=None):
+    return ExecutionQueue(store, pipeline, Bulkhead(BulkheadSettings()), pre_execution or Proceed(), workers=2)
+
+
+async def drain(execution_queue):
+    while execution_queue._tasks:
+        await asyncio.gather(*list(execution_queue._tasks))
+
+
+def stored_action(store, declaration):
+    action = declaration()
+    store.store_action(action)
+    return action.action_id
+
+
+def test_interrupted_attempt_is_redelivered_under_its_key(declaration):
+    store = ATPStore()
+    action_id = stored_action(store, declaration)
+    store.store_execution_job(ExecutionJob(
+        job_id="job_interrupted",
+        action_id=action_id,
+        status="running",
+        attempts=1,
+        enqueued_at=datetime.utcnow().isoformat()
+    ))
+    pipeline = RecordingPipeline()
+    execution_queue = queue(store, pipeline)
+
+    async def restart():
+        assert await execution_queue.start() == 1
+        await drain(execution_queue)
+
+    asyncio.run(restart())
+    assert pipeline.keys == ["job_interrupted:1"]
+    job = store.execution_jobs["job_interrupted"]
+    assert job.status == "completed" and job.attempts == 1 and not job.interrupted
+
+
+def test_retries_and_new_jobs_of_an_action_get_new_keys(declaration):
+    store = ATPStore()
+    action_id = stored_action(store, declaration)
+    pipeline = RecordingPipeline(failures=1)
+    execution_queue = queue(store, pipeline)
+
+    async def run_twice():
+        await execution_queue.start()
+        first = execution_queue.enqueue(action_id)
+        await drain(execution_queue)
+        second = execution_queue.enqueue(action_id)
+        await drain(execution_queue)
+        return first, second
+
+    first, second = asyncio.run(run_twice())
+    assert first.job_id != second.job_id
+    assert pipeline.keys == [f"{first.job_id}:1", f"{first.job_id}:2", f"{second.job_id}:1"]
+    assert len(set(pipeline.keys)) == 3
+
+
+def test_job_failing_outside_the_pipeline_frees_its_action(declaration):
+    store = ATPStore()
+    action_id = stored_action(store, declaration)
+    pipeline = RecordingPipeline()
+    pre_execution = Proceed(error=RuntimeError("health probe crashed"))
+    execution_queue = queue(store, pipeline, pre_execution)
+
+    async def run():
+        await execution_queue.start()
+        failed = execution_queue.enqueue(action_id)
+        await drain(execution_queue)
+        pre_execution.error = None
+        retried = execution_queue.enqueue(action_id)
+        await drain(execution_queue)
+        return failed, retried
+
+    failed, retried = asyncio.run(run())
+    assert failed.status == "failed" and "health probe crashed" in failed.error
+    assert retried.job_id != failed.job_id and retried.status == "completed"
+    assert execution_queue._active == {}
+    assert [entry["event"] for entry in store.audit_logs[action_id]].count("execution_error") == 1
+
+
+def test_pipeline_failures_are_retried_up_to_max_attempts(declaration):
+    store = ATPStore()
+    action_id = stored_action(store, declaration)
+    pipeline = RecordingPipeline(failures=10)
+    execution_queue = queue(store, pipeline)
+
+    async def run():
+        await execution_queue.start()
+        job = execution_queue.enqueue(action_id)
+        await drain(execution_queue)
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == "failed" and job.attempts == job.max_attempts == 3
+    assert len(pipeline.keys) == 3
+    assert execution_queue._active == {}
+
+
+def test_skipped_job_leaves_the_action_in_a_terminal_status(declaration):
+    store = ATPStore()
+    action_id = stored_action(store, declaration)
+    store.update_action_status(action_id, ActionStatus.APPROVED)
+    pipeline = RecordingPipeline()
+    execution_queue = queue(store, pipeline, Proceed(decision="skip"))
+
+    async def run():
+        await execution_queue.start()
+        job = execution_queue.enqueue(action_id)
+        await drain(execution_queue)
+        return job
+
+    job = asyncio.run(run())
+    assert pipeline.keys == []
+    assert job.status == "completed" and job.execution_status == "skipped"
+    assert store.actions[action_id]["status"] == ActionStatus.SKIPPED
+    skipped = [entry for entry in store.audit_logs[action_id] if entry["event"] == "execution_skipped"]
+    assert skipped and skipped[0]["data"]["reason"] == "Target already recovered"
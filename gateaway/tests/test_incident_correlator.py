@@ -0,0 +1,170 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from components.ATPStore import ATPStore
+from components.IncidentCorrelator import IncidentCorrelator
+from models import RiskAssessment
+
+
+class ScoredAssessor:
+    """Scores declarations from a table of service -> risk score"""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.calls = []
+
+    async def assess_risk(self, action, llm=True):
+        self.calls.append((action.context["service"], llm))
+        score = self.scores[action.context["service"]]
+        return RiskAssessment(
+            action_id=action.action_id,
+            timestamp=datetime.utcnow().isoformat(),
+            risk_score=score,
+            risk_level="low" if score < 0.4 else "medium" if score < 0.7 else "high",
+            risk_factors=[],
+            similar_actions={"count": 0},
+            recommendation="auto_approve" if score < 0.4 else "human_review",
+            confidence=0.8
+        )
+
+
+def correlator(scores):
+    return IncidentCorrelator(ATPStore(), ScoredAssessor(scores))
+
+
+def test_declarations_without_dependency_hints_are_not_correlated(declaration):
+    incidents = correlator({})
+    lead, leads = incidents.correlate(declaration("internal-cron"))
+    other, other_leads = incidents.correlate(declaration("payment-api"))
+    assert lead is None and leads
+    assert other is None and other_leads
+
+
+def test_shared_hint_on_same_target_and_operation_joins_the_incident(declaration):
+    incidents = correlator({})
+    lead, _ = incidents.correlate(declaration("checkout-api", related_entities=["db:orders"]))
+    member, leads = incidents.correlate(declaration("checkout-worker", related_entities=["db:orders"]))
+    assert member is lead and not leads
+    assert len(lead.member_action_ids) == 2
+
+
+def test_other_system_or_operation_starts_its_own_incident(declaration):
+    incidents = correlator({})
+    lead, _ = incidents.correlate(declaration("internal-cron", related_entities=["db:orders"]))
+    other_system, leads_system = incidents.correlate(
+        declaration("payment-api", system="aws", related_entities=["db:orders"])
+    )
+    other_operation, leads_operation = incidents.correlate(
+        declaration("payment-api", operation="delete_database", related_entities=["db:orders"])
+    )
+    assert leads_system and other_system is not lead
+    assert leads_operation and other_operation is not lead
+
+
+def test_member_keeps_its_own_score_when_riskier_than_the_lead(declaration):
+    incidents = correlator({"internal-cron": 0.25, "payment-api": 0.45})
+    lead_action = declaration("internal-cron", related_entities=["db:orders"])
+    member_action = declaration("payment-api", related_entities=["db:orders"])
+
+    async def assess():
+        incident, leads = incidents.correlate(lead_action)
+        lead_risk = await incidents.assess(incident, leads, lead_action)
+        incident, leads = incidents.correlate(member_action)
+        return lead_risk, await incidents.assess(incident, leads, member_action)
+
+    lead_risk, member_risk = asyncio.run(assess())
+    assert lead_risk.risk_score == 0.25
+    assert member_risk.risk_score == 0.45
+    assert member_risk.recommendation == "human_review"
+    assert member_risk.action_id == member_action.action_id
+    # the member was scored by the rule based fallback, not the LLM
+    assert incidents.risk_assessor.calls == [("internal-cron", True), ("payment-api", False)]
+
+
+def test_member_reuses_the_lead_assessment_when_not_riskier(declaration):
+    incidents = correlator({"checkout-api": 0.6, "checkout-worker": 0.3})
+    lead_action = declaration("checkout-api", related_entities=["db:orders"])
+    member_action = declaration("checkout-worker", related_entities=["db:orders"])
+
+    async def assess():
+        incident, leads = incidents.correlate(lead_action)
+        await incidents.assess(incident, leads, lead_action)
+        incident, leads = incidents.correlate(member_action)
+        return incident, await incidents.assess(incident, leads, member_action)
+
+    incident, member_risk = asyncio.run(assess())
+    assert member_risk.risk_score == 0.6
+    assert member_risk.similar_actions["incident"]["incident_id"] == incident.incident_id
+    assert incidents.assessments_saved == 1
+
+
+def test_member_assesses_itself_when_the_lead_is_cancelled(declaration):
+    incidents = correlator({"checkout-api": 0.6, "checkout-worker": 0.3})
+    lead_action = declaration("checkout-api", related_entities=["db:orders"])
+    member_action = declaration("checkout-worker", related_entities=["db:orders"])
+    started = []
+
+    class StalledAssessor(ScoredAssessor):
+        async def assess_risk(self, action, llm=True):
+            if action is lead_action:
+                started.append(action)
+                await asyncio.Event().wait()
+            return await super().assess_risk(action, llm)
+
+    incidents.risk_assessor = StalledAssessor(incidents.risk_assessor.scores)
+
+    async def assess():
+        incident, leads = incidents.correlate(lead_action)
+        lead = asyncio.create_task(incidents.assess(incident, leads, lead_action))
+        while not started:
+            await asyncio.sleep(0)
+        incident, leads = incidents.correlate(member_action)
+        member = asyncio.create_task(incidents.assess(incident, leads, member_action))
+        await asyncio.sleep(0)
+        lead.cancel()
+        await asyncio.gather(lead, return_exceptions=True)
+        return await asyncio.wait_for(member, 1)
+
+    member_risk = asyncio.run(assess())
+    assert member_risk.risk_score == 0.3
+    assert incidents.risk_assessor.calls == [("checkout-worker", True)]
+
+
+def test_incident_is_stored_once_a_second_member_joins(declaration):
+    incidents = correlator({})
+    lead, _ = incidents.correlate(declaration("checkout-api", related_entities=["db:orders"]))
+    assert incidents.store.incidents == {}
+    assert incidents.stats()["open_incidents"] == 1
+
+    incidents.correlate(declaration("checkout-worker", related_entities=["db:orders", "queue:orders"]))
+    assert list(incidents.store.incidents) == [lead.incident_id]
+    # the hint the member brought in correlates too
+    member, leads = incidents.correlate(declaration("billing-worker", related_entities=["queue:orders"]))
+    assert member is lead and not leads
+
+
+def test_incident_closes_once_the_window_passes(declaration):
+    incidents = correlator({})
+    lead, _ = incidents.correlate(declaration("checkout-api", related_entities=["db:orders"]))
+    incidents.correlate(declaration("checkout-worker", related_entities=["db:orders"]))
+    lone, _ = incidents.correlate(declaration("internal-cron", related_entities=["db:reports"]))
+    stale = (datetime.utcnow() - timedelta(seconds=2 * incidents.window_seconds)).isoformat()
+    lead.updated_at = lone.updated_at = stale
+
+    later, leads = incidents.correlate(declaration("checkout-api", related_entities=["db:orders"]))
+    assert leads and later is not lead
+    assert lead.status == "closed" and incidents.store.incidents[lead.incident_id].status == "closed"
+    # the lone declaration's incident was never stored
+    assert lone.incident_id not in incidents.store.incidents
+    assert incidents.stats()["open_incidents"] == 1
+
+
+def test_rebuild_indexes_stored_open_incidents(declaration):
+    incidents = correlator({})
+    lead, _ = incidents.correlate(declaration("checkout-api", related_entities=["db:orders"]))
+    incidents.correlate(declaration("checkout-worker", related_entities=["db:orders"]))
+
+    restarted = IncidentCorrelator(incidents.store, incidents.risk_assessor)
+    assert restarted.rebuild() == 1
+    member, leads = restarted.correlate(declaration("billing-worker", related_entities=["db:orders"]))
+    assert member.incident_id == lead.incident_id and not leads
@@ -0,0 +1,75 @@
+import asyncio
+
+from components.ATPStore import ATPStore
+from components.LearningEngine import RiskPriorLearner
+
+MONDAY_9 = "2026-01-05T09:15:00"
+MONDAY_21 = "2026-01-05T21:15:00"
+
+
+def record(store, declaration, timestamp, status):
+    action = declaration().dict()
+    action["timestamp"] = timestamp
+    store.action_history.append({"action": action, "verification": {"overall_status": status}})
+
+
+def test_priors_fold_only_new_history(declaration):
+    store = ATPStore()
+    learner = RiskPriorLearner(store)
+    for status in ("verified", "verified", "verification_failed"):
+        record(store, declaration, MONDAY_9, status)
+    record(store, declaration, MONDAY_21, "verified")
+
+    assert asyncio.run(learner.run_once())["processed"] == 4
+    assert asyncio.run(learner.run_once())["processed"] == 0
+    record(store, declaration, MONDAY_9, "verification_failed")
+    assert asyncio.run(learner.run_once())["processed"] == 1
+
+    action = declaration()
+    action.timestamp = MONDAY_9
+    prior = learner.get_prior(action)
+    assert prior["hour_of_week"] == 9
+    assert (prior["same_hour"]["successes"], prior["same_hour"]["failures"]) == (2, 2)
+    assert (prior["all_hours"]["successes"], prior["all_hours"]["failures"]) == (3, 2)
+    # Laplace smoothed
+    assert prior["all_hours"]["failure_rate"] == 3 / 7
+
+
+def test_entries_without_a_verification_are_skipped(declaration):
+    store = ATPStore()
+    learner = RiskPriorLearner(store)
+    store.action_history.append({"action": declaration().dict(), "verification": {}})
+
+    assert asyncio.run(learner.run_once())["processed"] == 1
+    assert store.risk_priors == {}
+
+
+def test_new_learner_starts_from_the_stored_priors(declaration):
+    store = ATPStore()
+    record(store, declaration, MONDAY_9, "verification_failed")
+    asyncio.run(RiskPriorLearner(store).run_once())
+
+    learner = RiskPriorLearner(store)
+    action = declaration()
+    action.timestamp = MONDAY_21
+    assert learner.get_prior(action)["all_hours"]["failures"] == 1
+    assert asyncio.run(learner.run_once())["processed"] == 0
+
+
+def test_learner_created_before_the_store_opens_picks_up_the_stored_priors(declaration, tmp_path):
+    db_path = str(tmp_path / "atp.db")
+    store = ATPStore(db_path)
+    store.open()
+    action = declaration().dict()
+    action["timestamp"] = MONDAY_9
+    store.merge_risk_priors(RiskPriorLearner.JOB_NAME, {RiskPriorLearner._key(action): [0, 3]}, 3)
+
+    # as at import time: the learner is built before the startup opens the store
+    reopened = ATPStore(db_path)
+    learner = RiskPriorLearner(reopened)
+    reopened.open()
+    assert learner.rebuild() == 1
+
+    action = declaration()
+    action.timestamp = MONDAY_21
+    assert learner.get_prior(action)["all_hours"]["failures"] == 3
@@ -0,0 +1,49 @@
+from components.Metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("atp_test_seconds", "Test latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "assess")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP atp_test_seconds Test latency", "# TYPE atp_test_seconds histogram"]
+    assert lines[2:] == [
+        'atp_test_seconds_bucket{stage="assess",le="0.1"} 2',
+        'atp_test_seconds_bucket{stage="assess",le="1.0"} 3',
+        'atp_test_seconds_bucket{stage="assess",le="+Inf"} 4',
+        'atp_test_seconds_sum{stage="assess"} 3.65',
+        'atp_test_seconds_count{stage="assess"} 4',
+    ]
+
+
+def test_counters_read_callbacks_at_scrape_time_and_escape_labels():
+    registry = MetricsRegistry()
+    counts = {("ok",): 1}
+    registry.counter("atp_test_total", "Test count", ("outcome",), callback=lambda: counts)
+    counter = registry.counter("atp_test_errors_total", "Test errors", ("error",))
+    counter.inc('say "hi"\n')
+
+    counts[("ok",)] = 5
+    rendered = registry.render()
+    assert 'atp_test_total{outcome="ok"} 5' in rendered
+    assert 'atp_test_errors_total{error="say \\"hi\\"\\n"} 1' in rendered
+
+
+def test_failing_callback_does_not_take_the_other_metrics_down():
+    registry = MetricsRegistry()
+    registry.gauge("atp_test_broken", "Broken", callback=lambda: 1 / 0)
+    registry.gauge("atp_test_fine", "Fine", callback=lambda: 3)
+
+    rendered = registry.render()
+    assert "# atp_test_broken unavailable: ZeroDivisionError" in rendered
+    assert "atp_test_fine 3" in rendered
+
+
+def test_requests_are_labelled_with_their_route_template(api):
+    api("GET", "/atp/v1/actions/act_missing/audit-trail")
+    rendered = api("GET", "/metrics").text
+
+    assert 'route="/atp/v1/actions/{action_id}/audit-trail",status="404"' in rendered
+    assert "act_missing" not in rendered
@@ -0,0 +1,104 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from components.PolicyEngine import PolicyEngine, parse_duration
+
+POLICY = {
+    "version": "2",
+    "default": {"approval_type": "human_required", "approvers": ["security_team"], "deadline": "24h"},
+    "rules": [
+        {
+            "name": "production_night",
+            "match": {"namespace": "production", "time_windows": [{"days": ["mon"], "start_hour": 22, "end_hour": 6}]},
+            "approval_type": "human_required",
+            "approvers": ["cto_team"],
+            "deadline": "30m"
+        },
+        {
+            "name": "checkout_restarts",
+            "match": {"service": ["checkout-api", "cart-api"], "operation": "restart_service", "risk_score_max": 0.5},
+            "approval_type": "auto_approve",
+            "approvers": ["system"],
+            "deadline": "1h"
+        },
+        {
+            "name": "low_risk",
+            "match": {"risk_level": "low"},
+            "approval_type": "auto_approve",
+            "approvers": ["system"],
+            "deadline": "24h",
+            "escalate_after": "4h"
+        }
+    ]
+}
+
+MONDAY = 0
+TUESDAY = 24
+
+
+def evaluate(compiled, hour_of_week=TUESDAY + 12, **attributes):
+    defaults = dict(
+        namespace="staging", service="checkout-api", system="kubernetes",
+        operation="restart_service", risk_level="medium", risk_score=0.4
+    )
+    rule, decision, deadline, escalate = compiled.evaluate(hour_of_week=hour_of_week, **{**defaults, **attributes})
+    return rule.name if rule else None, decision, deadline, escalate
+
+
+def test_first_matching_rule_wins_across_index_groups():
+    compiled = PolicyEngine.compile(POLICY)
+
+    assert evaluate(compiled, namespace="production", hour_of_week=MONDAY + 23)[0] == "production_night"
+    assert evaluate(compiled, namespace="production", risk_level="low")[0] == "checkout_restarts"
+    name, decision, deadline, escalate = evaluate(compiled, service="billing-api", risk_level="low")
+    assert (name, decision.approvers, deadline, escalate) == ("low_risk", ["system"], 86400, 14400)
+
+
+def test_residual_checks_fall_through_to_later_rules_and_the_default():
+    compiled = PolicyEngine.compile(POLICY)
+
+    # a night window wrapping around midnight ends at 06:00
+    assert evaluate(compiled, namespace="production", hour_of_week=MONDAY + 5)[0] == "production_night"
+    assert evaluate(compiled, namespace="production", hour_of_week=MONDAY + 6)[0] == "checkout_restarts"
+    # risk_score_max is exclusive
+    assert evaluate(compiled, risk_score=0.5, risk_level="low")[0] == "low_risk"
+    name, decision, deadline, _ = evaluate(compiled, risk_score=0.9)
+    assert (name, decision.approvers, deadline) == (None, ["security_team"], 86400)
+    assert compiled.stats()["default_hits"] == 1
+
+
+def test_broken_policy_file_keeps_the_active_policy(tmp_path):
+    path = tmp_path / "approval_policy.json"
+    path.write_text(json.dumps(POLICY))
+    engine = PolicyEngine(str(path))
+    assert engine.compiled.version == "2"
+
+    path.write_text("{not json")
+    os.utime(path, (0, 1))
+    assert engine.reload() is False
+    assert engine.compiled.version == "2" and engine.last_error
+
+    path.write_text(json.dumps({**POLICY, "version": "3"}))
+    os.utime(path, (0, 2))
+    assert engine.reload() is True
+    assert engine.compiled.version == "3" and engine.last_error is None
+
+
+def test_dry_run_counts_the_decisions_a_policy_would_change(declaration):
+    engine = PolicyEngine()
+    action = declaration().dict()
+    action["approval_request"] = {"approval_type": "human_required", "approvers": ["on_call_engineer"]}
+    risk = SimpleNamespace(risk_score=0.4, risk_level="medium")
+
+    assert engine.dry_run([action], {action["action_id"]: risk})["decisions_changed"] == 0
+    report = engine.dry_run([action], {action["action_id"]: risk}, POLICY)
+    assert report["decisions_changed"] == 1 and report["rule_hits"]["checkout_restarts"] == 1
+
+
+def test_durations():
+    assert [parse_duration(value) for value in ("90s", "30m", "4h", "1d", "24 hours")] == [90, 1800, 14400, 86400, 86400]
+    with pytest.raises(ValueError):
+        parse_duration("soon")
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from components.ATPStore import ATPStore
+from components.Bulkhead import Bulkhead
+from components.PreExecutionVerifier import PreExecutionVerifier
+from models import ActionStatus, ApprovalDecision, BulkheadSettings
+
+
+class NoProbes:
+    async def current_health(self, declaration):
+        return []
+
+
+def approved_action(store, declaration, approved_hours_ago: float):
+    action = declaration()
+    store.store_action(action)
+    store.update_action_status(action.action_id, ActionStatus.APPROVED)
+    store.store_approval(ApprovalDecision(
+        action_id=action.action_id,
+        decision="approved",
+        approver="on_call_engineer",
+        timestamp=(datetime.utcnow() - timedelta(hours=approved_hours_ago)).isoformat(),
+        reason="tests"
+    ))
+    return action.action_id
+
+
+def verifier(store, **kwargs):
+    return PreExecutionVerifier(store, NoProbes(), Bulkhead(BulkheadSettings()), **kwargs)
+
+
+def test_old_approval_stays_valid_by_default(declaration):
+    store = ATPStore()
+    action_id = approved_action(store, declaration, approved_hours_ago=48)
+
+    result = asyncio.run(verifier(store).check(action_id))
+    assert result.decision == "proceed"
+
+
+def test_approval_ttl_blocks_old_approvals_when_set(declaration):
+    store = ATPStore()
+    action_id = approved_action(store, declaration, approved_hours_ago=2)
+
+    result = asyncio.run(verifier(store, approval_ttl_seconds=3600).check(action_id))
+    assert result.decision == "block"
+    assert "valid for 3600s" in result.reason
+
+
+def test_skipped_action_is_not_dispatched_again(declaration):
+    store = ATPStore()
+    action_id = approved_action(store, declaration, approved_hours_ago=0)
+    store.update_action_status(action_id, ActionStatus.SKIPPED)
+
+    result = asyncio.run(verifier(store).check(action_id))
+    assert result.decision == "block"
+    assert result.reason == "Action is skipped"
@@ -0,0 +1,90 @@
+import asyncio
+
+from components.ProbeScheduler import ProbeScheduler
+from components.VerificationProbes import Probe
+from models import ProbeSpec
+
+
+class ScriptedProbe(Probe):
+    """Answers with the scripted health states, the last one repeats"""
+
+    def __init__(self, states, calls, deadline_seconds=1.0, url="http://checkout-api.test/health", max_interval=0.02):
+        super().__init__(ProbeSpec(
+            type="http", url=url, deadline_seconds=deadline_seconds, initial_interval=0.01, max_interval=max_interval
+        ))
+        self.states = states
+        self.calls = calls
+
+    async def check(self):
+        healthy = self.states[min(len(self.calls), len(self.states) - 1)]
+        self.calls.append(healthy)
+        return healthy, "up" if healthy else "down"
+
+
+def run(coroutine):
+    async def with_scheduler():
+        scheduler = ProbeScheduler(ttl_seconds=1.0)
+        try:
+            return scheduler, await coroutine(scheduler)
+        finally:
+            await scheduler.stop()
+    return asyncio.run(with_scheduler())
+
+
+def test_verifications_of_the_same_target_share_one_probe():
+    calls = []
+
+    async def verify(scheduler):
+        return await asyncio.gather(*(scheduler.run(ScriptedProbe([True], calls)) for _ in range(5)))
+
+    scheduler, checks = run(verify)
+    assert [check["status"] for check in checks] == ["pass"] * 5
+    assert len(calls) == 1
+    assert scheduler.stats()["fan_in"] == 5.0
+
+
+def test_unhealthy_target_is_polled_until_it_recovers():
+    calls = []
+
+    async def verify(scheduler):
+        return await scheduler.run(ScriptedProbe([False, False, True], calls))
+
+    _, check = run(verify)
+    assert check["status"] == "pass" and check["attempts"] == 3
+    assert check["time_to_healthy_ms"] is not None
+
+
+def test_target_that_never_recovers_fails_at_the_deadline():
+    calls = []
+
+    async def verify(scheduler):
+        return await scheduler.run(ScriptedProbe([False], calls, deadline_seconds=0.1))
+
+    _, check = run(verify)
+    assert check["status"] == "fail" and "deadline 0.1s expired" in check["details"]
+
+
+def test_loop_stops_once_nobody_is_subscribed():
+    calls = []
+
+    async def verify(scheduler):
+        await scheduler.run(ScriptedProbe([True], calls))
+        await asyncio.sleep(0.05)
+        return scheduler.stats()["active_loops"]
+
+    _, active_loops = run(verify)
+    assert active_loops == 0
+
+
+def test_probes_with_another_backoff_get_their_own_loop():
+    calls = []
+
+    async def verify(scheduler):
+        return await asyncio.gather(
+            scheduler.run(ScriptedProbe([True], calls)),
+            scheduler.run(ScriptedProbe([True], calls, max_interval=1.0))
+        )
+
+    scheduler, checks = run(verify)
+    assert [check["status"] for check in checks] == ["pass"] * 2
+    assert len(calls) == 2
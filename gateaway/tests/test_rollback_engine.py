@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from components.ATPStore import ATPStore
+from components.ExecutionPipeline import ExecutionPipeline
+from components.RollbackEngine import RollbackEngine
+from models import ActionTarget, CompensatingAction
+
+
+def step(step_id, *depends_on):
+    return CompensatingAction(
+        step_id=step_id,
+        target=ActionTarget(system="kubernetes", resource="deployment", operation="rollback"),
+        depends_on=list(depends_on)
+    )
+
+
+class RecordingEngine:
+    """Runs compensating actions instantly, failing the listed steps"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.started = []
+
+    async def execute(self, action, approval, attempt=1, idempotency_key=None):
+        step_id = action.payload["step_id"]
+        self.started.append(step_id)
+        await asyncio.sleep(0)
+        status = "failure" if step_id in self.failing else "success"
+        return SimpleNamespace(status=status, result={"step_id": step_id})
+
+
+def stored_action(store, declaration, steps):
+    action = declaration()
+    action.compensating_actions = steps
+    store.store_action(action)
+    return action.action_id
+
+
+@pytest.mark.parametrize("steps, message", [
+    ([step("a"), step("a")], "Duplicate"),
+    ([step("a", "missing")], "unknown steps"),
+    ([step("a", "c"), step("b", "a"), step("c", "b")], "cycle"),
+])
+def test_invalid_plans_are_rejected(steps, message):
+    with pytest.raises(ValueError, match=message):
+        RollbackEngine.validate(steps)
+
+
+def test_steps_run_after_their_dependencies_and_dependents_of_failures_are_skipped(declaration):
+    store = ATPStore()
+    engine = RecordingEngine(failing={"drain"})
+    rollbacks = RollbackEngine(store, engine)
+    action_id = stored_action(store, declaration, [
+        step("snapshot"), step("drain", "snapshot"), step("scale", "snapshot"), step("restore", "drain", "scale")
+    ])
+
+    rollback = asyncio.run(rollbacks.rollback(action_id, "verification_failed"))
+
+    assert engine.started[0] == "snapshot"
+    assert set(engine.started) == {"snapshot", "drain", "scale"}
+    statuses = {result.step_id: result.status for result in rollback.steps}
+    assert statuses == {"snapshot": "success", "drain": "failure", "scale": "success", "restore": "skipped"}
+    assert rollback.status == "partial"
+
+
+def failed_verification_pipeline(store, action_id, execution_status, rollback_engine):
+    """A pipeline whose execution ends with the given status and fails verification"""
+    execution = SimpleNamespace(action_id=action_id, status=execution_status)
+    verification = SimpleNamespace(overall_status="verification_failed")
+    store.store_execution = lambda execution: None
+    store.store_verification = lambda verification: None
+    store.approvals[action_id] = object()
+
+    class Remediation:
+        calls = 0
+
+        async def execute(self, action, approval, attempt=1, idempotency_key=None):
+            Remediation.calls += 1
+            return execution
+
+    class Verifier:
+        async def verify(self, action, execution):
+            return verification
+
+    remediation = Remediation()
+    return ExecutionPipeline(store, remediation, Verifier(), rollback_engine), remediation, (execution, verification)
+
+
+def test_pipeline_records_a_failing_automatic_rollback_instead_of_raising(declaration):
+    store = ATPStore()
+    action_id = stored_action(store, declaration, [step("a", "b"), step("b", "a")])
+    pipeline, remediation, outcome = failed_verification_pipeline(
+        store, action_id, "success", RollbackEngine(store, RecordingEngine())
+    )
+    assert asyncio.run(pipeline.run(action_id)) == outcome
+
+    assert remediation.calls == 1
+    assert store.rollbacks[action_id].status == "failed"
+    errors = [entry for entry in store.audit_logs[action_id] if entry["event"] == "rollback_error"]
+    assert errors and "cycle" in errors[0]["data"]["error"]
+
+
+def test_failed_execution_is_not_rolled_back(declaration):
+    store = ATPStore()
+    action_id = stored_action(store, declaration, [step("a")])
+    engine = RecordingEngine()
+    pipeline, _, _ = failed_verification_pipeline(store, action_id, "failure", RollbackEngine(store, engine))
+    asyncio.run(pipeline.run(action_id))
+
+    assert engine.started == []
+    assert action_id not in store.rollbacks
@@ -0,0 +1,50 @@
+import json
+from datetime import datetime
+
+from components.ATPStore import ATPStore
+from components.Serialization import FastJSONResponse, compose, dumps, loads
+from models import ActionStatus, RiskAssessment
+
+
+def test_models_enums_and_datetimes_are_encoded():
+    moment = datetime(2026, 1, 5, 9, 15)
+    encoded = dumps({"status": ActionStatus.APPROVED, "at": moment, "counts": {1: 2}})
+    assert loads(encoded) == {"status": "approved", "at": moment.isoformat(), "counts": {"1": 2}}
+
+
+def test_compose_embeds_encoded_values():
+    body = compose({"action_id": dumps("act_1"), "risk": dumps({"score": 0.5}), "approval": None})
+    assert json.loads(body) == {"action_id": "act_1", "risk": {"score": 0.5}, "approval": None}
+    assert FastJSONResponse(body).body == body
+
+
+def test_stored_records_are_encoded_once(declaration):
+    store = ATPStore()
+    action = declaration()
+    store.store_action(action)
+    store.store_risk_assessment(RiskAssessment(
+        action_id=action.action_id,
+        timestamp=datetime.utcnow().isoformat(),
+        risk_score=0.3,
+        risk_level="low",
+        risk_factors=[],
+        similar_actions={},
+        recommendation="auto_approve",
+        confidence=0.75
+    ))
+
+    encoded = store.encoded("risk_assessment", action.action_id)
+    assert loads(encoded)["risk_score"] == 0.3
+    assert store.encoded("risk_assessment", action.action_id) is encoded
+    assert store.encoded("verification", action.action_id) is None
+
+
+def test_stored_declaration_is_validated_once(declaration):
+    store = ATPStore()
+    action = declaration()
+    store.store_action(action)
+
+    first = store.declaration(action.action_id)
+    assert store.declaration(action.action_id) is first
+    store.update_action_status(action.action_id, ActionStatus.APPROVED)
+    assert first.status == ActionStatus.APPROVED
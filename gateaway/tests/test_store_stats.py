@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from components.ATPStore import ATPStore
+from models import ActionStatus, ApprovalDecision, ExecutionResultModel, RiskAssessment
+
+
+def assessed(store, declaration, service, namespace, risk_score, risk_level):
+    action = declaration(service=service, namespace=namespace)
+    store.store_action(action)
+    store.store_risk_assessment(RiskAssessment(
+        action_id=action.action_id,
+        timestamp=datetime.utcnow().isoformat(),
+        risk_score=risk_score,
+        risk_level=risk_level,
+        risk_factors=[],
+        similar_actions={},
+        recommendation="human_review",
+        confidence=0.75
+    ))
+    return action.action_id
+
+
+def approve_and_execute(store, action_id, status):
+    now = datetime.utcnow().isoformat()
+    store.store_approval(ApprovalDecision(
+        action_id=action_id, decision="approved", approver="oncall", timestamp=now, reason="tests"
+    ))
+    store.update_action_status(action_id, ActionStatus.APPROVED)
+    store.store_execution(ExecutionResultModel(
+        action_id=action_id, started_at=now, completed_at=now, status=status, result={}, side_effects=[]
+    ))
+
+
+def populate(store, declaration):
+    checkout = assessed(store, declaration, "checkout-api", "production", 0.8, "high")
+    approve_and_execute(store, checkout, "success")
+    reporter = assessed(store, declaration, "batch-reporter", "staging", 0.2, "low")
+    approve_and_execute(store, reporter, "failure")
+    assessed(store, declaration, "batch-reporter", "staging", 0.4, "medium")
+
+
+def test_counters_follow_every_write(declaration):
+    store = ATPStore()
+    populate(store, declaration)
+
+    stats = store.get_stats()
+    assert stats["actions"] == 3
+    assert stats["status_counts"] == {"approved": 2, "declared": 1}
+    assert stats["risk_levels"] == {"high": 1, "low": 1, "medium": 1}
+    assert stats["mean_risk_score"] == round(1.4 / 3, 4)
+
+    current = stats["rollups"][-1]
+    assert (current["declared"], current["approved"], current["executed"], current["failed"]) == (3, 2, 2, 1)
+
+
+def test_rollups_are_split_by_namespace_and_service(declaration):
+    store = ATPStore()
+    populate(store, declaration)
+
+    stats = store.get_stats(period="day", window=1, namespace="staging")
+    assert [(service["namespace"], service["service"]) for service in stats["services"]] == [("staging", "batch-reporter")]
+    assert stats["services"][0]["declared"] == 2
+    assert stats["services"][0]["mean_risk_score"] == 0.3
+
+
+def test_rollups_survive_a_restart(declaration, tmp_path):
+    path = str(tmp_path / "atp_store.db")
+    store = ATPStore(db_path=path)
+    store.open()
+    populate(store, declaration)
+    before = store.get_stats()
+
+    reopened = ATPStore(db_path=path)
+    reopened.open()
+    assert reopened.get_stats() == before
@@ -0,0 +1,86 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+from components.Profiler import RequestProfiler
+from components.Tracing import TraceBuffer, Tracer, TracingMiddleware
+
+
+def test_bound_traces_are_kept_next_to_the_audit_trail():
+    tracer = Tracer()
+
+    with tracer.trace("POST /atp/v1/actions/declare"):
+        tracer.bind("act_1")
+        with tracer.stage("risk_assessment"):
+            pass
+    with tracer.trace("GET /atp/v1/health"):
+        pass
+
+    traces = tracer.recent.get("act_1")
+    assert len(traces) == 1 and tracer.exported == 1
+    assert traces[0]["name"] == "POST /atp/v1/actions/declare"
+    assert [span["name"] for span in traces[0]["spans"]] == ["risk_assessment"]
+
+
+def test_trace_buffer_drops_the_oldest_actions_and_traces():
+    buffer = TraceBuffer(max_actions=2, per_action=2)
+    for trace_id in range(3):
+        buffer.add("act_1", {"trace_id": trace_id})
+    buffer.add("act_2", {"trace_id": 0})
+    buffer.add("act_1", {"trace_id": 3})
+    buffer.add("act_3", {"trace_id": 0})
+
+    assert [trace["trace_id"] for trace in buffer.get("act_1")] == [2, 3]
+    assert buffer.get("act_2") == []
+    assert len(buffer) == 2
+
+
+def respond(media_type: bytes):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", media_type)]})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return app
+
+
+def call(middleware):
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/atp/v1/events"}
+    asyncio.run(middleware(scope, receive, send))
+
+
+def test_streaming_responses_are_not_profiled():
+    profiler = RequestProfiler()
+    profiler.start(sample_rate=1.0, duration_seconds=60)
+
+    call(TracingMiddleware(respond(b"text/event-stream; charset=utf-8"), Tracer(), profiler))
+    call(TracingMiddleware(respond(b"application/x-ndjson"), Tracer(), profiler))
+    assert profiler.sampled == 0 and profiler.streaming == 2
+    assert profiler._active is None
+
+    call(TracingMiddleware(respond(b"application/json"), Tracer(), profiler))
+    assert profiler.sampled == 1
+    assert profiler.report()["skipped_streaming"] == 2
+
+
+def test_declare_trace_is_served_with_the_audit_trail_but_not_stored_in_it(api):
+    body = {
+        "action_id": "ignored",
+        "workflow_id": "wf",
+        "initiator": {"type": "webhook", "source": "tests"},
+        "timestamp": datetime.utcnow().isoformat(),
+        "action_type": "service.remediation",
+        "target": {"system": "kubernetes", "resource": "deployment", "operation": "restart_service"},
+        "payload": {},
+        "context": {"service": f"traced-{uuid.uuid4().hex[:6]}", "namespace": "staging"}
+    }
+    declared = api("POST", "/atp/v1/actions/declare", json=body)
+    assert declared.status_code == 200
+
+    trail = api("GET", f"/atp/v1/actions/{declared.json()['action_id']}/audit-trail").json()
+    assert "trace" not in [entry["event"] for entry in trail["audit_trail"]]
+    assert [trace["name"] for trace in trail["traces"]] == ["POST /atp/v1/actions/declare"]
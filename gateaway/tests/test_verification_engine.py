@@ -0,0 +1,83 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from components.VerficationEngine import VerificationEngine
+from models import ProbeSpec
+
+
+def engine_answering(statuses, delay=0.0):
+    """Verification engine whose HTTP probes get the status of their URL's path"""
+    async def handler(request):
+        await asyncio.sleep(delay)
+        return httpx.Response(statuses[request.url.path])
+
+    engine = VerificationEngine(deadline_seconds=1)
+    engine._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return engine
+
+
+def probe(path, check="service_health", deadline_seconds=0.2):
+    return ProbeSpec(
+        type="http", url=f"http://checkout-api.test{path}", check=check,
+        deadline_seconds=deadline_seconds, initial_interval=0.01, max_interval=0.05
+    )
+
+
+def verify(engine, action, status="success"):
+    async def run():
+        try:
+            return await engine.verify(action, SimpleNamespace(status=status))
+        finally:
+            await engine.close()
+    return asyncio.run(run())
+
+
+def test_failing_side_effect_probe_is_an_anomaly(declaration):
+    action = declaration()
+    action.verification_probes = [probe("/health"), probe("/orders", check="side_effects")]
+
+    result = verify(engine_answering({"/health": 200, "/orders": 503}), action)
+    assert result.overall_status == "anomaly_detected"
+    assert {check["name"]: check["status"] for check in result.checks if "name" in check} == {
+        "http://checkout-api.test/health": "pass",
+        "http://checkout-api.test/orders": "fail"
+    }
+
+
+def test_failing_health_probe_fails_the_verification(declaration):
+    action = declaration()
+    action.verification_probes = [probe("/health")]
+
+    result = verify(engine_answering({"/health": 503}), action)
+    assert result.overall_status == "verification_failed" and result.confidence == 0.95
+
+
+def test_probes_run_concurrently(declaration):
+    action = declaration()
+    action.verification_probes = [probe(f"/health/{i}", deadline_seconds=1) for i in range(4)]
+
+    started = time.perf_counter()
+    result = verify(engine_answering({f"/health/{i}": 200 for i in range(4)}, delay=0.1), action)
+    assert result.overall_status == "verified"
+    assert time.perf_counter() - started < 0.3
+
+
+def test_failed_execution_is_not_probed(declaration):
+    action = declaration()
+    action.verification_probes = [probe("/health")]
+
+    result = verify(engine_answering({}), action, status="failure")
+    assert result.overall_status == "verification_failed" and result.confidence == 0.6
+    assert [check["status"] for check in result.checks if check["type"] == "service_health"] == ["skipped"]
+
+
+def test_uptime_kuma_probe_without_a_url_is_skipped(declaration):
+    action = declaration()
+    action.verification_probes = [ProbeSpec(type="uptime_kuma", monitor_id=3, status_page="ops")]
+
+    result = verify(engine_answering({}), action)
+    assert result.overall_status == "verified"
+    assert [check["type"] for check in result.checks if check["status"] == "skipped"][0] == "probe_config"